@@ -2,9 +2,9 @@
 
 import logging
 
-from actigraphy import app
+from actigraphy import app, wsgi
 from actigraphy.core import config
-from actigraphy.io import preprocess
+from actigraphy.io import preprocess, render, synthetic
 
 
 def main_entrypoint() -> None:
@@ -13,11 +13,29 @@ def main_entrypoint() -> None:
     dash_app.run_server(port=8051, host="0.0.0.0")  # noqa: S104
 
 
+def serve_entrypoint() -> None:
+    """Runs the production server, see `actigraphy.wsgi`."""
+    config.initialize_logger(logging_level=logging.INFO)
+    wsgi.serve()
+
+
 def preprocess_entrypoint() -> None:
     """Entrypoint for pre-processing the data."""
     config.initialize_logger(logging_level=logging.DEBUG)
     preprocess.run()
 
 
+def render_entrypoint() -> None:
+    """Entrypoint for rendering the day plots of preprocessed data."""
+    config.initialize_logger(logging_level=logging.INFO)
+    render.run()
+
+
+def synthetic_entrypoint() -> None:
+    """Entrypoint for generating a synthetic study."""
+    config.initialize_logger(logging_level=logging.INFO)
+    synthetic.run()
+
+
 if __name__ == "__main__":
     main_entrypoint()
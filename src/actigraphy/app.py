@@ -1,6 +1,8 @@
 """Main app setup for the Actigraphy app."""
 
+import argparse
 import logging
+import pathlib
 
 import dash
 import dash_bootstrap_components
@@ -12,21 +14,28 @@ from actigraphy.core import callback_manager, cli, config
 settings = config.get_settings()
 APP_NAME = settings.APP_NAME
 LOGGER_NAME = settings.LOGGER_NAME
+ASSETS_DIR = pathlib.Path(__file__).parent / "assets"
 
 
-def create_app() -> dash.Dash:
+def create_app(args: argparse.Namespace | None = None) -> dash.Dash:
     """Creates a new instance of the Actigraphy app.
 
+    Args:
+        args: The command line arguments, see `cli.parse_args`. Parsed from
+            the command line if not given.
+
     Returns:
         A new instance of the Actigraphy app.
     """
-    args = cli.parse_args()
+    if args is None:
+        args = cli.parse_args()
     config.initialize_logger(logging_level=args.verbosity)
     logger = logging.getLogger(LOGGER_NAME)
 
     logger.info("Starting Actigraphy app")
     app = dash.Dash(
         APP_NAME,
+        assets_folder=str(ASSETS_DIR),
         external_stylesheets=[dash_bootstrap_components.themes.BOOTSTRAP],
     )
     app.title = APP_NAME
@@ -36,12 +45,12 @@ def create_app() -> dash.Dash:
     callback_manager.global_manager.attach_to_app(app)
 
     logger.info("Creating app layout")
-    subject_directories = cli.get_subject_folders(args)
+    data_dir = cli.get_input_folder(args)
     app.layout = html.Div(
         (
             dcc.Store(id="file_manager", storage_type="session"),
             dcc.Store(id="check-done", storage_type="session"),
-            file_selection.file_selection(subject_directories),
+            file_selection.file_selection(str(data_dir)),
             html.Pre(id="annotations-data"),
             app_license.app_license(),
         ),
@@ -60,7 +69,10 @@ def attach_health_endpoint(app: dash.Dash) -> None:
 
 
 def run_app() -> None:
-    """Entrypoint for the application."""
+    """Entrypoint for the application, using Flask's development server.
+
+    See `actigraphy.wsgi` for serving several users at once.
+    """
     app = create_app()
     attach_health_endpoint(app)
     app.run(debug=False, host="0.0.0.0", port=8051)  # noqa: S104
@@ -0,0 +1,203 @@
+/**
+ * Clientside callbacks of the sleep window sliders.
+ *
+ * Resolving overlapping sleep windows and moving their rectangles in the graph
+ * need no server data, so they run in the browser and slider feedback does not
+ * depend on server load or network latency. The server only persists the
+ * result, see `graph.persist_sleep_window`.
+ */
+(function (root) {
+  "use strict";
+
+  /**
+   * Moves a dragged sleep window out of the other sleep windows.
+   *
+   * Slider ranges are not allowed to intersect with each other. The other
+   * windows leave free gaps within the limits. The window is clipped to the
+   * gap it overlaps most. A window that overlaps no gap, i.e. lies within
+   * other windows, is moved to the gap nearest to its center, keeping its
+   * length where the gap allows. Ties go to the earlier gap.
+   *
+   * @param {number[]} dragValues The slider values of the dragged window.
+   * @param {number[][]} otherDragValues The slider values of the other windows.
+   * @param {number[]} limits The smallest and largest slider value.
+   * @returns {number[]|null} The adjusted slider values of the dragged window,
+   *     or null if the other windows leave no free gap.
+   */
+  function resolveOverlap(dragValues, otherDragValues, limits) {
+    if (!dragValues || dragValues.length === 0) {
+      return dragValues;
+    }
+
+    const occupied = otherDragValues
+      .filter((values) => values && values.length > 0)
+      .map((values) => [values[0], values[1]])
+      .sort((first, second) => first[0] - second[0] || first[1] - second[1]);
+    const gaps = [];
+    let lower = limits[0];
+    for (const [occupiedLower, occupiedUpper] of occupied) {
+      const upper = Math.min(occupiedLower - 1, limits[1]);
+      if (lower <= upper) {
+        gaps.push([lower, upper]);
+      }
+      lower = Math.max(lower, occupiedUpper + 1);
+    }
+    if (lower <= limits[1]) {
+      gaps.push([lower, limits[1]]);
+    }
+    if (gaps.length === 0) {
+      return null;
+    }
+
+    const [onset, wakeup] = dragValues;
+    const center = (onset + wakeup) / 2;
+    let best = null;
+    let bestOverlap = -1;
+    let bestDistance = Infinity;
+    for (const gap of gaps) {
+      const overlap = Math.max(
+        Math.min(wakeup, gap[1]) - Math.max(onset, gap[0]) + 1,
+        0,
+      );
+      const distance = Math.max(gap[0] - center, center - gap[1], 0);
+      if (
+        overlap > bestOverlap ||
+        (overlap === bestOverlap && distance < bestDistance)
+      ) {
+        best = gap;
+        bestOverlap = overlap;
+        bestDistance = distance;
+      }
+    }
+
+    const [gapLower, gapUpper] = best;
+    if (onset <= gapUpper && wakeup >= gapLower) {
+      return [Math.max(onset, gapLower), Math.min(wakeup, gapUpper)];
+    }
+    const length = wakeup - onset;
+    if (gapUpper < onset) {
+      return [Math.max(gapUpper - length, gapLower), gapUpper];
+    }
+    return [gapLower, Math.min(gapLower + length, gapUpper)];
+  }
+
+  /**
+   * Returns the figure with one sleep window rectangle moved.
+   *
+   * The sleep window shapes precede all other shapes and are ordered like the
+   * sliders, see `graph._build_figure`. The figure is not modified.
+   *
+   * @param {object} figure The figure shown.
+   * @param {number} index The index of the slider.
+   * @param {number[]} values The slider values of the sleep window.
+   * @param {number} maximum The largest slider value.
+   * @param {number[]} xRange The range of the x-axis of the figure.
+   * @returns {object} The figure with the moved rectangle.
+   */
+  function moveSleepWindowShape(figure, index, values, maximum, xRange) {
+    const limits = values.map(
+      (value) => xRange[0] + ((xRange[1] - xRange[0]) * value) / maximum,
+    );
+    const shapes = figure.layout.shapes.slice();
+    shapes[index] = Object.assign({}, shapes[index], {
+      x0: limits[0],
+      x1: limits[1],
+    });
+    return Object.assign({}, figure, {
+      layout: Object.assign({}, figure.layout, { shapes: shapes }),
+    });
+  }
+
+  /**
+   * Resolves the released slider, moves its rectangle and requests persistence.
+   *
+   * @param {number[][]} dragValues The values of all range sliders.
+   * @param {number[]} minima The minimum values of all range sliders.
+   * @param {number[]} maxima The maximum values of all range sliders.
+   * @param {string[]} primaryKeys The primary keys of the sleep times.
+   * @param {number} dayIndex The index of the day shown.
+   * @param {object} figure The figure shown.
+   * @param {number[]|null} xRange The range of the x-axis of the figure.
+   * @returns {Array} The slider values, the figure and the sleep window to
+   *     persist.
+   */
+  function updateSleepWindows(
+    dragValues,
+    minima,
+    maxima,
+    primaryKeys,
+    dayIndex,
+    figure,
+    xRange,
+  ) {
+    const clientside = root.dash_clientside;
+    const noUpdate = clientside.no_update;
+    const triggered = clientside.callback_context.triggered;
+    if (!triggered || triggered.length === 0) {
+      return [noUpdate, noUpdate, noUpdate];
+    }
+    const propId = triggered[0].prop_id;
+    let index;
+    try {
+      index = JSON.parse(propId.slice(0, propId.lastIndexOf("."))).index;
+    } catch (error) {
+      return [noUpdate, noUpdate, noUpdate];
+    }
+    if (index === undefined || index >= dragValues.length) {
+      return [noUpdate, noUpdate, noUpdate];
+    }
+
+    const otherDragValues = dragValues.filter((_, other) => other !== index);
+    const values = resolveOverlap(dragValues[index], otherDragValues, [
+      minima[index],
+      maxima[index],
+    ]);
+    if (values === null) {
+      // There is no place for the window; it is neither moved nor stored.
+      return [noUpdate, noUpdate, noUpdate];
+    }
+    const isMoved =
+      values[0] !== dragValues[index][0] || values[1] !== dragValues[index][1];
+    let newDragValues = noUpdate;
+    if (isMoved) {
+      newDragValues = dragValues.slice();
+      newDragValues[index] = values;
+    }
+
+    let newFigure = noUpdate;
+    if (figure && xRange && figure.layout.shapes.length > index) {
+      newFigure = moveSleepWindowShape(
+        figure,
+        index,
+        values,
+        maxima[index],
+        xRange,
+      );
+    }
+
+    return [
+      newDragValues,
+      newFigure,
+      {
+        index: index,
+        primary_key: Number(primaryKeys[index]),
+        day_index: dayIndex,
+        values: values,
+        // Persists repeated releases at the same position as well.
+        time: Date.now(),
+      },
+    ];
+  }
+
+  const namespace = {
+    resolveOverlap: resolveOverlap,
+    moveSleepWindowShape: moveSleepWindowShape,
+    updateSleepWindows: updateSleepWindows,
+  };
+  root.dash_clientside = Object.assign({}, root.dash_clientside, {
+    sleep_windows: namespace,
+  });
+  if (typeof module !== "undefined" && module.exports) {
+    module.exports = namespace;
+  }
+})(typeof window !== "undefined" ? window : globalThis);
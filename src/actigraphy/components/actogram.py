@@ -0,0 +1,191 @@
+"""Defines the actogram overview component of the Actigraphy app.
+
+The actogram shows the whole recording at once, one double-plotted row per
+day, with the sleep windows outlined and non-wear shaded. Clicking a row
+selects that day in the day slider.
+"""
+
+import logging
+from typing import Any
+
+import dash
+from dash import dcc, html
+from plotly import graph_objects
+
+from actigraphy.components import utils as components_utils
+from actigraphy.core import cache, callback_manager, config
+from actigraphy.database import database
+from actigraphy.database import utils as database_utils
+from actigraphy.plotting import actogram as actogram_plots
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+ACTOGRAM_BIN_MINUTES = settings.ACTOGRAM_BIN_MINUTES
+
+logger = logging.getLogger(LOGGER_NAME)
+
+METRICS = {"sensor_acceleration": "Arm movement", "sensor_angle": "Angle"}
+SLEEP_WINDOW_COLOR = "red"
+CURRENT_DAY_COLOR = "blue"
+
+
+def actogram() -> html.Div:
+    """Builds the actogram overview component.
+
+    Returns:
+        html.Div: A Dash HTML div containing the actogram and its metric
+            selection.
+    """
+    return html.Div(
+        children=[
+            html.Details(
+                children=[
+                    html.Summary("Recording overview"),
+                    dcc.RadioItems(
+                        options=[
+                            {"label": f" {label}", "value": metric}
+                            for metric, label in METRICS.items()
+                        ],
+                        value="sensor_acceleration",
+                        id="actogram_metric",
+                        inline=True,
+                        inputStyle={"marginLeft": "10px"},
+                    ),
+                    dcc.Graph(id="actogram", config={"displayModeBar": False}),
+                ],
+                open=True,
+            ),
+            dcc.Store(id="actogram_loaded"),
+        ],
+        style={"marginLeft": "55px", "marginRight": "55px"},
+    )
+
+
+@callback_manager.global_manager.callback(
+    dash.Output("actogram", "figure"),
+    dash.Output("actogram_loaded", "data"),
+    dash.Input("trigger_day_load", "value"),
+    dash.Input("actogram_metric", "value"),
+    dash.State("day_slider", "value"),
+    dash.State("file_manager", "data"),
+    dash.State("actogram_loaded", "data"),
+    prevent_initial_call=True,
+)
+def update_actogram(
+    _trigger_load: str,
+    metric: str,
+    day_index: int,
+    file_manager: dict[str, str],
+    loaded: str | None,
+) -> tuple[graph_objects.Figure | dash.Patch, str]:
+    """Draws the actogram, or updates its outlines if it is already drawn.
+
+    Args:
+        _trigger_load: A trigger for the callback.
+        metric: The data point attribute to show.
+        day_index: The index of the day shown in the graph.
+        file_manager: A dictionary containing file paths.
+        loaded: The subject and metric of the actogram currently shown.
+
+    Returns:
+        The actogram, or a patch of its shapes, and the subject and metric
+        shown.
+
+    Notes:
+        The days and sleep times are taken from the context of the day, which
+        the other callbacks of a day change share, see
+        `components_utils.get_day_context`.
+    """
+    logger.debug("Updating actogram.")
+    context = components_utils.get_day_context(
+        day_index,
+        file_manager["database"],
+        file_manager["identifier"],
+    )
+    subject = context.subject
+    shapes = [
+        _current_day_shape(day_index),
+        *actogram_plots.window_shapes(
+            context.dates,
+            [
+                (row, sleep_time.onset_with_tz, sleep_time.wakeup_with_tz)
+                for row, day in enumerate(context.days)
+                for sleep_time in day.sleep_times
+            ],
+            SLEEP_WINDOW_COLOR,
+        ),
+    ]
+
+    shown = f"{file_manager['database']}:{metric}"
+    if loaded == shown:
+        patch_figure = dash.Patch()
+        patch_figure["layout"]["shapes"] = shapes
+        return patch_figure, shown
+
+    bins = cache.binned_data.get_or_create(
+        (
+            file_manager["database"],
+            file_manager["identifier"],
+            subject.id,
+            str(subject.time_created),
+            ACTOGRAM_BIN_MINUTES,
+        ),
+        lambda: database_utils.bin_data_points(
+            next(database.session_generator(file_manager["database"])),
+            subject.id,
+            ACTOGRAM_BIN_MINUTES,
+        ),
+    )
+    value_index = 1 if metric == "sensor_angle" else 2
+    figure = actogram_plots.build_actogram(
+        context.dates,
+        [row[0] for row in bins],
+        [row[value_index] for row in bins],
+        [row[3] for row in bins],
+        ACTOGRAM_BIN_MINUTES,
+        METRICS[metric],
+    )
+    figure.update_layout(shapes=shapes)
+    return figure, shown
+
+
+@callback_manager.global_manager.callback(
+    dash.Output("day_slider", "value"),
+    dash.Input("actogram", "clickData"),
+    dash.State("day_slider", "max"),
+    prevent_initial_call=True,
+)
+def select_day_from_actogram(
+    click_data: dict[str, list[dict[str, Any]]],
+    max_day_index: int,
+) -> int:
+    """Selects the clicked row of the actogram in the day slider.
+
+    Args:
+        click_data: The point clicked in the actogram.
+        max_day_index: The largest day index of the day slider.
+
+    Returns:
+        int: The index of the clicked day.
+
+    Notes:
+        The last row has no slider position, as the last day is not shown in
+        the graph; it selects the preceding day.
+    """
+    row = int(click_data["points"][0]["y"])
+    return min(row, max_day_index)
+
+
+def _current_day_shape(day_index: int) -> dict[str, Any]:
+    """Outlines the 36 hours shown in the graph on the actogram."""
+    return {
+        "type": "rect",
+        "xref": "x",
+        "yref": "y",
+        "x0": 12,
+        "x1": 48,
+        "y0": day_index - 0.5,
+        "y1": day_index + 0.5,
+        "line": {"color": CURRENT_DAY_COLOR, "width": 2, "dash": "dot"},
+        "fillcolor": "rgba(0, 0, 0, 0)",
+    }
@@ -1,7 +1,5 @@
 """Dash HTML div for a slider component for selecting days."""
 
-import datetime
-import itertools
 import logging
 import uuid
 
@@ -10,7 +8,6 @@ from dash import dcc, html
 
 from actigraphy.components import utils
 from actigraphy.core import callback_manager, config
-from actigraphy.database import crud, database
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
@@ -74,8 +71,9 @@ def update_daylight_savings(
         file_manager: A dictionary containing file paths.
 
     Returns:
-        int: The index of the first data point that is affected by daylight
-            savings time.
+        The time of the last data point before the daylight savings shift,
+        the shift in seconds, both None if the day has no shift, and a
+        trigger for the callbacks that load the day.
 
     Notes:
         The trigger_day_load output is solely used to trigger other callbacks.
@@ -83,39 +81,13 @@ def update_daylight_savings(
         have to consider the previous value.
     """
     logger.debug("Updating daylight savings time data")
-    session = next(database.session_generator(file_manager["database"]))
-    day_data = utils.get_day_data(
+    context = utils.get_day_context(
         day_index,
         file_manager["database"],
         file_manager["identifier"],
     )
-    day_model = crud.read_day_by_subject(session, day_index, file_manager["identifier"])
-    times_of_interest = [
-        data_point
-        for data_point in day_data
-        if (
-            data_point.timestamp.date() == day_model.date
-            and data_point.timestamp.hour >= 12  # noqa: PLR2004
-        )
-        or (data_point.timestamp.date() == day_model.date + datetime.timedelta(days=1))
-    ]
-    n_timezones = len(
-        {data_point.timestamp_utc_offset for data_point in times_of_interest},
+    return (
+        context.daylight_savings_timepoint,
+        context.daylight_savings_shift,
+        uuid.uuid4().hex,
     )
-    if n_timezones == 1:
-        return None, None, uuid.uuid4().hex
-
-    daylight_saving_differences = [
-        time_1.timestamp_utc_offset - time_2.timestamp_utc_offset
-        for time_1, time_2 in itertools.pairwise(times_of_interest)
-    ]
-    daylight_saving_shift = next(
-        (diff for diff in daylight_saving_differences if diff != 0),
-    )
-    daylight_saving_index = daylight_saving_differences.index(daylight_saving_shift)
-    daylight_saving_timestamp = times_of_interest[
-        daylight_saving_index
-    ].timestamp_with_tz
-
-    trigger_load = uuid.uuid4().hex
-    return str(daylight_saving_timestamp), daylight_saving_shift, trigger_load
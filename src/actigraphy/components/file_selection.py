@@ -2,8 +2,15 @@
 
 The file selection component contains an input box for the evaluator's name, and
 dropdown menu for selecting a subject.
+
+Subjects opened for the first time are ingested by a background job, see
+`jobs.ingests`, whose progress is polled until the subject can be shown. The
+dropdown lists the first subjects of the subject index that match the search,
+which runs on the server; the others are found by typing more of their
+identifier.
 """
 
+import functools
 import logging
 
 import dash
@@ -11,40 +18,45 @@ import dash_bootstrap_components
 from dash import dcc, html
 
 from actigraphy.components import (
+    actogram,
     day_slider,
     dst_banner,
     finished_checkbox,
     graph,
+    night_comparison,
     switches,
 )
-from actigraphy.core import callback_manager, config, exceptions
+from actigraphy.core import callback_manager, config, exceptions, jobs
 from actigraphy.core import utils as core_utils
-from actigraphy.database import crud, database
-from actigraphy.database import utils as database_utils
+from actigraphy.database import crud, database, models
+from actigraphy.io import preprocess, subject_index
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+INGEST_POLL_INTERVAL_MILLISECONDS = 1000
 
 logger = logging.getLogger(LOGGER_NAME)
 
 
-def file_selection(dropdown_choices: list[str]) -> html.Div:
+def file_selection(data_dir: str) -> html.Div:
     """Create a file selection Dash HTML div.
 
     Contains an input box for the evaluator's name, a dropdown menu for
     selecting a subject, and a spinner for indicating loading.
 
     Args:
-        dropdown_choices: A list of choices for the dropdown menu.
+        data_dir: The GGIR output folder.
 
     Returns:
         html.Div: A Dash HTML div containing the input box, dropdown menu, and
             spinner.
     """
+    entries, n_matches = subject_index.get_index(data_dir).search()
     drop_down = dcc.Dropdown(
-        dropdown_choices,
-        dropdown_choices[0],
+        _subject_options(entries, n_matches, ""),
+        entries[0].directory if entries else None,
         id="my-dropdown",
+        placeholder="Search subjects...",
     )
     loading_text = html.Div(
         [
@@ -71,22 +83,71 @@ def file_selection(dropdown_choices: list[str]) -> html.Div:
         style={"margin": 10},
     )
 
+    ingest_progress = html.Div(
+        [
+            html.Div(id="ingest_progress"),
+            dcc.Interval(
+                id="ingest_interval",
+                interval=INGEST_POLL_INTERVAL_MILLISECONDS,
+                disabled=True,
+            ),
+            dcc.Store(id="ingest_job"),
+            dcc.Store(id="subject_data_dir", data=data_dir),
+        ],
+    )
+
     return html.Div(
         [
             drop_down,
             loading_text,
             confirmation_button,
             spinner,
+            ingest_progress,
         ],
         style={"padding": 10},
     )
 
 
+@callback_manager.global_manager.callback(
+    dash.Output("my-dropdown", "options"),
+    dash.Input("my-dropdown", "search_value"),
+    dash.State("my-dropdown", "value"),
+    dash.State("subject_data_dir", "data"),
+    prevent_initial_call=True,
+)
+def search_subjects(
+    search_value: str | None,
+    value: str | None,
+    data_dir: str,
+) -> list[dict[str, str | bool]]:
+    """Lists the first subjects that match the search.
+
+    Args:
+        search_value: The text typed into the dropdown.
+        value: The selected subject folder.
+        data_dir: The GGIR output folder.
+
+    Returns:
+        The options of the dropdown.
+    """
+    index = subject_index.get_index(data_dir)
+    entries, n_matches = index.search(search_value or "")
+    options = _subject_options(entries, n_matches, search_value or "")
+    # Dash clears the selection if it is no longer one of the options.
+    selected = index.get(value) if value else None
+    if selected is not None and selected not in entries:
+        options.insert(0, _subject_option(selected))
+    return options
+
+
 @callback_manager.global_manager.callback(
     [
         dash.Output("annotations-data", "children"),
         dash.Output("loading", "children"),
         dash.Output("file_manager", "data"),
+        dash.Output("ingest_progress", "children"),
+        dash.Output("ingest_interval", "disabled"),
+        dash.Output("ingest_job", "data"),
     ],
     dash.Input("load_file_button", "n_clicks"),
     dash.State("my-dropdown", "value"),
@@ -95,9 +156,20 @@ def file_selection(dropdown_choices: list[str]) -> html.Div:
 def parse_files(
     n_clicks: int,  # pylint: disable=unused-argument n_clicks intentionally unused.  # noqa: ARG001
     filepath: str,
-) -> tuple[list[html.Div], str, dict[str, str]]:
+) -> tuple[
+    list[html.Div],
+    str,
+    dict[str, str] | None,
+    html.Div | None,
+    bool,
+    str | None,
+]:
     """Parses the contents of the selected files and returns the UI components.
 
+    Subjects that are not in their database yet are ingested in the
+    background. Repeated clicks while a subject is being ingested do not
+    start another ingest.
+
     Args:
         n_clicks: The number of times the parse button has been clicked. Used to trigger
             the callback.
@@ -105,16 +177,129 @@ def parse_files(
 
     Returns:
         tuple: A tuple containing the UI components to be displayed, an empty
-        string, a boolean indicating whether parsing was successful, and the
-        file manager object.
+        string, the file manager object, the progress of the ingest, whether
+        polling the ingest is disabled, and the path of the subject being
+        ingested.
 
     Notes:
         The last day is not shown in the UI, as all 36 hour windows are
         referenced by their first day.
     """
     logger.debug("Parsing files...")
-    file_manager = core_utils.FileManager(base_dir=filepath).__dict__
+    file_manager = _file_manager(filepath)
+
+    subject = _read_subject(file_manager.__dict__)
+    if subject is not None:
+        subject_index.update_subject(filepath)
+        return (
+            _subject_components(subject),
+            "",
+            file_manager.__dict__,
+            None,
+            True,
+            None,
+        )
+
+    logger.info("Subject not found in database. Ingesting subject.")
+    job = jobs.ingests.submit(
+        file_manager.database,
+        functools.partial(preprocess.create_subject_database, file_manager),
+        preprocess.estimate_ingest_memory(file_manager),
+    )
+    subject_index.update_subject(filepath)
+    return [], "", None, _progress_bar(job), False, filepath
+
+
+@callback_manager.global_manager.callback(
+    [
+        dash.Output("annotations-data", "children", allow_duplicate=True),
+        dash.Output("file_manager", "data", allow_duplicate=True),
+        dash.Output("ingest_progress", "children", allow_duplicate=True),
+        dash.Output("ingest_interval", "disabled", allow_duplicate=True),
+    ],
+    dash.Input("ingest_interval", "n_intervals"),
+    dash.State("ingest_job", "data"),
+    prevent_initial_call=True,
+)
+def poll_ingest(
+    n_intervals: int,  # noqa: ARG001
+    filepath: str | None,
+) -> tuple[list[html.Div], dict[str, str], html.Div | None, bool]:
+    """Shows the progress of an ingest and the subject once it is done.
+
+    Args:
+        n_intervals: The number of polls. Used to trigger the callback.
+        filepath: The path of the subject being ingested.
+
+    Returns:
+        tuple: A tuple containing the UI components to be displayed, the file
+        manager object, the progress of the ingest, and whether polling is
+        disabled.
+    """
+    if filepath is None:
+        return dash.no_update, dash.no_update, None, True
+    file_manager = _file_manager(filepath)
+    job = jobs.ingests.get(file_manager.database)
+
+    if job is not None and job.is_active:
+        return dash.no_update, dash.no_update, _progress_bar(job), False
+    if job is not None and job.state == "failed":
+        alert = dash_bootstrap_components.Alert(
+            f"Could not load {file_manager.identifier}: {job.message}",
+            color="danger",
+        )
+        return dash.no_update, dash.no_update, alert, True
+
+    subject = _read_subject(file_manager.__dict__)
+    if subject is None:
+        alert = dash_bootstrap_components.Alert(
+            f"Loading {file_manager.identifier} was interrupted, please try again.",
+            color="danger",
+        )
+        return dash.no_update, dash.no_update, alert, True
+    subject_index.update_subject(filepath)
+    return _subject_components(subject), file_manager.__dict__, None, True
+
+
+def _file_manager(filepath: str) -> core_utils.FileManager:
+    """Returns the file manager of a subject, using its indexed metadata file."""
+    entry = subject_index.get_entry(filepath)
+    return core_utils.FileManager(
+        filepath,
+        metadata_file=entry.metadata_file if entry else None,
+    )
+
 
+def _subject_option(entry: subject_index.SubjectEntry) -> dict[str, str | bool]:
+    """Returns the dropdown option of a subject, labelled with its status."""
+    label = entry.identifier
+    if entry.status != "unknown":
+        label = f"{entry.identifier} ({entry.status})"
+    return {"label": label, "value": entry.directory, "search": entry.identifier}
+
+
+def _subject_options(
+    entries: list[subject_index.SubjectEntry],
+    n_matches: int,
+    search_value: str,
+) -> list[dict[str, str | bool]]:
+    """Returns the dropdown options of the first matching subjects."""
+    options = [_subject_option(entry) for entry in entries]
+    if n_matches > len(entries):
+        options.append(
+            {
+                "label": f"{n_matches - len(entries)} more, type to narrow down.",
+                "value": "",
+                # Passes the dropdown's own filtering of the search.
+                "search": search_value,
+                "disabled": True,
+            },
+        )
+    return options
+
+
+def _read_subject(file_manager: dict[str, str]) -> models.Subject | None:
+    """Reads the subject of a database, if it was ingested."""
     logger.info("Creating/loading database")
     database.Database(file_manager["database"]).create_database()
 
@@ -122,26 +307,47 @@ def parse_files(
     try:
         subject = crud.read_subject(session, file_manager["identifier"])
     except exceptions.DatabaseError:
-        logger.info("Subject not found in database. Creating new subject.")
-        subject = database_utils.initialize_subject(
-            file_manager["identifier"],
-            file_manager["metadata_file"],
-            file_manager["ms4_file"],
-            session,
-        )
+        return None
+    return subject
+
 
+def _subject_components(subject: models.Subject) -> list[html.Div]:
+    """Returns the UI components of a subject."""
     ui_components = [
-        day_slider.day_slider(file_manager["identifier"], len(subject.days) - 1),
+        day_slider.day_slider(subject.name, len(subject.days) - 1),
+        actogram.actogram(),
         finished_checkbox.finished_checkbox(),
         switches.switches(),
         graph.graph(),
+        night_comparison.night_comparison(
+            [day.date for day in subject.days[:-1]],
+        ),
     ]
 
     if dst_index := subject.day_of_daylight_savings_time:
         ui_components.insert(0, dst_banner.dst_banner(dst_index))
 
-    return (
-        ui_components,
-        "",
-        file_manager,
+    return ui_components
+
+
+def _progress_bar(job: jobs.Job) -> html.Div:
+    """Returns the progress bar of an ingest."""
+    percentage = round(100 * job.progress)
+    message = job.message
+    if job.state == "queued":
+        position = jobs.ingests.queue_position(job) + 1
+        message = (
+            f"Queued at position {position}, waiting for other subjects to finish "
+            "loading."
+        )
+    return html.Div(
+        [
+            html.P(message),
+            dash_bootstrap_components.Progress(
+                value=percentage,
+                label=f"{percentage}%",
+                striped=True,
+                animated=True,
+            ),
+        ],
     )
@@ -11,6 +11,7 @@ from dash import dcc
 
 from actigraphy.core import callback_manager, config
 from actigraphy.database import crud, database
+from actigraphy.io import catalog, subject_index
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
@@ -53,5 +54,10 @@ def write_log_done(is_user_done: str, file_manager: dict[str, str]) -> bool:
     is_done = bool(is_user_done)
     subject.is_finished = is_done
     session.commit()
+    catalog.get_catalog(file_manager["base_dir"]).set_finished(
+        file_manager["identifier"],
+        is_finished=is_done,
+    )
+    subject_index.update_subject(file_manager["base_dir"])
 
     return is_done
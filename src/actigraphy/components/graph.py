@@ -6,17 +6,23 @@ The range slider is used to select a sleep window for the given day.
 """
 
 import datetime
-import json
+import functools
 import logging
-import statistics
-from collections.abc import Sequence
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any
 
 import dash
 from dash import dash_table, dcc, html
-from plotly import graph_objects
 
 from actigraphy.components import utils as components_utils
-from actigraphy.core import callback_manager, config
+from actigraphy.core import (
+    background,
+    cache,
+    callback_manager,
+    config,
+    exceptions,
+    prefetch,
+)
 from actigraphy.core import utils as core_utils
 from actigraphy.database import crud, database, models
 from actigraphy.database import utils as database_utils
@@ -31,6 +37,9 @@ DEFAULT_SLEEP_TIME = settings.DEFAULT_SLEEP_TIME
 
 logger = logging.getLogger(LOGGER_NAME)
 
+SLEEP_WINDOW_COLOR = "red"
+SLEEP_WINDOW_LABEL = "sleep window"
+
 
 def graph() -> html.Div:
     """Builds the graph component of the Actigraphy app.
@@ -42,6 +51,8 @@ def graph() -> html.Div:
     return html.Div(
         children=[
             dcc.Graph(id="graph", style={"marginBottom": "-3rem"}),
+            dcc.Store(id="graph_x_range"),
+            dcc.Store(id="sleep_window_commit"),
             html.Div(
                 children=[],
                 id="slider_div",
@@ -119,60 +130,167 @@ def graph() -> html.Div:
 
 @callback_manager.global_manager.callback(
     dash.Output("graph", "figure"),
+    dash.Output("graph_x_range", "data"),
     dash.Input("trigger_day_load", "value"),
-    dash.Input({"type": "range_slider", "index": dash.ALL}, "value"),
     dash.State("day_slider", "value"),
     dash.State("file_manager", "data"),
+    dash.State("daylight_savings_shift", "value"),
+    dash.State("graph_x_range", "data"),
     prevent_initial_call=True,
 )
 def create_graph(
     _trigger_load: str,
-    drag_values: tuple[list[int]],
     day_index: int,
     file_manager: dict[str, str],
-) -> graph_objects.Figure:
-    """Creates a graph for a given day using data from the file manager."""
-    logger.debug("Creating graph.")
-    session = next(database.session_generator(file_manager["database"]))
-    subject = crud.read_subject(session, file_manager["identifier"])
-    dates = [day.date for day in subject.days]
+    daylight_savings_shift: int | None,
+    previous_x_range: list[float] | None,
+) -> tuple[dict[str, Any] | dash.Patch, list[float]]:
+    """Creates a graph for a given day using data from the file manager.
 
-    logger.debug("Getting day data.")
-    data_points = components_utils.get_day_data(
+    Args:
+        _trigger_load: A trigger for the callback.
+        day_index: The day for which to create the graph.
+        file_manager: A dictionary containing file paths.
+        daylight_savings_shift: The seconds offset due to daylight savings.
+        previous_x_range: The x-axis range of the figure currently shown, or
+            None if no figure has been shown yet.
+
+    Returns:
+        The figure, or a patch of the figure currently shown, and the range
+        of its x-axis.
+
+    Notes:
+        The sleep windows are read from the database rather than from the
+        sliders, as the sliders may still belong to the previous day. Slider
+        changes are handled by `update_sleep_window_overlay`.
+    """
+    logger.debug("Creating graph.")
+    context = components_utils.get_day_context(
         day_index,
         file_manager["database"],
         file_manager["identifier"],
     )
-    included_data_points = [
-        point
-        for point in data_points
-        if (
-            point.timestamp_with_tz.date() == dates[day_index]
-            and point.timestamp_with_tz.hour >= 12  # noqa: PLR2004
-        )
-        or point.timestamp_with_tz.date()
-        == dates[day_index] + datetime.timedelta(days=1)
-    ]
+    subject_key = (file_manager["database"], file_manager["identifier"])
 
-    logger.debug("Getting non-wear data.")
-    timestamps = [point.timestamp_with_tz for point in included_data_points]
-    sensor_angle = [point.sensor_angle for point in included_data_points]
-    arm_movement = [point.sensor_acceleration for point in included_data_points]
-    non_wear = [point.non_wear for point in included_data_points]
+    sensor_key = _sensor_figure_key(file_manager, day_index, context.subject)
+    sensor_figure = cache.sensor_figures.get_or_create(
+        sensor_key,
+        lambda: _build_sensor_figure(sensor_key, day_index, context.night),
+    )
+    # The creation time of the subject identifies the ingest, such that the
+    # windows of a re-ingested database are not taken from the previous one.
+    sleep_windows = cache.sleep_windows.get_or_create(
+        (
+            *subject_key,
+            str(context.subject.time_created),
+            day_index,
+            daylight_savings_shift,
+            cache.annotation_versions.get(subject_key),
+        ),
+        lambda: components_utils.sleep_window_points(
+            context.day,
+            daylight_savings_shift,
+        ),
+    )
+    logger.debug(
+        "Sensor figure cache hit rate: %.2f.",
+        cache.sensor_figures.stats.hit_rate,
+    )
 
-    title_day = (
-        f"Day {day_index + 1}:"
-        f"{included_data_points[0].timestamp.strftime('%A, %d %B %Y')}"
-    )  # Frontend uses 1-indexed days.
+    _prefetch_adjacent_days(day_index, context, file_manager)
+
+    figure = _build_figure(sensor_figure, sleep_windows)
+    x_range = list(figure["layout"]["xaxis"]["range"])
+    if previous_x_range is None:
+        return figure, x_range
+    return _figure_patch(figure), x_range
+
+
+# Resolves overlapping sleep windows and moves the released slider's rectangle
+# in the browser, see assets/sleep_windows.js. The result is persisted by
+# `persist_sleep_window`.
+callback_manager.global_manager.clientside_callback(
+    dash.ClientsideFunction(
+        namespace="sleep_windows",
+        function_name="updateSleepWindows",
+    ),
+    dash.Output(
+        {"type": "range_slider", "index": dash.ALL},
+        "value",
+        allow_duplicate=True,
+    ),
+    dash.Output("graph", "figure", allow_duplicate=True),
+    dash.Output("sleep_window_commit", "data"),
+    dash.Input({"type": "range_slider", "index": dash.ALL}, "value"),
+    dash.State({"type": "range_slider", "index": dash.ALL}, "min"),
+    dash.State({"type": "range_slider", "index": dash.ALL}, "max"),
+    dash.State({"type": "slider_pk", "index": dash.ALL}, "children"),
+    dash.State("day_slider", "value"),
+    dash.State("graph", "figure"),
+    dash.State("graph_x_range", "data"),
+    prevent_initial_call=True,
+)
+
+
+@callback_manager.global_manager.callback(
+    dash.Output("graph", "figure", allow_duplicate=True),
+    dash.Input("graph", "relayoutData"),
+    dash.State("day_slider", "value"),
+    dash.State("file_manager", "data"),
+    dash.State("graph_x_range", "data"),
+    prevent_initial_call=True,
+)
+def resample_on_zoom(
+    relayout_data: dict[str, Any] | None,
+    day_index: int,
+    file_manager: dict[str, str],
+    x_range: list[float] | None,
+) -> dash.Patch:
+    """Redraws the traces at the resolution of the visible range of the x-axis.
+
+    Zoomed out, the traces are min/max-aggregated; zoomed in far enough, every
+    epoch is shown. Only the traces' data is patched.
 
-    return _build_figure(
-        timestamps,
-        sensor_angle,
-        arm_movement,
-        title_day,
-        drag_values,
-        non_wear,
+    Args:
+        relayout_data: The changes to the layout made by the user.
+        day_index: The index of the day shown.
+        file_manager: A dictionary containing file paths.
+        x_range: The range of the full x-axis of the figure.
+
+    Returns:
+        dash.Patch: A patch of the x, y and customdata of the traces.
+    """
+    if x_range is None or not relayout_data:
+        return dash.no_update
+    if relayout_data.get("xaxis.autorange"):
+        visible_range = x_range
+    elif "xaxis.range[0]" in relayout_data:
+        visible_range = [
+            relayout_data["xaxis.range[0]"],
+            relayout_data["xaxis.range[1]"],
+        ]
+    elif "xaxis.range" in relayout_data:
+        visible_range = relayout_data["xaxis.range"]
+    else:
+        return dash.no_update
+    logger.debug("Resampling graph to %s.", visible_range)
+
+    context = components_utils.get_day_context(
+        day_index,
+        file_manager["database"],
+        file_manager["identifier"],
     )
+    series = _get_sensor_series(
+        _sensor_figure_key(file_manager, day_index, context.subject),
+        day_index,
+        file_manager,
+    )
+
+    patch_figure = dash.Patch()
+    for index, trace in enumerate(sensor_plots.resample(series, visible_range)):
+        for key, value in trace.items():
+            patch_figure["data"][index][key] = value
+    return patch_figure
 
 
 @callback_manager.global_manager.callback(
@@ -204,30 +322,23 @@ def refresh_range_slider(
     Returns:
         list[int]: A list containing the sleep onset and sleep offset points.
     """
-    session = next(database.session_generator(file_manager["database"]))
-    day = crud.read_day_by_subject(session, day_index, file_manager["identifier"])
+    day = components_utils.get_day_context(
+        day_index,
+        file_manager["database"],
+        file_manager["identifier"],
+    ).day
 
     sliders = []
     data_table: list[dict[str, str]] = []
+    slider_points = components_utils.sleep_window_points(day, daylight_savings_shift)
     for index in range(len(day.sleep_times)):
         sleep_time = day.sleep_times[index].onset_with_tz
         wake_time = day.sleep_times[index].wakeup_with_tz
-
-        sleep_point = core_utils.time2point(
-            sleep_time,
-            day.date,
-            daylight_savings_shift,
-        )
-        wake_point = core_utils.time2point(
-            wake_time,
-            day.date,
-            daylight_savings_shift,
-        )
         sliders.append(
             _create_slider(
                 index,
                 day.sleep_times[index].id,
-                (sleep_point, wake_point),
+                slider_points[index],
             ),
         )
 
@@ -261,136 +372,90 @@ def refresh_range_slider(
 
 
 @callback_manager.global_manager.callback(
-    dash.Output(
-        {"type": "range_slider", "index": dash.ALL},
-        "value",
-        allow_duplicate=True,
-    ),
     dash.Output("sleep_window_table", "data", allow_duplicate=True),
-    dash.Input(
-        {
-            "type": "range_slider",
-            "index": dash.ALL,
-        },
-        "value",
-    ),
-    dash.State({"type": "slider_pk", "index": dash.ALL}, "children"),
-    dash.State("file_manager", "data"),
+    dash.Input("sleep_window_commit", "data"),
     dash.State("day_slider", "value"),
-    dash.State("daylight_savings_timepoint", "value"),
-    dash.State("daylight_savings_shift", "value"),
+    dash.State("file_manager", "data"),
     prevent_initial_call=True,
 )
-def adjust_range_slider(  # noqa: PLR0913
-    drag_values: list[list[int]],
-    primary_keys: list[int],
-    file_manager: dict[str, str],
+def persist_sleep_window(
+    commit: dict[str, Any],
     day_index: int,
-    daylight_savings_timepoint: str | None,
-    daylight_savings_shift: int | None,
-) -> tuple[list[list[int]], dash.Patch]:
-    """Checks if the new position is valid and writes the sleep log to a file.
+    file_manager: dict[str, str],
+) -> dash.Patch:
+    """Writes a sleep window that was moved in the browser to the database.
 
-    If the new position is not valid, the callback will return the state to
-    the previous position.
+    The sleep log exports are written in the background, as the user already
+    sees the new sleep window.
 
     Args:
-        drag_values: The drag values of the range sliders.
-        primary_keys: The primary keys of the sleep log.
-        file_manager: The file manager containing the sleep log.
-        day_index: The day for which to adjust the range slider.
-        daylight_savings_timepoint: The index of the first data point that is
-            affected by daylight savings time.
-        daylight_savings_shift: The seconds offset due to daylight savings.
-        other_drag_values: The drag values of the other range sliders.
+        commit: The sleep window as resolved by the clientside callback, i.e.
+            the index of its slider, the primary key of its sleep time, the
+            index of its day and its slider values.
+        day_index: The index of the day shown.
+        file_manager: A dictionary containing file paths.
 
-    Notes:
-        This assumes only one side of the slider is being dragged at a time.
-        It could break if the second side is dragged before the first side is
-        processed.
+    Returns:
+        dash.Patch: A patch of the sleep window's row of the table, or no
+            update if another day is shown by now.
     """
-    logger.debug("Adjusting range slider.")
-
-    input_id = dash.callback_context.triggered[0]["prop_id"].split(".")[0]
-    if not input_id:
-        return drag_values, dash.no_update
-    caller_index = json.loads(input_id)["index"]
-
-    caller_drag_values = drag_values[caller_index]
-    other_drag_values = [
-        *drag_values[:caller_index],
-        *drag_values[caller_index + 1 :],
-    ]
-
-    new_caller_values = _adjust_range_slider_values(
-        caller_drag_values,
-        other_drag_values,
-    )
-
-    session = next(database.session_generator(file_manager["database"]))
-    day = crud.read_day_by_subject(session, day_index, file_manager["identifier"])
-
-    first_data_point = components_utils.get_day_data(
-        day_index,
+    logger.debug("Persisting sleep window %s.", commit)
+    context = components_utils.get_day_context(
+        commit["day_index"],
         file_manager["database"],
         file_manager["identifier"],
-    )[0]
-    base_timezone = first_data_point.timestamp_utc_offset
-
-    sleep_time = core_utils.point2time(
-        new_caller_values[0],
-        day.date,
-        base_timezone,
-        daylight_savings_timepoint,
-        daylight_savings_shift,
     )
-    wake_time = core_utils.point2time(
-        new_caller_values[1],
-        day.date,
-        base_timezone,
-        daylight_savings_timepoint,
-        daylight_savings_shift,
+    utc_times, utc_offsets = core_utils.points2times(
+        commit["values"],
+        context.day.date,
+        context.base_utc_offset,
+        context.daylight_savings_time,
+        context.daylight_savings_shift,
     )
 
-    data_index = next(
-        index
-        for index, point in enumerate(day.sleep_times)
-        if point.id == int(primary_keys[caller_index])
+    session = next(database.session_generator(file_manager["database"]))
+    sleep_time_model = session.get(models.SleepTime, commit["primary_key"])
+    if sleep_time_model is None:
+        msg = f"Sleep time {commit['primary_key']} not found in database"
+        raise exceptions.DatabaseError(msg)
+    sleep_time_model.onset, sleep_time_model.wakeup = utc_times.tolist()
+    (
+        sleep_time_model.onset_utc_offset,
+        sleep_time_model.wakeup_utc_offset,
+    ) = utc_offsets.tolist()
+    sleep_time, wake_time = (
+        sleep_time_model.onset_with_tz,
+        sleep_time_model.wakeup_with_tz,
+    )
+    session.commit()
+    cache.annotation_versions.bump(
+        (file_manager["database"], file_manager["identifier"]),
+    )
+    background.exports.submit(
+        ("sleeplog", file_manager["database"], file_manager["identifier"]),
+        functools.partial(_write_sleep_logs, file_manager),
     )
 
-    day.sleep_times[data_index].onset = sleep_time.astimezone(datetime.UTC)
-    day.sleep_times[
-        data_index
-    ].onset_utc_offset = sleep_time.utcoffset().total_seconds()  # type: ignore [union-attr]
-    day.sleep_times[data_index].wakeup = wake_time.astimezone(datetime.UTC)
-    day.sleep_times[
-        data_index
-    ].wakeup_utc_offset = wake_time.utcoffset().total_seconds()  # type: ignore [union-attr]
-
-    new_values = other_drag_values
-    new_values.insert(caller_index, new_caller_values)
-
+    if commit["day_index"] != day_index:
+        return dash.no_update
     patch_table = dash.Patch()
-    patch_table[caller_index] = {
+    patch_table[commit["index"]] = {
         "onset": sleep_time.strftime(TIME_FORMATTING),
         "wakeup": wake_time.strftime(TIME_FORMATTING),
         "duration": str(wake_time - sleep_time),
     }
-
-    session.commit()
-    ggir_files.write_sleeplog(file_manager)
-    ggir_files.write_all_sleep_times(file_manager)
-
-    return new_values, patch_table
+    return patch_table
 
 
 @callback_manager.global_manager.callback(
     dash.Output("slider_div", "children", allow_duplicate=True),
     dash.Output("sleep_window_table", "data", allow_duplicate=True),
+    dash.Output("graph", "figure", allow_duplicate=True),
     dash.Input("add_slider", "n_clicks"),
     dash.State("file_manager", "data"),
     dash.State("day_slider", "value"),
     dash.State("slider_div", "children"),
+    dash.State("graph_x_range", "data"),
     prevent_initial_call=True,
 )
 def add_sliders(
@@ -398,7 +463,8 @@ def add_sliders(
     file_manager: dict[str, str],
     day_index: int,
     sliders: list[html.Div],
-) -> dash.Patch:
+    x_range: list[float] | None,
+) -> tuple[dash.Patch, dash.Patch, dash.Patch]:
     """Adds sliders from the graph.
 
     Args:
@@ -406,9 +472,11 @@ def add_sliders(
         file_manager: The file manager containing the file locations.
         day_index: The index of the day for which to add a slider.
         sliders: The slider div containing the sliders.
+        x_range: The range of the x-axis of the figure.
 
     Returns:
-        dash.Patch: A patch to add a slider.
+        tuple[dash.Patch, dash.Patch, dash.Patch]: Patches to add a slider, its
+            table row and its sleep window shape.
     """
     logger.debug("Adding slider %s.", len(sliders))
     session = next(database.session_generator(file_manager["database"]))
@@ -426,6 +494,9 @@ def add_sliders(
     )
     day.sleep_times.append(new_sleep_time)
     session.commit()
+    cache.annotation_versions.bump(
+        (file_manager["database"], file_manager["identifier"]),
+    )
 
     slider_points = core_utils.time2point(
         default_sleep,
@@ -454,14 +525,23 @@ def add_sliders(
         },
     )
 
+    patch_figure = dash.no_update
+    if x_range is not None:
+        patch_figure = dash.Patch()
+        patch_figure["layout"]["shapes"].insert(
+            len(sliders),
+            _sleep_window_shape(len(sliders), (slider_points, slider_points), x_range),
+        )
+
     # Rewrite data cleaning as it has a special case for no sliders.
     ggir_files.write_data_cleaning(file_manager)
-    return patch_slider, patch_table
+    return patch_slider, patch_table, patch_figure
 
 
 @callback_manager.global_manager.callback(
     dash.Output("slider_div", "children", allow_duplicate=True),
     dash.Output("sleep_window_table", "data", allow_duplicate=True),
+    dash.Output("graph", "figure", allow_duplicate=True),
     dash.Input("remove_slider", "n_clicks"),
     dash.State("slider_div", "children"),
     dash.State("file_manager", "data"),
@@ -471,7 +551,7 @@ def remove_sliders(
     remove_clicks: int,  # noqa: ARG001
     slider_div: list[html.Div],
     file_manager: dict[str, str],
-) -> dash.Patch:
+) -> tuple[dash.Patch, dash.Patch, dash.Patch]:
     """Removes sliders from the graph.
 
     Args:
@@ -480,7 +560,8 @@ def remove_sliders(
         file_manager: The file manager containing the file locations.
 
     Returns:
-        dash.Patch: A patch to remove the last slider.
+        tuple[dash.Patch, dash.Patch, dash.Patch]: Patches to remove the last
+            slider, its table row and its sleep window shape.
 
     """
     logger.debug("Removing slider.")
@@ -495,80 +576,258 @@ def remove_sliders(
     patch_table = dash.Patch()
     del patch_table[-1]
 
+    patch_figure = dash.Patch()
+    del patch_figure["layout"]["shapes"][len(slider_div) - 1]
+
     session.commit()
+    cache.annotation_versions.bump(
+        (file_manager["database"], file_manager["identifier"]),
+    )
     # Rewrite data cleaning as it has a special case for no sliders.
     ggir_files.write_data_cleaning(file_manager)
-    return patch_slider, patch_table
-
-
-def _build_figure(  # noqa: PLR0913
-    timestamps: list[datetime.datetime],
-    sensor_angle: list[float],
-    arm_movement: list[float],
-    title_day: str,
-    drag_values: tuple[list[int]],
-    nonwear_changes: list[bool],
-) -> graph_objects.Figure:
-    """Build the graph figure."""
+    return patch_slider, patch_table, patch_figure
+
+
+def _write_sleep_logs(file_manager: dict[str, str]) -> None:
+    """Exports the sleep times of the subject."""
+    ggir_files.write_sleeplog(file_manager)
+    ggir_files.write_all_sleep_times(file_manager)
+
+
+def _build_sensor_figure(
+    key: tuple[str | int, ...],
+    day_index: int,
+    night: components_utils.NightData,
+) -> dict[str, Any]:
+    """Builds the sensor part of the figure of a day.
+
+    This part only depends on the ingested data, not on the annotations, so it
+    may be cached for as long as the data is not re-ingested. The
+    full-resolution series is cached as well, for `resample_on_zoom`.
+
+    Args:
+        key: The cache key of the day, see `_sensor_figure_key`.
+        day_index: The index of the day.
+        night: The data shown for the day.
+
+    Returns:
+        dict[str, Any]: The figure, including the non-wear overlay, as a
+            dictionary with arrays encoded as base64 typed arrays.
+    """
+    title_day = (
+        f"Day {day_index + 1}:"
+        f"{night.timestamps[0].strftime('%A, %d %B %Y')}"
+    )  # Frontend uses 1-indexed days.
+
     logger.debug("Building figure.")
-    figure, max_measurements = sensor_plots.build_sensor_plot(
-        timestamps,
-        sensor_angle,
-        arm_movement,
-        title_day,
+    series = _build_sensor_series(night)
+    cache.sensor_series.put(key, series)
+    figure = sensor_plots.add_overlays(
+        sensor_plots.plot_sensor_series(series, title_day),
+        [
+            sensor_plots.non_wear_overlay(
+                night.timestamps,
+                night.non_wear_blocks,
+                series.max_measurements,
+            ),
+        ],
     )
+    figure_dict: dict[str, Any] = figure.to_dict()
+    return figure_dict
 
-    for values in drag_values:
-        if not values:
+
+def _get_sensor_series(
+    key: tuple[str | int, ...],
+    day_index: int,
+    file_manager: dict[str, str],
+) -> sensor_plots.SensorSeries:
+    """Returns the full-resolution series of a day, reading it if not cached."""
+    series: sensor_plots.SensorSeries = cache.sensor_series.get_or_create(
+        key,
+        lambda: _build_sensor_series(
+            components_utils.get_day_context(
+                day_index,
+                file_manager["database"],
+                file_manager["identifier"],
+            ).night,
+        ),
+    )
+    return series
+
+
+def _build_sensor_series(
+    night: components_utils.NightData,
+) -> sensor_plots.SensorSeries:
+    """Builds the full-resolution series of the data shown for a day."""
+    return sensor_plots.build_sensor_series(
+        night.timestamps,
+        night.sensor_angle,
+        night.sensor_acceleration,
+        night.non_wear_blocks,
+    )
+
+
+def _sensor_figure_key(
+    file_manager: dict[str, str],
+    day_index: int,
+    subject: models.Subject,
+) -> tuple[str | int, ...]:
+    """Returns the cache key of the sensor figure of a day.
+
+    The subject's id and creation time identify the ingest, such that entries
+    become stale when the data is re-ingested.
+    """
+    return (
+        file_manager["database"],
+        file_manager["identifier"],
+        day_index,
+        subject.id,
+        str(subject.time_created),
+    )
+
+
+def _prefetch_adjacent_days(
+    day_index: int,
+    context: components_utils.DayContext,
+    file_manager: dict[str, str],
+) -> None:
+    """Renders the sensor figures of the previous and next day in the background.
+
+    Pending prefetches for other days of the subject are cancelled, so jumping
+    through the days only renders the neighbours of the day shown last.
+
+    Args:
+        day_index: The index of the day shown.
+        context: The context of the day shown.
+        file_manager: A dictionary containing file paths.
+    """
+    tasks: dict[Hashable, Callable[[], None]] = {}
+    for index in (day_index - 1, day_index + 1):
+        if not 0 <= index < len(context.dates):
+            continue
+        key = _sensor_figure_key(file_manager, index, context.subject)
+        if key in cache.sensor_figures:
             continue
-        drag_fraction = [value / N_SLIDER_STEPS for value in values]
-        sensor_plots.add_rectangle(figure, drag_fraction, "red", "sleep window")
+        tasks[index] = functools.partial(
+            _prefetch_sensor_figure,
+            key,
+            index,
+            file_manager,
+        )
+    prefetch.prefetcher.schedule(
+        (file_manager["database"], file_manager["identifier"]),
+        tasks,
+    )
 
-    continuous_non_wear_blocks = _find_continuous_blocks(nonwear_changes)
-    non_wear_fractions = [
-        value / max_measurements for value in continuous_non_wear_blocks
-    ]
-    all_timepoints_included = len(timestamps) == max_measurements
-    if not all_timepoints_included:
-        includes_start = timestamps[0].hour == 12 and timestamps[0].minute == 0  # noqa: PLR2004
-        if not includes_start:
-            offset = 1 - len(timestamps) / max_measurements
-            non_wear_fractions = [fraction + offset for fraction in non_wear_fractions]
-
-    for index in range(0, len(non_wear_fractions), 2):
-        sensor_plots.add_rectangle(
-            figure,
-            [
-                non_wear_fractions[index],
-                non_wear_fractions[index + 1],
-            ],
-            "green",
-            "non-wear",
+
+def _prefetch_sensor_figure(
+    key: tuple[str | int, ...],
+    day_index: int,
+    file_manager: dict[str, str],
+) -> None:
+    """Adds the sensor figure of a day to the cache, unless already cached.
+
+    The context of the day is cached along the way, such that selecting the
+    day shortly after does not read the database again.
+    """
+    if key not in cache.sensor_figures:
+        context = components_utils.get_day_context(
+            day_index,
+            file_manager["database"],
+            file_manager["identifier"],
         )
-    return figure
+        cache.sensor_figures.put(
+            key,
+            _build_sensor_figure(key, day_index, context.night),
+        )
+
 
+def _build_figure(
+    sensor_figure: dict[str, Any],
+    drag_values: Sequence[Sequence[int]],
+) -> dict[str, Any]:
+    """Adds the sleep windows to the sensor figure.
 
-def _find_continuous_blocks(vector: Sequence[bool]) -> list[int]:
-    """Finds the indices of continuous blocks of True values in a vector.
+    The sleep window shapes are placed first in the layout, one per slider,
+    so that `update_sleep_window_overlay` can patch them by slider index. The
+    sensor figure is not modified, as it may be shared through the cache.
 
     Args:
-        vector: The vector to search.
+        sensor_figure: The sensor figure, see `_build_sensor_figure`.
+        drag_values: The slider values of the sleep windows.
 
     Returns:
-        list[int]: A list of indices of continuous blocks of True values in the
-            vector.
+        dict[str, Any]: The figure with the sleep windows.
     """
-    return [
-        index
-        for index, value in enumerate(vector)
-        if value
-        and (
-            index == 0
-            or index == len(vector) - 1
-            or not vector[index - 1]
-            or not vector[index + 1]
-        )
+    layout = sensor_figure["layout"]
+    x_range = layout["xaxis"]["range"]
+    sleep_window_shapes = [
+        _sleep_window_shape(index, values, x_range)
+        for index, values in enumerate(drag_values)
+    ]
+    return {
+        **sensor_figure,
+        "layout": {
+            **layout,
+            "shapes": [*sleep_window_shapes, *layout.get("shapes", [])],
+            # Keeps the user's zoom when the traces are resampled, and resets
+            # it when another day is shown.
+            "uirevision": layout["title"]["text"],
+        },
+    }
+
+
+def _figure_patch(figure: dict[str, Any]) -> dash.Patch:
+    """Creates a patch that replaces the day-specific parts of the figure.
+
+    The traces' data, the title, the x-axis ticks and the shapes are replaced,
+    all other layout properties remain in place on the client.
+
+    Args:
+        figure: The figure of the new day, as a dictionary.
+
+    Returns:
+        dash.Patch: The patch that turns the figure shown into `figure`.
+    """
+    patch_figure = dash.Patch()
+    for index, trace in enumerate(figure["data"]):
+        for key in ("type", "x", "y", "customdata", "hovertemplate"):
+            patch_figure["data"][index][key] = trace[key]
+
+    layout = figure["layout"]
+    patch_figure["layout"]["title"]["text"] = layout["title"]["text"]
+    for key in ("range", "tickvals", "ticktext"):
+        patch_figure["layout"]["xaxis"][key] = layout["xaxis"][key]
+    patch_figure["layout"]["shapes"] = layout["shapes"]
+    patch_figure["layout"]["uirevision"] = layout["uirevision"]
+    return patch_figure
+
+
+def _sleep_window_shape(
+    index: int,
+    values: Sequence[int],
+    x_range: Sequence[float],
+) -> dict[str, Any]:
+    """Creates the shape of a sleep window.
+
+    Args:
+        index: The index of the slider of the sleep window.
+        values: The slider values of the sleep window.
+        x_range: The range of the x-axis of the figure.
+
+    Returns:
+        dict[str, Any]: The layout shape of the sleep window.
+    """
+    limits = [
+        x_range[0] + (x_range[1] - x_range[0]) * value / N_SLIDER_STEPS
+        for value in values
     ]
+    return sensor_plots.overlay_shape(
+        (limits[0], limits[1]),
+        SLEEP_WINDOW_COLOR,
+        SLEEP_WINDOW_LABEL,
+        show_legend=index == 0,
+    )
 
 
 def _create_slider(
@@ -605,54 +864,3 @@ def _create_slider(
             ),
         ],
     )
-
-
-def _adjust_range_slider_values(
-    drag_values: list[int],
-    other_drag_values: list[list[int]],
-) -> list[int]:
-    """Adjusts the range slider values to ensure validity.
-
-    Slider ranges are not allowed to intersect with each other.
-
-    Args:
-        drag_values: The drag values of the range slider.
-        other_drag_values: The drag values of the other range sliders.
-
-    Returns:
-        list[int]: The adjusted range slider values.
-    """
-    if not drag_values:
-        return drag_values
-
-    new_values = [drag_values[0], drag_values[1]]
-    n_loops = 0
-    max_loops = 100
-    start_values: list[int | None] = [None, None]
-
-    while new_values != start_values:
-        n_loops += 1
-        start_values = [new_values[0], new_values[1]]
-        for other in other_drag_values:
-            if not other:
-                continue
-            this_on_right_of_other = statistics.mean(drag_values) > statistics.mean(
-                other,
-            )
-            if other[0] <= new_values[0] <= other[1]:
-                new_values[0] = other[1] + 1 if this_on_right_of_other else other[0] - 1
-
-            if other[0] <= new_values[1] <= other[1]:
-                new_values[1] = other[1] + 1 if this_on_right_of_other else other[0] - 1
-
-            if new_values[0] <= other[0] and new_values[1] >= other[1]:
-                if this_on_right_of_other:
-                    new_values[0] = other[1] + 1
-                else:
-                    new_values[1] = other[0] - 1
-
-        if n_loops > max_loops:
-            msg = "Infinite loop detected."
-            raise RuntimeError(msg)
-
-    return new_values
@@ -0,0 +1,156 @@
+"""Defines the night comparison component of the Actigraphy app.
+
+Selected nights are plotted on the shared noon-to-noon x-axis, either overlaid
+in one plot or stacked in rows, so that a questionable night can be compared
+against the subject's other nights without paging through the day slider.
+"""
+
+import datetime
+import logging
+
+import dash
+from dash import dcc, html
+from plotly import graph_objects
+
+from actigraphy.components import utils
+from actigraphy.core import callback_manager, config
+from actigraphy.plotting import sensor_plots
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+N_SLIDER_STEPS = settings.N_SLIDER_STEPS
+
+logger = logging.getLogger(LOGGER_NAME)
+
+METRICS = {"sensor_angle": "Angle", "sensor_acceleration": "Arm movement"}
+MODES = {"stacked": "Stacked", "overlay": "Overlaid"}
+
+
+def night_comparison(dates: list[datetime.date]) -> html.Div:
+    """Builds the night comparison component.
+
+    Args:
+        dates: The dates of the days that can be selected in the day slider.
+
+    Returns:
+        html.Div: A Dash HTML div containing the night selection and the
+            comparison graph.
+    """
+    return html.Div(
+        children=[
+            html.Details(
+                children=[
+                    html.Summary("Compare nights"),
+                    dcc.Dropdown(
+                        options=[
+                            {
+                                "label": f"Day {index + 1}: {date:%A, %d %B %Y}",
+                                "value": index,
+                            }
+                            for index, date in enumerate(dates)
+                        ],
+                        value=[],
+                        multi=True,
+                        placeholder="Select nights to compare...",
+                        id="comparison_days",
+                    ),
+                    dcc.RadioItems(
+                        options=[
+                            {"label": f" {label}", "value": metric}
+                            for metric, label in METRICS.items()
+                        ],
+                        value="sensor_angle",
+                        id="comparison_metric",
+                        inline=True,
+                        inputStyle={"marginLeft": "10px"},
+                    ),
+                    dcc.RadioItems(
+                        options=[
+                            {"label": f" {label}", "value": mode}
+                            for mode, label in MODES.items()
+                        ],
+                        value="stacked",
+                        id="comparison_mode",
+                        inline=True,
+                        inputStyle={"marginLeft": "10px"},
+                    ),
+                    dcc.Graph(id="comparison_graph"),
+                ],
+            ),
+        ],
+        style={"marginLeft": "55px", "marginRight": "55px"},
+    )
+
+
+@callback_manager.global_manager.callback(
+    dash.Output("comparison_graph", "figure"),
+    dash.Input("comparison_days", "value"),
+    dash.Input("comparison_metric", "value"),
+    dash.Input("comparison_mode", "value"),
+    dash.State("file_manager", "data"),
+    prevent_initial_call=True,
+)
+def update_comparison(
+    day_indices: list[int],
+    metric: str,
+    mode: str,
+    file_manager: dict[str, str],
+) -> graph_objects.Figure:
+    """Plots the selected nights.
+
+    Args:
+        day_indices: The indices of the selected days.
+        metric: The data point attribute to show.
+        mode: Either "stacked" or "overlay".
+        file_manager: A dictionary containing file paths.
+
+    Returns:
+        The comparison graph. Nights without data are left out.
+    """
+    logger.debug("Comparing nights %s.", day_indices)
+    if not day_indices:
+        return dash.no_update
+
+    day_indices = sorted(day_indices)
+    nights = [
+        (day_index, night)
+        for day_index, night in zip(
+            day_indices,
+            utils.get_nights_data(
+                day_indices,
+                file_manager["database"],
+                file_manager["identifier"],
+            ),
+            strict=True,
+        )
+        if len(night.timestamps) > 1
+    ]
+    if not nights:
+        return dash.no_update
+
+    return sensor_plots.build_comparison_plot(
+        [
+            (
+                f"Day {day_index + 1}: {night.day.date:%a %d %b}",
+                sensor_plots.build_sensor_series(
+                    night.timestamps,
+                    night.sensor_angle,
+                    night.sensor_acceleration,
+                    non_wear_blocks=night.non_wear_blocks,
+                ),
+            )
+            for day_index, night in nights
+        ],
+        metric,
+        [_sleep_windows(night) for _, night in nights],
+        stacked=mode == "stacked",
+    )
+
+
+def _sleep_windows(night: utils.NightData) -> list[list[float]]:
+    """Returns the sleep windows of a night in range [0, 1] of its x-axis."""
+    daylight_savings_shift = utils.daylight_savings_shift(night.utc_offsets)
+    return [
+        [point / N_SLIDER_STEPS for point in points]
+        for points in utils.sleep_window_points(night.day, daylight_savings_shift)
+    ]
@@ -15,7 +15,8 @@ import dash_bootstrap_components as dbc
 import dash_daq
 from dash import html
 
-from actigraphy.core import callback_manager, config
+from actigraphy.components import utils
+from actigraphy.core import cache, callback_manager, config
 from actigraphy.database import crud, database
 from actigraphy.io import ggir_files
 
@@ -97,8 +98,11 @@ def update_switches(day: int, file_manager: dict[str, str]) -> tuple[bool, bool,
             day.
     """
     logger.debug("Entering update switches callback")
-    session = next(database.session_generator(file_manager["database"]))
-    day_model = crud.read_day_by_subject(session, day, file_manager["identifier"])
+    day_model = utils.get_day_context(
+        day,
+        file_manager["database"],
+        file_manager["identifier"],
+    ).day
     return (
         day_model.is_multiple_sleep,
         day_model.is_missing_sleep,
@@ -181,6 +185,9 @@ def _toggle_bool_field(
 ) -> None:
     """Toggles a boolean field for a given day.
 
+    The switches are also set when another day is selected, in which case the
+    field already has the value and nothing is written.
+
     Args:
         day_index: The day to toggle the field for.
         fieldname: The name of the field to toggle.
@@ -189,5 +196,10 @@ def _toggle_bool_field(
     """
     session = next(database.session_generator(file_manager["database"]))
     day = crud.read_day_by_subject(session, day_index, file_manager["identifier"])
+    if getattr(day, fieldname) == value:
+        return
     setattr(day, fieldname, value)
     session.commit()
+    cache.annotation_versions.bump(
+        (file_manager["database"], file_manager["identifier"]),
+    )
@@ -1,9 +1,18 @@
 """Utility functions used across components."""
 
+import bisect
+import dataclasses
 import datetime
+import itertools
 import logging
+from collections.abc import Sequence
 
-from actigraphy.core import config
+import numpy as np
+import sqlalchemy
+from sqlalchemy import orm
+
+from actigraphy.core import cache, config, exceptions
+from actigraphy.core import utils as core_utils
 from actigraphy.database import crud, database, models
 
 settings = config.get_settings()
@@ -12,41 +21,335 @@ LOGGER_NAME = settings.LOGGER_NAME
 logger = logging.getLogger(LOGGER_NAME)
 
 
-def get_day_data(
+@dataclasses.dataclass(frozen=True)
+class NightData:
+    """The data points shown for a day, i.e. from noon to noon.
+
+    Attributes:
+        day: The day, with its sleep times and GGIR sleep times loaded.
+        timestamps: The local timestamps of the data points.
+        utc_offsets: The UTC offsets of the data points in seconds.
+        sensor_angle: The sensor's angle.
+        sensor_acceleration: The arm movement.
+        non_wear_blocks: The first and last index of every block of non-wear
+            data points.
+    """
+
+    day: models.Day
+    timestamps: list[datetime.datetime]
+    utc_offsets: list[int]
+    sensor_angle: list[float]
+    sensor_acceleration: list[float]
+    non_wear_blocks: list[tuple[int, int]]
+
+
+@dataclasses.dataclass(frozen=True)
+class DayContext:
+    """Everything the callbacks of a day change read from the database.
+
+    Attributes:
+        subject: The subject of the day.
+        days: All days of the subject, ordered by date, with their sleep
+            times and GGIR sleep times loaded.
+        night: The day and the data shown for it.
+        daylight_savings_timepoint: The time of the last data point before the
+            UTC offset changes, or None if it does not change.
+        daylight_savings_shift: The change of the UTC offset in seconds, or
+            None if it does not change.
+        daylight_savings_time: The UTC time of `daylight_savings_timepoint`,
+            see `core_utils.points2times`.
+    """
+
+    subject: models.Subject
+    days: list[models.Day]
+    night: NightData
+    daylight_savings_timepoint: str | None
+    daylight_savings_shift: int | None
+    daylight_savings_time: np.datetime64 | None
+
+    @property
+    def dates(self) -> list[datetime.date]:
+        """The dates of all days of the subject."""
+        return [day.date for day in self.days]
+
+    @property
+    def day(self) -> models.Day:
+        """The day."""
+        return self.night.day
+
+    @property
+    def base_utc_offset(self) -> int:
+        """The UTC offset of the first data point shown, in seconds."""
+        return self.night.utc_offsets[0]
+
+
+def get_day_context(
     day_index: int,
     database_path: str,
     identifier: str,
-) -> list[models.DataPoint]:
-    """Get data for a given day.
+) -> DayContext:
+    """Gets the context of a day, reading it if it is not cached.
+
+    Selecting a day triggers several callbacks that all need the day, its
+    sleep times and its data. The context is read once, in a single session,
+    and shared through `cache.day_contexts` until the annotations of the
+    subject change or the entry expires.
 
     Args:
-        day_index: The index of the day for which to retrieve the data.
+        day_index: The index of the day.
         database_path: The path to the database.
         identifier: The identifier for the participant.
 
     Returns:
-        list[models.DataPoint]: A list of data points for the given day.
+        DayContext: The context of the day.
+    """
+    subject_key = (database_path, identifier)
+    context: DayContext = cache.day_contexts.get_or_create(
+        (*subject_key, day_index, cache.annotation_versions.get(subject_key)),
+        lambda: _read_day_context(day_index, database_path, identifier),
+    )
+    return context
+
+
+def get_nights_data(
+    day_indices: Sequence[int],
+    database_path: str,
+    identifier: str,
+) -> list[NightData]:
+    """Gets the noon-to-noon data of several days in a single query.
+
+    Only the columns that are plotted are read, which is considerably faster
+    than loading full data points for every day.
+
+    Args:
+        day_indices: The indices of the days.
+        database_path: The path to the database.
+        identifier: The identifier for the participant.
+
+    Returns:
+        list[NightData]: The data of each day, in the order of `day_indices`.
+    """
+    logger.debug("Getting data for days %s", day_indices)
+    session = next(database.session_generator(database_path))
+    subject = crud.read_subject(session, identifier)
+    days = _read_days(session, subject)
+    return _read_nights(session, subject, [days[index] for index in day_indices])
+
+
+def sleep_window_points(
+    day: models.Day,
+    daylight_savings_shift: int | None,
+) -> list[tuple[int, int]]:
+    """Converts the sleep times of a day to slider points.
+
+    Args:
+        day: The day model.
+        daylight_savings_shift: The seconds offset due to daylight savings.
+
+    Returns:
+        list[tuple[int, int]]: The onset and wakeup points of every sleep time.
+    """
+    points = core_utils.times2points(
+        np.array(
+            [(sleep_time.onset, sleep_time.wakeup) for sleep_time in day.sleep_times],
+            dtype="datetime64[us]",
+        ).reshape(-1, 2),
+        np.array(
+            [
+                (sleep_time.onset_utc_offset, sleep_time.wakeup_utc_offset)
+                for sleep_time in day.sleep_times
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2),
+        day.date,
+        daylight_savings_shift,
+    )
+    return [(onset, wakeup) for onset, wakeup in points.tolist()]
+
+
+def daylight_savings_shift(utc_offsets: Sequence[int]) -> int | None:
+    """Returns the daylight savings shift as computed by the day slider.
 
+    Args:
+        utc_offsets: The UTC offsets of consecutive data points in seconds.
+
+    Returns:
+        The difference between the offsets before and after the first change
+        of offset, or None if the offset does not change.
     """
-    logger.debug("Getting data for day %s", day_index)
+    return next(
+        (
+            previous - current
+            for previous, current in itertools.pairwise(utc_offsets)
+            if current != previous
+        ),
+        None,
+    )
+
+
+def _read_day_context(
+    day_index: int,
+    database_path: str,
+    identifier: str,
+) -> DayContext:
+    """Reads the context of a day, see `get_day_context`."""
+    logger.debug("Reading context of day %s", day_index)
     session = next(database.session_generator(database_path))
     subject = crud.read_subject(session, identifier)
-    day = crud.read_day_by_subject(session, day_index, identifier)
+    days = _read_days(session, subject)
+    if not 0 <= day_index < len(days):
+        msg = f"Day {day_index} not found for subject {identifier}"
+        raise exceptions.DatabaseError(msg)
+    night = _read_nights(session, subject, [days[day_index]])[0]
+
+    shift = daylight_savings_shift(night.utc_offsets)
+    timepoint = None
+    if shift is not None:
+        index = next(
+            index
+            for index, (previous, current) in enumerate(
+                itertools.pairwise(night.utc_offsets),
+            )
+            if previous != current
+        )
+        timepoint = str(night.timestamps[index])
+    return DayContext(
+        subject=subject,
+        days=days,
+        night=night,
+        daylight_savings_timepoint=timepoint,
+        daylight_savings_shift=shift,
+        daylight_savings_time=core_utils.parse_daylight_savings_timepoint(timepoint),
+    )
+
+
+def _read_days(session: orm.Session, subject: models.Subject) -> list[models.Day]:
+    """Reads the days of a subject, ordered by date, with their sleep times."""
     return (
-        session.query(models.DataPoint)
-        .filter(
-            models.DataPoint.subject_id == subject.id,
-            models.DataPoint.timestamp
-            >= datetime.datetime.combine(
+        session.query(models.Day)
+        .filter(models.Day.subject_id == subject.id)
+        .order_by(models.Day.date)
+        .options(
+            orm.selectinload(models.Day.sleep_times),
+            orm.selectinload(models.Day.ggir_sleep_times),
+        )
+        .all()
+    )
+
+
+def _read_nights(
+    session: orm.Session,
+    subject: models.Subject,
+    days: Sequence[models.Day],
+) -> list[NightData]:
+    """Reads the data shown for each of the days, see `get_nights_data`."""
+    # Noon to noon in local time, widened by the largest possible UTC offsets.
+    bounds = [
+        (
+            datetime.datetime.combine(
                 day.date - datetime.timedelta(days=1),
-                datetime.time(hour=11),
+                datetime.time(hour=22),
             ),
-            models.DataPoint.timestamp
-            <= datetime.datetime.combine(
-                day.date + datetime.timedelta(days=3),
-                datetime.time(hour=1),
+            datetime.datetime.combine(
+                day.date + datetime.timedelta(days=2),
+                datetime.time(hour=12),
+            ),
+        )
+        for day in days
+    ]
+    rows = (
+        session.query(
+            models.DataPoint.timestamp,
+            models.DataPoint.timestamp_utc_offset,
+            models.DataPoint.sensor_angle,
+            models.DataPoint.sensor_acceleration,
+        )
+        .filter(
+            models.DataPoint.subject_id == subject.id,
+            sqlalchemy.or_(
+                *(
+                    models.DataPoint.timestamp.between(lower, upper)
+                    for lower, upper in bounds
+                ),
             ),
         )
         .order_by(models.DataPoint.timestamp, models.DataPoint.timestamp_utc_offset)
         .all()
     )
+    utc_timestamps = [row.timestamp for row in rows]
+    utc_offsets = np.fromiter(
+        (row.timestamp_utc_offset for row in rows),
+        dtype=np.int64,
+        count=len(rows),
+    )
+    utc = np.array(utc_timestamps, dtype="datetime64[us]")
+    naive_local = utc + utc_offsets.astype("timedelta64[s]")
+    non_wear_intervals = (
+        session.query(models.NonWearInterval.start, models.NonWearInterval.end)
+        .filter(
+            models.NonWearInterval.subject_id == subject.id,
+            models.NonWearInterval.end >= min(lower for lower, _ in bounds),
+            models.NonWearInterval.start <= max(upper for _, upper in bounds),
+        )
+        .order_by(models.NonWearInterval.start)
+        .all()
+    )
+    non_wear_starts = np.array(
+        [interval.start for interval in non_wear_intervals],
+        dtype="datetime64[us]",
+    )
+    non_wear_ends = np.array(
+        [interval.end for interval in non_wear_intervals],
+        dtype="datetime64[us]",
+    )
+    timezones = {
+        offset: datetime.timezone(datetime.timedelta(seconds=offset))
+        for offset in np.unique(utc_offsets).tolist()
+    }
+
+    nights = []
+    for day, (lower, upper) in zip(days, bounds, strict=True):
+        start = bisect.bisect_left(utc_timestamps, lower)
+        stop = bisect.bisect_right(utc_timestamps, upper)
+        local_start, local_stop = _day_window_bounds(day.date)
+        in_window = start + np.flatnonzero(
+            (naive_local[start:stop] >= local_start)
+            & (naive_local[start:stop] < local_stop),
+        )
+        window = [rows[index] for index in in_window.tolist()]
+        # The indices of the first and last data point shown of each interval.
+        window_utc = utc[in_window]
+        firsts = np.searchsorted(window_utc, non_wear_starts, side="left")
+        lasts = np.searchsorted(window_utc, non_wear_ends, side="right") - 1
+        is_shown = firsts <= lasts
+        nights.append(
+            NightData(
+                day=day,
+                timestamps=[
+                    (
+                        row.timestamp
+                        + datetime.timedelta(seconds=row.timestamp_utc_offset)
+                    ).replace(tzinfo=timezones[row.timestamp_utc_offset])
+                    for row in window
+                ],
+                utc_offsets=[row.timestamp_utc_offset for row in window],
+                sensor_angle=[row.sensor_angle for row in window],
+                sensor_acceleration=[row.sensor_acceleration for row in window],
+                non_wear_blocks=list(
+                    zip(
+                        firsts[is_shown].tolist(),
+                        lasts[is_shown].tolist(),
+                        strict=True,
+                    ),
+                ),
+            ),
+        )
+    return nights
+
+
+def _day_window_bounds(date: datetime.date) -> tuple[np.datetime64, np.datetime64]:
+    """Returns the local start and exclusive end of the data shown for a day."""
+    return (
+        np.datetime64(datetime.datetime.combine(date, datetime.time(hour=12)), "us"),
+        np.datetime64(date + datetime.timedelta(days=2), "us"),
+    )
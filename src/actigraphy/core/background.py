@@ -0,0 +1,65 @@
+"""Background work that must not delay a response, such as exporting annotations.
+
+Tasks run one at a time, in the order they were submitted. Submitting a task
+whose key is already queued is a no-op: the queued task has not started yet
+and will see the latest state when it runs, so a burst of edits results in a
+single export.
+"""
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from concurrent import futures
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class SerialQueue:
+    """Runs tasks on a single background thread, coalescing queued duplicates."""
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the SerialQueue class."""
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="background",
+        )
+        self._queued: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, task: Callable[[], None]) -> None:
+        """Queues a task, unless a task with the same key is queued already.
+
+        Args:
+            key: Identifies what the task does, e.g. an export of a subject.
+            task: The task.
+        """
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._executor.submit(self._run, key, task)
+
+    def join(self) -> None:
+        """Waits until all tasks submitted so far have finished."""
+        self._executor.submit(lambda: None).result()
+
+    def _run(self, key: Hashable, task: Callable[[], None]) -> None:
+        """Runs a task, logging rather than raising errors.
+
+        The key is released before the task starts, such that changes made
+        while it runs are picked up by a new task.
+        """
+        with self._lock:
+            self._queued.discard(key)
+        try:
+            task()
+        except Exception:
+            logger.exception("Background task %s failed.", key)
+
+
+exports = SerialQueue()
@@ -0,0 +1,322 @@
+"""In-memory caches with an optional on-disk tier.
+
+At the bottom of this file, the caches shared across components are created.
+Entries that depend on annotations are keyed by a version counter which is
+bumped whenever the annotations are written, such that stale entries are never
+looked up again and are eventually evicted.
+"""
+
+import collections
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any, Protocol
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Statistics of a cache.
+
+    Attributes:
+        hits: The number of lookups that found an entry.
+        misses: The number of lookups that did not find an entry.
+        evictions: The number of entries evicted from memory.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that found an entry."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """A thread-safe least-recently-used cache.
+
+    Attributes:
+        max_size: The maximum number of entries kept in memory.
+        cache_dir: If provided, entries are also pickled to this directory and
+            read back when they have been evicted from memory.
+        max_disk_size: The maximum number of entries kept on disk.
+        ttl_seconds: If provided, entries expire this many seconds after they
+            were added. Only supported without the on-disk tier.
+        stats: The statistics of the cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        cache_dir: str | pathlib.Path | None = None,
+        max_disk_size: int | None = None,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        """Initializes a new instance of the LRUCache class.
+
+        Args:
+            max_size: The maximum number of entries kept in memory.
+            cache_dir: The directory of the on-disk tier, disabled if None.
+            max_disk_size: The maximum number of entries kept on disk,
+                defaults to ten times `max_size`.
+            ttl_seconds: The lifetime of an entry, unlimited if None.
+        """
+        if ttl_seconds is not None and cache_dir is not None:
+            msg = "Entries on disk cannot expire."
+            raise ValueError(msg)
+        self.max_size = max_size
+        self.cache_dir = None if cache_dir is None else pathlib.Path(cache_dir)
+        self.max_disk_size = max_disk_size or 10 * max_size
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._entries: collections.OrderedDict[Hashable, Any] = (
+            collections.OrderedDict()
+        )
+        self._expiry: dict[Hashable, float] = {}
+        self._creating: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Checks whether the key is cached, without updating statistics."""
+        with self._lock:
+            if self._has_entry(key):
+                return True
+        path = self._disk_path(key)
+        return path is not None and path.exists()
+
+    def get(self, key: Hashable) -> Any | None:  # noqa: ANN401
+        """Looks up an entry.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The value of the entry, or None if it is not cached.
+        """
+        with self._lock:
+            if self._has_entry(key):
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:  # noqa: ANN401
+        """Adds an entry, evicting the least recently used entry if full.
+
+        Args:
+            key: The key of the entry.
+            value: The value of the entry, must not be None.
+        """
+        with self._lock:
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    def get_or_create(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+    ) -> Any:  # noqa: ANN401
+        """Looks up an entry, creating and adding it if it is not cached.
+
+        Concurrent calls for the same key wait for the first call to create
+        the entry, rather than each calling the factory.
+
+        Args:
+            key: The key of the entry.
+            factory: Creates the value of the entry.
+
+        Returns:
+            The value of the entry.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            creating = self._creating.setdefault(key, threading.Lock())
+        try:
+            with creating:
+                with self._lock:
+                    value = self._entries.get(key) if self._has_entry(key) else None
+                if value is None:
+                    value = factory()
+                    self.put(key, value)
+        finally:
+            with self._lock:
+                self._creating.pop(key, None)
+        return value
+
+    def clear(self) -> None:
+        """Removes all entries from memory and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+            self.stats = CacheStats()
+
+    def _has_entry(self, key: Hashable) -> bool:
+        """Checks whether an unexpired entry is in memory. The lock must be held."""
+        if key not in self._entries:
+            return False
+        if self.ttl_seconds is not None and self._expiry[key] <= time.monotonic():
+            del self._entries[key]
+            del self._expiry[key]
+            return False
+        return True
+
+    def _store(self, key: Hashable, value: Any) -> None:  # noqa: ANN401
+        """Stores an entry in memory. The lock must be held."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.ttl_seconds is not None:
+            self._expiry[key] = time.monotonic() + self.ttl_seconds
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._expiry.pop(evicted, None)
+            self.stats.evictions += 1
+
+    def _disk_path(self, key: Hashable) -> pathlib.Path | None:
+        """Returns the path of an entry on disk, if the disk tier is enabled."""
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.cache_dir / f"{digest}.pkl"
+
+    def _read_disk(self, key: Hashable) -> Any | None:  # noqa: ANN401
+        """Reads an entry from disk."""
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with path.open("rb") as file_buffer:
+                value = pickle.load(file_buffer)  # noqa: S301
+        except (OSError, pickle.UnpicklingError, EOFError):
+            logger.warning("Could not read cache file %s.", path)
+            return None
+        path.touch()
+        return value
+
+    def _write_disk(self, key: Hashable, value: Any) -> None:  # noqa: ANN401
+        """Writes an entry to disk and removes the least recently used files."""
+        path = self._disk_path(key)
+        if path is None or self.cache_dir is None:
+            return
+        temporary_path = path.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp",
+        )
+        with temporary_path.open("wb") as file_buffer:
+            pickle.dump(value, file_buffer)
+        temporary_path.replace(path)
+
+        # Other processes may remove files while they are listed.
+        files = []
+        for file in self.cache_dir.glob("*.pkl"):
+            with contextlib.suppress(FileNotFoundError):
+                files.append((file.stat().st_mtime, file))
+        files.sort()
+        for _, file in files[: max(len(files) - self.max_disk_size, 0)]:
+            file.unlink(missing_ok=True)
+
+
+class VersionStore(Protocol):
+    """Stores versions outside of the process, see `VersionCounter`."""
+
+    def get(self, key: Any) -> int:  # noqa: ANN401
+        """Returns the current version of a key."""
+
+    def bump(self, key: Any) -> int:  # noqa: ANN401
+        """Increments the version of a key and returns it."""
+
+
+class VersionCounter:
+    """Thread-safe version counters, e.g. of the annotations of a subject.
+
+    Versions are kept in memory, unless a store is set with `use_store`. A
+    store shares the versions between processes, such that the workers of
+    the production server invalidate each other's entries.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the VersionCounter class."""
+        self._versions: collections.Counter[Hashable] = collections.Counter()
+        self._lock = threading.Lock()
+        self._store: VersionStore | None = None
+
+    def use_store(self, store: VersionStore | None) -> None:
+        """Sets the store of the versions, or None to keep them in memory."""
+        with self._lock:
+            self._store = store
+
+    def get(self, key: Hashable) -> int:
+        """Returns the current version of a key."""
+        if self._store is not None:
+            return self._store.get(key)
+        with self._lock:
+            return self._versions[key]
+
+    def bump(self, key: Hashable) -> int:
+        """Increments the version of a key.
+
+        Returns:
+            The new version.
+        """
+        if self._store is not None:
+            return self._store.bump(key)
+        with self._lock:
+            self._versions[key] += 1
+            return self._versions[key]
+
+
+def _cache_subdirectory(name: str) -> pathlib.Path | None:
+    """Returns a subdirectory of the on-disk cache, if enabled."""
+    if settings.FIGURE_CACHE_DIR is None:
+        return None
+    return pathlib.Path(settings.FIGURE_CACHE_DIR) / name
+
+
+# Caches shared across components. Sensor figures and binned data only depend
+# on the ingested data, so they may be persisted to disk. The full-resolution
+# sensor series are larger and kept in memory only. Sleep windows depend on
+# annotations and are keyed by `annotation_versions`. Day contexts are shared by
+# the callbacks that run when another day is selected; they are also keyed by
+# `annotation_versions` and expire quickly, as they hold full-resolution data.
+sensor_figures = LRUCache(
+    settings.FIGURE_CACHE_SIZE,
+    cache_dir=_cache_subdirectory("sensor_figures"),
+)
+binned_data = LRUCache(
+    settings.FIGURE_CACHE_SIZE,
+    cache_dir=_cache_subdirectory("binned_data"),
+)
+sensor_series = LRUCache(settings.FIGURE_CACHE_SIZE)
+sleep_windows = LRUCache(settings.FIGURE_CACHE_SIZE)
+day_contexts = LRUCache(
+    settings.DAY_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.DAY_CONTEXT_TTL_SECONDS,
+)
+annotation_versions = VersionCounter()
@@ -46,16 +46,41 @@ class Callback:
     )
 
 
+@dataclasses.dataclass
+class ClientsideCallback:
+    """A class representing a Dash callback that runs in the browser.
+
+    Attributes:
+        clientside_function (dash.ClientsideFunction): The JavaScript function,
+            defined in the app's assets.
+        outputs (dash.Output | list[dash.Output]): The output(s) of the callback.
+        inputs (dash.Input | list[dash.Input]): The input(s) of the callback.
+        states (dash.State | list[dash.State]): The state(s) of the callback.
+        kwargs (dict): Additional keyword arguments to be passed to the callback.
+    """
+
+    clientside_function: dash.ClientsideFunction
+    outputs: dash.Output | list[dash.Output]
+    inputs: dash.Input | list[dash.Input]
+    states: dash.State | list[dash.State] = dataclasses.field(default_factory=list)
+    kwargs: dict[str, Any] = dataclasses.field(
+        default_factory=lambda: {"prevent_initial_call": False},
+    )
+
+
 class CallbackManager:
     """A class for managing Dash callbacks.
 
     Attributes:
         _callbacks (list[Callback]): A list of Callback objects.
+        _clientside_callbacks (list[ClientsideCallback]): A list of
+            ClientsideCallback objects.
     """
 
     def __init__(self) -> None:
         """Initializes a new instance of the CallbackManager class."""
         self._callbacks: list[Callback] = []
+        self._clientside_callbacks: list[ClientsideCallback] = []
 
     def callback(self, *args: Any, **kwargs: Any) -> Callable[[Any], Any]:  # noqa: ANN401
         """A decorator for registering a Dash callback.
@@ -108,6 +133,34 @@ class CallbackManager:
 
         return wrapper
 
+    def clientside_callback(
+        self,
+        clientside_function: dash.ClientsideFunction,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        """Registers a Dash callback that runs in the browser.
+
+        Args:
+            clientside_function: The JavaScript function, defined in the app's
+                assets.
+            *args: The arguments of the callback.
+            **kwargs: The keyword arguments of the callback.
+        """
+        output, inputs, state, prevent_initial_call = dependencies.handle_callback_args(
+            args,
+            kwargs,
+        )
+        self._clientside_callbacks.append(
+            ClientsideCallback(
+                clientside_function,
+                output,
+                inputs,
+                state,
+                {"prevent_initial_call": prevent_initial_call},
+            ),
+        )
+
     def attach_to_app(self, app: dash.Dash) -> None:
         """Attaches all registered callbacks to a Dash app.
 
@@ -122,6 +175,19 @@ class CallbackManager:
                 callback.states,
                 **callback.kwargs,
             )(callback.func)
+        for clientside_callback in self._clientside_callbacks:
+            logger.debug(
+                "Attaching clientside callback: %s.%s.",
+                clientside_callback.clientside_function.namespace,
+                clientside_callback.clientside_function.function_name,
+            )
+            app.clientside_callback(
+                clientside_callback.clientside_function,
+                clientside_callback.outputs,
+                clientside_callback.inputs,
+                clientside_callback.states,
+                **clientside_callback.kwargs,
+            )
 
 
 # Allow a single manager to be used across multiple files.
@@ -138,10 +204,12 @@ def initialize_components() -> None:
     """
     # pylint: disable=import-outside-toplevel disable=unused-import
     from actigraphy.components import (  # noqa: PLC0415
+        actogram,  # noqa: F401
         app_license,  # noqa: F401
         day_slider,  # noqa: F401
         file_selection,  # noqa: F401
         finished_checkbox,  # noqa: F401
         graph,  # noqa: F401
+        night_comparison,  # noqa: F401
         switches,  # noqa: F401
     )
@@ -41,23 +41,19 @@ def parse_args() -> argparse.Namespace:
     return args
 
 
-def get_subject_folders(args: argparse.Namespace) -> list[str]:
-    """Returns a list of subject folders sorted by name.
+def get_input_folder(args: argparse.Namespace) -> pathlib.Path:
+    """Returns the absolute path of the GGIR output folder.
 
     Args:
         args: The parsed command-line arguments.
 
     Returns:
-        list[str]: A list of subject folders sorted by name.
+        pathlib.Path: The GGIR output folder.
     """
     input_datapath = pathlib.Path(args.input_folder)
     if not input_datapath.is_absolute():
         input_datapath = pathlib.Path.cwd() / input_datapath
-    return [
-        str(directory)
-        for directory in sorted(input_datapath.glob("output_*"))
-        if directory.is_dir()
-    ]
+    return input_datapath
 
 
 def _add_string_quotation(to_print: Any) -> str:  # noqa: ANN401
@@ -3,6 +3,7 @@
 import datetime
 import functools
 import logging
+from typing import Literal
 
 import pydantic
 import pydantic_settings
@@ -56,6 +57,237 @@ class Settings(pydantic_settings.BaseSettings):
         },
     )
 
+    MAX_GRAPH_POINTS: int = pydantic.Field(
+        3000,
+        description=(
+            "The maximum number of points per trace in the sensor graph. Set to 0 "
+            "to disable downsampling."
+        ),
+        json_schema_extra={
+            "env": "MAX_GRAPH_POINTS",
+        },
+    )
+
+    GRAPH_RENDER_MODE: Literal["auto", "svg", "webgl"] = pydantic.Field(
+        "auto",
+        description=(
+            "The rendering mode of the sensor traces. 'auto' uses WebGL when a "
+            "trace has more points than WEBGL_POINT_THRESHOLD."
+        ),
+        json_schema_extra={
+            "env": "GRAPH_RENDER_MODE",
+        },
+    )
+
+    WEBGL_POINT_THRESHOLD: int = pydantic.Field(
+        10000,
+        description="The number of points per trace above which WebGL is used.",
+        json_schema_extra={
+            "env": "WEBGL_POINT_THRESHOLD",
+        },
+    )
+
+    FIGURE_CACHE_SIZE: int = pydantic.Field(
+        64,
+        description="The maximum number of days kept in the in-memory figure cache.",
+        json_schema_extra={
+            "env": "FIGURE_CACHE_SIZE",
+        },
+    )
+
+    FIGURE_CACHE_DIR: str | None = pydantic.Field(
+        None,
+        description=(
+            "A directory in which sensor figures are cached across restarts. "
+            "Disabled if not set."
+        ),
+        json_schema_extra={
+            "env": "FIGURE_CACHE_DIR",
+        },
+    )
+
+    DAY_CONTEXT_CACHE_SIZE: int = pydantic.Field(
+        8,
+        description=(
+            "The maximum number of days whose context, i.e. the day, its sleep "
+            "times and its data, is shared between the callbacks of a day change."
+        ),
+        json_schema_extra={
+            "env": "DAY_CONTEXT_CACHE_SIZE",
+        },
+    )
+
+    DAY_CONTEXT_TTL_SECONDS: float = pydantic.Field(
+        30,
+        description="The number of seconds a day context is shared for.",
+        json_schema_extra={
+            "env": "DAY_CONTEXT_TTL_SECONDS",
+        },
+    )
+
+    ACTOGRAM_BIN_MINUTES: int = pydantic.Field(
+        10,
+        description=(
+            "The width of the bins of the actogram overview in minutes. Must "
+            "divide a day."
+        ),
+        json_schema_extra={
+            "env": "ACTOGRAM_BIN_MINUTES",
+        },
+    )
+
+    PREFETCH_WORKERS: int = pydantic.Field(
+        1,
+        description=(
+            "The number of background threads that render the days adjacent to "
+            "the day shown. Set to 0 to disable prefetching."
+        ),
+        json_schema_extra={
+            "env": "PREFETCH_WORKERS",
+        },
+    )
+
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = pydantic.Field(
+        30,
+        description=(
+            "The number of seconds a database connection waits for another "
+            "process to finish writing before it fails."
+        ),
+        json_schema_extra={
+            "env": "SQLITE_BUSY_TIMEOUT_SECONDS",
+        },
+    )
+
+    SQLITE_WAL: bool = pydantic.Field(
+        default=False,
+        description=(
+            "Whether the subject databases use write-ahead logging, such that "
+            "reviewers can read while another reviewer writes. Write-ahead "
+            "logging relies on shared memory and is only safe when the data "
+            "is on a local disk, not on network storage."
+        ),
+        json_schema_extra={
+            "env": "SQLITE_WAL",
+        },
+    )
+
+    DATA_DIR: str | None = pydantic.Field(
+        None,
+        description=(
+            "The GGIR output folder served by the production server, see "
+            "`actigraphy.wsgi`."
+        ),
+        json_schema_extra={
+            "env": "DATA_DIR",
+        },
+    )
+
+    SERVER_BIND: str = pydantic.Field(
+        "0.0.0.0:8051",
+        description="The address the production server listens on.",
+        json_schema_extra={
+            "env": "SERVER_BIND",
+        },
+    )
+
+    SERVER_WORKERS: int = pydantic.Field(
+        2,
+        description=(
+            "The number of worker processes of the production server. Each worker "
+            "has its own caches."
+        ),
+        json_schema_extra={
+            "env": "SERVER_WORKERS",
+        },
+    )
+
+    SERVER_THREADS: int = pydantic.Field(
+        8,
+        description=(
+            "The number of threads per worker process of the production server. "
+            "Threads of a worker share its caches."
+        ),
+        json_schema_extra={
+            "env": "SERVER_THREADS",
+        },
+    )
+
+    SERVER_TIMEOUT_SECONDS: int = pydantic.Field(
+        120,
+        description=(
+            "The number of seconds after which a worker of the production server "
+            "that does not respond is restarted."
+        ),
+        json_schema_extra={
+            "env": "SERVER_TIMEOUT_SECONDS",
+        },
+    )
+
+    INGEST_WORKERS: int = pydantic.Field(
+        1,
+        description=(
+            "The number of processes per server process that ingest subjects "
+            "opened for the first time."
+        ),
+        json_schema_extra={
+            "env": "INGEST_WORKERS",
+        },
+    )
+
+    MAX_CONCURRENT_INGESTS: int = pydantic.Field(
+        2,
+        description=(
+            "The number of subjects ingested at the same time, across all server "
+            "processes of a machine. Further ingests are queued."
+        ),
+        json_schema_extra={
+            "env": "MAX_CONCURRENT_INGESTS",
+        },
+    )
+
+    INGEST_MEMORY_BUDGET_MB: int = pydantic.Field(
+        2048,
+        description=(
+            "The estimated memory all concurrent ingests may use together, in "
+            "megabytes. An ingest that exceeds the budget on its own still runs, "
+            "but only when no other ingest runs."
+        ),
+        json_schema_extra={
+            "env": "INGEST_MEMORY_BUDGET_MB",
+        },
+    )
+
+    SUBJECT_INDEX_REFRESH_SECONDS: float = pydantic.Field(
+        300,
+        description=(
+            "The number of seconds after which the index of subjects is refreshed "
+            "in the background when it is searched."
+        ),
+        json_schema_extra={
+            "env": "SUBJECT_INDEX_REFRESH_SECONDS",
+        },
+    )
+
+    SUBJECT_PAGE_SIZE: int = pydantic.Field(
+        50,
+        description="The number of subjects listed per search in the subject picker.",
+        json_schema_extra={
+            "env": "SUBJECT_PAGE_SIZE",
+        },
+    )
+
+    JOB_DIR: str | None = pydantic.Field(
+        None,
+        description=(
+            "The directory in which the state of background jobs is stored. "
+            "Must be shared by all server processes. Defaults to a directory "
+            "in the system's temporary directory."
+        ),
+        json_schema_extra={
+            "env": "JOB_DIR",
+        },
+    )
+
 
 @functools.lru_cache
 def get_settings() -> Settings:
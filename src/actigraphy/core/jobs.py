@@ -0,0 +1,450 @@
+"""Jobs that take too long to run in a request, such as ingesting a new subject.
+
+Jobs run in a pool of processes, such that they neither block the thread that
+serves the request nor compete for the GIL with the threads that serve other
+users. The state of every job is kept in a directory shared by the server
+processes of a machine: a job submitted by one process is seen, and not
+submitted again, by all others, and its progress can be shown by any of them.
+
+Jobs are admitted in the order they were submitted, by all processes together:
+a job waits until fewer than a maximum number of jobs run and the estimated
+memory of the running jobs leaves room for it, see `JobStore.admit`. Queued
+jobs wait in a thread of the process that submitted them, such that they do
+not occupy the processes of the pool.
+"""
+
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable, Generator
+from concurrent import futures
+from concurrent.futures import process
+from typing import Literal
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+INGEST_WORKERS = settings.INGEST_WORKERS
+MAX_CONCURRENT_INGESTS = settings.MAX_CONCURRENT_INGESTS
+INGEST_MEMORY_BUDGET_MB = settings.INGEST_MEMORY_BUDGET_MB
+JOB_DIR = settings.JOB_DIR
+SQLITE_BUSY_TIMEOUT_SECONDS = settings.SQLITE_BUSY_TIMEOUT_SECONDS
+ADMISSION_POLL_SECONDS = 0.5
+
+logger = logging.getLogger(LOGGER_NAME)
+
+ProgressCallback = Callable[[float, str], None]
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+@dataclasses.dataclass(frozen=True)
+class Job:
+    """The state of a job.
+
+    Attributes:
+        key: Identifies the job, e.g. the database of a subject.
+        run_id: Identifies a single run of the job.
+        state: Whether the job is queued, running, done or failed.
+        progress: The fraction of the job that is done.
+        message: The current step, or the error of a failed job.
+        pid: The process that submitted the job and runs it in its pool.
+        memory_bytes: The estimated peak memory of the job.
+        submitted_at: The time the job was submitted, in seconds since the epoch.
+    """
+
+    key: str
+    run_id: str
+    state: JobState
+    progress: float = 0
+    message: str = ""
+    pid: int = dataclasses.field(default_factory=os.getpid)
+    memory_bytes: int = 0
+    submitted_at: float = dataclasses.field(default_factory=time.time)
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the job is queued or running in a process that is alive."""
+        return self.state in ("queued", "running") and _is_alive(self.pid)
+
+
+class JobStore:
+    """Stores the state of jobs as JSON files in a directory."""
+
+    def __init__(self, directory: str | pathlib.Path) -> None:
+        """Initializes a new instance of the JobStore class.
+
+        Args:
+            directory: The directory of the files, created when needed.
+        """
+        self.directory = pathlib.Path(directory)
+
+    def get(self, key: str) -> Job | None:
+        """Returns the state of the last job with the given key, if any."""
+        try:
+            text = self._path(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        return Job(**json.loads(text))
+
+    def active(self) -> list[Job]:
+        """Returns the queued and running jobs, in the order they were submitted."""
+        active_jobs = []
+        for path in self.directory.glob("*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                job = Job(**json.loads(path.read_text(encoding="utf-8")))
+                if job.is_active:
+                    active_jobs.append(job)
+        return sorted(active_jobs, key=_submission_order)
+
+    def queue_position(self, job: Job) -> int:
+        """Returns the number of queued jobs that were submitted before a job."""
+        return sum(
+            other.state == "queued"
+            and _submission_order(other) < _submission_order(job)
+            for other in self.active()
+        )
+
+    def claim(self, key: str, memory_bytes: int = 0) -> tuple[Job, bool]:
+        """Queues a new job, unless an active job with the same key exists.
+
+        A job that finished, or whose process died, is replaced by the new
+        job.
+
+        Args:
+            key: Identifies the job.
+            memory_bytes: The estimated peak memory of the job.
+
+        Returns:
+            The queued or active job, and whether it is new.
+        """
+        job = Job(
+            key=key,
+            run_id=uuid.uuid4().hex,
+            state="queued",
+            memory_bytes=memory_bytes,
+        )
+        path = self._path(key)
+        temporary = self._write_temporary(job)
+        try:
+            try:
+                # Unlike opening the file exclusively, linking creates it with
+                # its content, such that readers never see an empty file.
+                os.link(temporary, path)
+            except FileExistsError:
+                # Processes that find the same inactive job take turns, such
+                # that only the first replaces it.
+                with self._lock():
+                    current = self.get(key)
+                    if current is not None and current.is_active:
+                        return current, False
+                    temporary.replace(path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                temporary.unlink()
+        return job, True
+
+    def admit(self, job: Job, max_running: int, memory_budget: int) -> Job | None:
+        """Starts a queued job, if the limits allow it.
+
+        A job starts once no job submitted before it is queued, fewer than
+        `max_running` jobs run, and the estimated memory of the running jobs
+        and the job is within the budget. A job that exceeds the budget on its
+        own starts once no other job runs.
+
+        Args:
+            job: The queued job.
+            max_running: The largest number of jobs that run at once.
+            memory_budget: The estimated memory of all running jobs, in bytes.
+
+        Returns:
+            The running job, or None if it has to wait.
+        """
+        with self._lock():
+            active_jobs = self.active()
+            running = [other for other in active_jobs if other.state == "running"]
+            is_next = all(
+                _submission_order(other) >= _submission_order(job)
+                for other in active_jobs
+                if other.state == "queued"
+            )
+            memory = job.memory_bytes + sum(other.memory_bytes for other in running)
+            if (
+                not is_next
+                or len(running) >= max_running
+                or (running and memory > memory_budget)
+            ):
+                return None
+            job = dataclasses.replace(job, state="running")
+            self.update(job)
+            return job
+
+    def update(self, job: Job) -> None:
+        """Stores the state of a job, unless it was replaced by a new job."""
+        current = self.get(job.key)
+        if current is not None and current.run_id != job.run_id:
+            return
+        self._write_temporary(job).replace(self._path(job.key))
+
+    @contextlib.contextmanager
+    def _lock(self) -> Generator[None, None, None]:
+        """Holds a lock shared by all processes while claiming or admitting a job.
+
+        SQLite's write lock is used, as it works on all platforms and is
+        released when the process holding it dies.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            self.directory / "admission.lock",
+            timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+        )
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            yield
+        finally:
+            connection.close()
+
+    def _path(self, key: str) -> pathlib.Path:
+        """Returns the file of the jobs with the given key."""
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return self.directory / f"{digest}.json"
+
+    def _write_temporary(self, job: Job) -> pathlib.Path:
+        """Writes a job to a new temporary file in the directory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / f"{job.run_id}.{uuid.uuid4().hex}.tmp"
+        temporary.write_text(json.dumps(dataclasses.asdict(job)), encoding="utf-8")
+        return temporary
+
+
+class JobRunner:
+    """Runs jobs in a pool of processes, at most one per key at a time.
+
+    Attributes:
+        store: The state of the jobs.
+        max_workers: The number of processes.
+        max_running: The largest number of jobs that run at once, across all
+            runners that share the store.
+        memory_budget: The estimated memory of all running jobs, in bytes.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        max_workers: int,
+        max_running: int,
+        memory_budget: int,
+    ) -> None:
+        """Initializes a new instance of the JobRunner class.
+
+        Args:
+            store: The state of the jobs.
+            max_workers: The number of processes, started when needed.
+            max_running: The largest number of jobs that run at once, across
+                all runners that share the store.
+            memory_budget: The estimated memory of all running jobs, in bytes.
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_running = max_running
+        self.memory_budget = memory_budget
+        self._executor: futures.ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[Job, Callable[..., None]]] = {}
+        self._pending_changed = threading.Condition()
+        self._admission_thread: threading.Thread | None = None
+
+    def submit(
+        self,
+        key: str,
+        func: Callable[..., None],
+        memory_bytes: int = 0,
+    ) -> Job:
+        """Queues a job, unless a job with the same key is queued or running.
+
+        Args:
+            key: Identifies the job, e.g. the database of a subject.
+            func: Runs the job. It is called in another process with a
+                `progress` keyword argument, a `ProgressCallback`, so it must
+                be picklable.
+            memory_bytes: The estimated peak memory of the job.
+
+        Returns:
+            The state of the job.
+        """
+        job, is_new = self.store.claim(key, memory_bytes)
+        if not is_new:
+            logger.debug("Job %s is active already.", key)
+            return job
+        logger.info("Queueing job %s.", key)
+        with self._pending_changed:
+            self._pending[job.run_id] = (job, func)
+            if self._admission_thread is None:
+                self._admission_thread = threading.Thread(
+                    target=self._admit_pending,
+                    name="job-admission",
+                    daemon=True,
+                )
+                self._admission_thread.start()
+            self._pending_changed.notify()
+        return job
+
+    def get(self, key: str) -> Job | None:
+        """Returns the state of the last job with the given key, if any."""
+        return self.store.get(key)
+
+    def queue_position(self, job: Job) -> int:
+        """Returns the number of queued jobs that were submitted before a job."""
+        return self.store.queue_position(job)
+
+    def _admit_pending(self) -> None:
+        """Starts the queued jobs of this runner once they are admitted.
+
+        Runs in a thread of the runner, which polls the store while jobs are
+        queued and sleeps otherwise.
+        """
+        while True:
+            with self._pending_changed:
+                while not self._pending:
+                    self._pending_changed.wait()
+                pending = list(self._pending.values())
+            try:
+                self._admit_in_order(pending)
+            except Exception:
+                logger.exception("Admitting the queued jobs failed.")
+            with self._pending_changed:
+                if self._pending:
+                    self._pending_changed.wait(ADMISSION_POLL_SECONDS)
+
+    def _admit_in_order(
+        self,
+        pending: list[tuple[Job, Callable[..., None]]],
+    ) -> None:
+        """Starts queued jobs until one of them has to wait.
+
+        As a job is only admitted after all jobs submitted before it, the jobs
+        after the first one that has to wait are not tried.
+        """
+        for job, func in pending:
+            current = self.store.get(job.key)
+            if current is None or current.run_id != job.run_id:
+                logger.info("Job %s was replaced while queued.", job.key)
+                self._remove_pending(job)
+                continue
+            running_job = self.store.admit(job, self.max_running, self.memory_budget)
+            if running_job is None:
+                return
+            self._remove_pending(job)
+            self._start(running_job, func)
+
+    def _remove_pending(self, job: Job) -> None:
+        """Removes a job from the queued jobs of this runner."""
+        with self._pending_changed:
+            self._pending.pop(job.run_id, None)
+
+    def _start(self, job: Job, func: Callable[..., None]) -> None:
+        """Runs an admitted job in the pool."""
+        logger.info("Starting job %s.", job.key)
+        try:
+            future = self._get_executor().submit(_run, self.store.directory, job, func)
+        except RuntimeError as error:
+            # The pool broke or was shut down since its last job.
+            with self._lock:
+                self._executor = None
+            logger.exception("Job %s could not be started.", job.key)
+            self.store.update(
+                dataclasses.replace(job, state="failed", message=str(error)),
+            )
+            return
+        future.add_done_callback(functools.partial(self._record_crash, job))
+
+    def _get_executor(self) -> futures.ProcessPoolExecutor:
+        """Returns the process pool, starting it if needed.
+
+        Processes are spawned rather than forked, as forking a process with
+        running threads, such as a server worker, may deadlock the child.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ProcessPoolExecutor(
+                    self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _record_crash(self, job: Job, future: futures.Future[None]) -> None:
+        """Marks a job as failed if its process died before it finished."""
+        if future.cancelled():
+            logger.warning("Job %s was cancelled.", job.key)
+            self.store.update(
+                dataclasses.replace(job, state="failed", message="Cancelled."),
+            )
+            return
+        error = future.exception()
+        if error is None:
+            return
+        logger.error("Job %s crashed: %s", job.key, error)
+        if isinstance(error, process.BrokenProcessPool):
+            with self._lock:
+                self._executor = None
+        self.store.update(
+            dataclasses.replace(job, state="failed", message=str(error)),
+        )
+
+
+def _run(directory: pathlib.Path, job: Job, func: Callable[..., None]) -> None:
+    """Runs an admitted job and records its state."""
+    store = JobStore(directory)
+
+    def progress(fraction: float, message: str) -> None:
+        store.update(dataclasses.replace(job, progress=fraction, message=message))
+
+    try:
+        func(progress=progress)
+    except Exception as error:
+        logger.exception("Job %s failed.", job.key)
+        store.update(dataclasses.replace(job, state="failed", message=str(error)))
+    else:
+        store.update(dataclasses.replace(job, state="done", progress=1, message=""))
+
+
+def _submission_order(job: Job) -> tuple[float, str]:
+    """Orders jobs by the time they were submitted."""
+    return job.submitted_at, job.run_id
+
+
+def _is_alive(pid: int) -> bool:
+    """Whether a process on this machine is alive.
+
+    Windows has no signal that only checks a process, so all processes are
+    assumed to be alive there.
+    """
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+ingests = JobRunner(
+    JobStore(JOB_DIR or pathlib.Path(tempfile.gettempdir()) / "actigraphy-jobs"),
+    max_workers=INGEST_WORKERS,
+    max_running=MAX_CONCURRENT_INGESTS,
+    memory_budget=INGEST_MEMORY_BUDGET_MB * 1024**2,
+)
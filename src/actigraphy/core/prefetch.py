@@ -0,0 +1,96 @@
+"""Speculative background work, such as rendering the days next to the one shown.
+
+Tasks are grouped, e.g. per subject. Scheduling new tasks for a group cancels
+the tasks of that group which have not started yet and are no longer wanted,
+such that jumping to a distant day does not queue up stale work.
+"""
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from concurrent import futures
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+PREFETCH_WORKERS = settings.PREFETCH_WORKERS
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class Prefetcher:
+    """Runs prefetch tasks on a small thread pool.
+
+    Attributes:
+        max_workers: The number of worker threads. If zero, tasks are dropped.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        """Initializes a new instance of the Prefetcher class.
+
+        Args:
+            max_workers: The number of worker threads. If zero, prefetching is
+                disabled.
+        """
+        self.max_workers = max_workers
+        self._executor = (
+            futures.ThreadPoolExecutor(max_workers, thread_name_prefix="prefetch")
+            if max_workers > 0
+            else None
+        )
+        self._pending: dict[Hashable, dict[Hashable, futures.Future[None]]] = {}
+        self._lock = threading.Lock()
+
+    def schedule(
+        self,
+        group: Hashable,
+        tasks: dict[Hashable, Callable[[], None]],
+    ) -> None:
+        """Schedules the tasks of a group.
+
+        Pending tasks of the group that are not in `tasks` are cancelled. Tasks
+        that are already pending are not scheduled again.
+
+        Args:
+            group: The group of the tasks, e.g. the subject.
+            tasks: The tasks by key, e.g. the day index.
+        """
+        if self._executor is None:
+            return
+        with self._lock:
+            pending = {}
+            for key, future in self._pending.get(group, {}).items():
+                if key not in tasks:
+                    future.cancel()
+                elif not future.done():
+                    pending[key] = future
+            for key, task in tasks.items():
+                if key not in pending:
+                    logger.debug("Prefetching %s of %s.", key, group)
+                    pending[key] = self._executor.submit(_run_task, task)
+            self._pending[group] = pending
+
+    def pending(self, group: Hashable) -> list[Hashable]:
+        """Returns the keys of the tasks of a group that have not finished."""
+        with self._lock:
+            return [
+                key
+                for key, future in self._pending.get(group, {}).items()
+                if not future.done()
+            ]
+
+
+def _run_task(task: Callable[[], None]) -> None:
+    """Runs a task, logging rather than raising errors.
+
+    Prefetching is speculative; a failure will surface again, with a proper
+    error, if the user actually requests the result.
+    """
+    try:
+        task()
+    except Exception:
+        logger.exception("Prefetch task failed.")
+
+
+prefetcher = Prefetcher(PREFETCH_WORKERS)
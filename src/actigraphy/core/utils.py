@@ -6,6 +6,9 @@ import os
 import pathlib
 from os import path
 
+import numpy as np
+from numpy import typing as npt
+
 from actigraphy.core import config
 
 settings = config.get_settings()
@@ -32,8 +35,18 @@ class FileManager:
         Files are kept as strings because Dash cannot serialize pathlib.Path.
     """
 
-    def __init__(self, base_dir: str | pathlib.Path) -> None:
-        """Initializes the FileManager class."""
+    def __init__(
+        self,
+        base_dir: str | pathlib.Path,
+        metadata_file: str | None = None,
+    ) -> None:
+        """Initializes the FileManager class.
+
+        Args:
+            base_dir: The GGIR output folder of the subject.
+            metadata_file: The GGIR metadata file, if known, e.g. from the
+                subject index. Otherwise, it is looked up in `base_dir`.
+        """
         self.base_dir = str(base_dir)
         self.database = path.join(self.base_dir, "actigraphy.sqlite")
         self.log_dir = path.join(self.base_dir, "logs")
@@ -55,8 +68,10 @@ class FileManager:
             "ms4.out",
             self.identifier + ".gt3x.RData",
         )
-        metadata_dir = path.join(self.base_dir, "meta", "basic")
-        self.metadata_file = str(next(pathlib.Path(metadata_dir).glob("meta_*")))
+        if metadata_file is None:
+            metadata_dir = path.join(self.base_dir, "meta", "basic")
+            metadata_file = str(next(pathlib.Path(metadata_dir).glob("meta_*")))
+        self.metadata_file = metadata_file
 
         os.makedirs(self.log_dir, exist_ok=True)
 
@@ -145,3 +160,116 @@ def point2time(
                 ),
             )
     return time_with_tz
+
+
+def times2points(
+    utc_times: npt.ArrayLike,
+    utc_offsets: npt.ArrayLike,
+    date: datetime.date,
+    daylight_savings_shift: int | None,
+) -> npt.NDArray[np.int64]:
+    """Converts times to slider points, see `time2point`.
+
+    The times are given as stored in the database, i.e. as naive UTC times and
+    their UTC offsets, such that no datetime objects need to be built.
+
+    Args:
+        utc_times: The naive UTC times.
+        utc_offsets: The UTC offsets of the times in seconds.
+        date: The date preceding midnight as reference.
+        daylight_savings_shift: The difference in seconds caused by daylight
+            savings time.
+
+    Returns:
+        The number of minutes since noon on the given date of each time.
+    """
+    local_times = np.asarray(utc_times, dtype="datetime64[us]") + np.asarray(
+        utc_offsets,
+        dtype=np.int64,
+    ).astype("timedelta64[s]")
+    reference = np.datetime64(
+        datetime.datetime.combine(date, datetime.time(hour=12)),
+        "us",
+    )
+    points: npt.NDArray[np.int64] = (local_times - reference) // np.timedelta64(
+        1,
+        "m",
+    )
+    if daylight_savings_shift is None:
+        return points
+    return points + daylight_savings_shift // 60
+
+
+def parse_daylight_savings_timepoint(
+    daylight_savings_timepoint: str | None,
+) -> np.datetime64 | None:
+    """Parses the daylight savings timepoint to a naive UTC time.
+
+    Args:
+        daylight_savings_timepoint: The timepoint at which daylight savings time
+            starts, as passed to `point2time`.
+
+    Returns:
+        The UTC time of the timepoint, or None if there is none.
+    """
+    if daylight_savings_timepoint is None:
+        return None
+    time = datetime.datetime.strptime(
+        daylight_savings_timepoint,
+        "%Y-%m-%d %H:%M:%S%z",
+    )
+    return np.datetime64(time.astimezone(datetime.UTC).replace(tzinfo=None), "us")
+
+
+def points2times(
+    points: npt.ArrayLike,
+    date: datetime.date,
+    timezone_offset: int,
+    daylight_savings_time: np.datetime64 | None,
+    daylight_savings_shift: int | None,
+) -> tuple[npt.NDArray[np.datetime64], npt.NDArray[np.int64]]:
+    """Converts slider points to times, see `point2time`.
+
+    Args:
+        points: The point values to convert.
+        date: The date to combine with the converted times.
+        timezone_offset: Timezone offset in seconds.
+        daylight_savings_time: The UTC time at which daylight savings time
+            starts, see `parse_daylight_savings_timepoint`.
+        daylight_savings_shift: The seconds offset due to daylight savings.
+
+    Returns:
+        The naive UTC times and their UTC offsets in seconds, as stored in the
+        database.
+
+    Notes:
+        The fraction of a minute is rounded to microseconds exactly like
+        `datetime.timedelta` does, such that the results are identical to
+        those of `point2time`.
+    """
+    if daylight_savings_shift is None:
+        daylight_savings_shift = 0
+
+    minutes_in_36_hours = 36 * 60
+    total_minutes = minutes_in_36_hours + daylight_savings_shift // 60
+    n_minutes = np.asarray(points, dtype=np.float64) / N_SLIDER_STEPS * total_minutes
+
+    days, remainder_minutes = np.divmod(n_minutes, 1440)
+    hours, minutes = np.divmod(remainder_minutes, 60)
+    whole_minutes = np.trunc(minutes)
+    microseconds = (
+        days.astype(np.int64) * 86_400_000_000
+        + hours.astype(np.int64) * 3_600_000_000
+        + whole_minutes.astype(np.int64) * 60_000_000
+        + np.rint((minutes - whole_minutes) * 60_000_000.0).astype(np.int64)
+    )
+
+    midnight = np.datetime64(datetime.datetime.combine(date, datetime.time(0)), "us")
+    local_times = (
+        midnight + np.timedelta64(12, "h") + microseconds.astype("timedelta64[us]")
+    )
+    utc_times = local_times - np.timedelta64(timezone_offset, "s")
+    utc_offsets = np.full(utc_times.shape, timezone_offset, dtype=np.int64)
+    if daylight_savings_time is not None:
+        utc_offsets[utc_times >= daylight_savings_time] -= daylight_savings_shift
+    return utc_times, utc_offsets
@@ -1,8 +1,14 @@
 """A module for interacting with the SQL database."""
 
+import contextlib
 import logging
+import os
 import pathlib
+import sqlite3
+import threading
+import time
 from collections import abc
+from typing import Any
 
 import sqlalchemy
 from sqlalchemy import orm, pool
@@ -11,6 +17,12 @@ from actigraphy.core import config
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+SQLITE_BUSY_TIMEOUT_SECONDS = settings.SQLITE_BUSY_TIMEOUT_SECONDS
+SQLITE_WAL = settings.SQLITE_WAL
+# File systems store modification times at a coarse granularity, so a file may
+# change again without a new modification time shortly after a change. The
+# versions of files modified more recently than this are not cached.
+MTIME_GRANULARITY_SECONDS = 2
 
 logger = logging.getLogger(LOGGER_NAME)
 
@@ -34,8 +46,12 @@ class Database:
         self.engine = sqlalchemy.create_engine(
             url=f"sqlite:///{path}",
             poolclass=pool.StaticPool,
-            connect_args={"check_same_thread": False},
+            connect_args={
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_SECONDS,
+            },
         )
+        sqlalchemy.event.listen(self.engine, "connect", _configure_connection)
         self.session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -50,6 +66,55 @@ class Database:
         Base.metadata.create_all(self.engine)
 
 
+class AnnotationVersions:
+    """Versions of the annotations of subjects, stored in their databases.
+
+    The version is kept in the `user_version` pragma of the subject's
+    database, such that every worker process of the server sees the edits
+    made by the others. Use as the store of `cache.annotation_versions`.
+    Keys are (database path, identifier) pairs; every database holds a
+    single subject.
+
+    Versions are cached by the modification time of the database, such that
+    a cache lookup only reads the database after it changed.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the AnnotationVersions class."""
+        self._versions: dict[tuple[str, str], tuple[tuple[int, int], int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> int:
+        """Returns the current version of the annotations of a subject."""
+        stamp = _modification_stamp(key[0])
+        with self._lock:
+            cached = self._versions.get(key)
+        if stamp is not None and cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        with _connect(key[0]) as connection:
+            version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+        if stamp is not None and time.time_ns() - max(stamp) > (
+            MTIME_GRANULARITY_SECONDS * 10**9
+        ):
+            with self._lock:
+                self._versions[key] = (stamp, version)
+        return version
+
+    def bump(self, key: tuple[str, str]) -> int:
+        """Increments the version of the annotations of a subject.
+
+        Returns:
+            The new version.
+        """
+        with _connect(key[0]) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            version: int = connection.execute("PRAGMA user_version").fetchone()[0] + 1
+            connection.execute(f"PRAGMA user_version = {version:d}")
+            connection.execute("COMMIT")
+        return version
+
+
 def session_generator(
     path: str | pathlib.Path,
 ) -> abc.Generator[orm.Session, None, None]:
@@ -66,3 +131,55 @@ def session_generator(
         yield session
     finally:
         session.close()
+
+
+def _configure_connection(dbapi_connection: Any, _: Any) -> None:  # noqa: ANN401
+    """Sets the journal mode of a database, see `SQLITE_WAL`.
+
+    In write-ahead logging mode, readers do not block a writer and a writer
+    does not block readers. Otherwise, a rollback journal is used, which works
+    on network storage. In both modes, concurrent writers wait for up to
+    `SQLITE_BUSY_TIMEOUT_SECONDS`. The journal mode is stored in the
+    database, so databases switched to write-ahead logging before are
+    switched back once no other connection uses them.
+    """
+    cursor = dbapi_connection.cursor()
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    elif cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        with contextlib.suppress(sqlite3.OperationalError):
+            cursor.execute("PRAGMA journal_mode=DELETE")
+    cursor.close()
+
+
+def _modification_stamp(path: str | pathlib.Path) -> tuple[int, int] | None:
+    """Returns the modification times of a database and its write-ahead log.
+
+    Returns:
+        The modification times in nanoseconds, zero for a missing log, or None
+        if the database does not exist.
+    """
+    try:
+        database_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        log_mtime = os.stat(f"{path}-wal").st_mtime_ns
+    except OSError:
+        log_mtime = 0
+    return database_mtime, log_mtime
+
+
+@contextlib.contextmanager
+def _connect(path: str | pathlib.Path) -> abc.Generator[sqlite3.Connection, None, None]:
+    """Opens a plain connection to a database, in autocommit mode."""
+    connection = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+        isolation_level=None,
+    )
+    try:
+        yield connection
+    finally:
+        connection.close()
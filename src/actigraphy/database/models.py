@@ -173,6 +173,39 @@ class DataPoint(BaseTable):
         )
 
 
+class NonWearInterval(BaseTable):
+    """Represents a block of consecutive non-wear data points.
+
+    Non-wear is fixed at ingest, so it is stored run-length encoded rather
+    than read from every data point when a day is shown.
+
+    Attributes:
+        id: The unique identifier of the interval.
+        start: The UTC time of the first non-wear data point.
+        end: The UTC time of the last non-wear data point.
+        subject: The subject to which the interval belongs.
+    """
+
+    __tablename__ = "non_wear_intervals"
+
+    start: orm.Mapped[datetime.datetime] = orm.mapped_column(
+        sqlalchemy.DateTime,
+        nullable=False,
+    )
+    end: orm.Mapped[datetime.datetime] = orm.mapped_column(
+        sqlalchemy.DateTime,
+        nullable=False,
+    )
+    subject_id = orm.mapped_column(
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("subjects.id"),
+        nullable=False,
+        index=True,
+    )
+
+    subject = orm.relationship("Subject", back_populates="non_wear_intervals")
+
+
 class Day(BaseTable):
     """A class representing a day in the database.
 
@@ -236,6 +269,8 @@ class Subject(BaseTable):
     Attributes:
         is_finished: Whether the subject has finished the study or not.
         days: A list of Day objects associated with the subject.
+        non_wear_intervals: The non-wear intervals of the subject, ordered by
+            start.
     """
 
     __tablename__ = "subjects"
@@ -264,6 +299,12 @@ class Subject(BaseTable):
         back_populates="subject",
         cascade="all, delete",
     )
+    non_wear_intervals = orm.relationship(
+        "NonWearInterval",
+        back_populates="subject",
+        cascade="all, delete",
+        order_by="NonWearInterval.start",
+    )
 
     @property
     def day_of_daylight_savings_time(self) -> int | None:
@@ -7,15 +7,20 @@ from collections.abc import Iterable
 from typing import TypedDict
 
 import numpy as np
+import sqlalchemy
+from numpy import typing as npt
 from sqlalchemy import orm
 
-from actigraphy.core import config
+from actigraphy.core import config, jobs
 from actigraphy.database import models
 from actigraphy.io import ggir_files
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
 DEFAULT_SLEEP_TIME = settings.DEFAULT_SLEEP_TIME
+# Increment when `initialize_subject` stores different data, such that the
+# preprocessing ingests all subjects again, see `actigraphy.io.catalog`.
+INGEST_VERSION = 1
 
 logger = logging.getLogger(LOGGER_NAME)
 
@@ -33,23 +38,71 @@ def initialize_datapoints(
 
     """
     logger.debug("Initializing data points.")
-    window_size_ratio = ggir_metadata.m.windowsizes[1] // ggir_metadata.m.windowsizes[0]
-    non_wear_elements = np.where(ggir_metadata.m.metalong["nonwearscore"] > 1)[0]
-    non_wear_indices_in_data = [
-        element * window_size_ratio for element in non_wear_elements
-    ]
-    non_wear_indices = np.concatenate(
-        [
-            np.arange(index, index + window_size_ratio)
-            for index in non_wear_indices_in_data
-        ],
-    )
+    non_wear = _non_wear_flags(ggir_metadata).tolist()
     return [
-        _metashort_row_to_sql_datapoint(row, non_wear=index in non_wear_indices)  # type: ignore[arg-type, unused-ignore] # pre-commit mypy flags this, local mypy does not.
+        _metashort_row_to_sql_datapoint(row, non_wear=non_wear[index])  # type: ignore[arg-type, unused-ignore] # pre-commit mypy flags this, local mypy does not.
         for index, row in enumerate(ggir_metadata.m.metashort.iter_rows(named=True))
     ]
 
 
+def initialize_non_wear_intervals(
+    ggir_metadata: ggir_files.MetaData,
+) -> list[models.NonWearInterval]:
+    """Initialize the non-wear intervals for the given subject.
+
+    Args:
+        ggir_metadata: The ggir metadata of the subject.
+
+    Returns:
+        list[models.NonWearInterval]: The blocks of consecutive non-wear data
+            points, ordered by start.
+    """
+    logger.debug("Initializing non-wear intervals.")
+    timestamps = ggir_metadata.m.metashort["timestamp"]
+    return [
+        models.NonWearInterval(
+            start=_parse_utc_timestamp(timestamps[first]),
+            end=_parse_utc_timestamp(timestamps[last]),
+        )
+        for first, last in _find_runs(_non_wear_flags(ggir_metadata))
+    ]
+
+
+def backfill_non_wear_intervals(
+    session: orm.Session,
+    subject: models.Subject,
+) -> None:
+    """Derives the non-wear intervals of a subject ingested without them.
+
+    Subjects ingested before non-wear intervals were stored only have the
+    non-wear flags of their data points. Subjects that already have
+    intervals, or have no non-wear at all, are left untouched. As this reads
+    every data point, it runs once per database in the preprocessing, see
+    `actigraphy.io.preprocess`, and not when a subject is opened.
+
+    Args:
+        session: The database session.
+        subject: The subject.
+    """
+    if subject.non_wear_intervals:
+        return
+    rows = (
+        session.query(models.DataPoint.timestamp, models.DataPoint.non_wear)
+        .filter(models.DataPoint.subject_id == subject.id)
+        .order_by(models.DataPoint.timestamp, models.DataPoint.timestamp_utc_offset)
+        .all()
+    )
+    runs = _find_runs(np.fromiter((row.non_wear for row in rows), dtype=bool))
+    if not runs:
+        return
+    logger.info("Backfilling non-wear intervals of subject %s.", subject.name)
+    subject.non_wear_intervals = [
+        models.NonWearInterval(start=rows[first].timestamp, end=rows[last].timestamp)
+        for first, last in runs
+    ]
+    session.commit()
+
+
 def initialize_ms4_sleep_times(
     ggir_ms4: ggir_files.MS4,
     day: datetime.datetime,
@@ -186,6 +239,7 @@ def initialize_subject(
     ggir_metadata_file: str | pathlib.Path,
     ggir_ms4_file: str | pathlib.Path,
     session: orm.Session,
+    progress: jobs.ProgressCallback | None = None,
 ) -> models.Subject:
     """Initializes a new subject with the given identifier and ggir_files file.
 
@@ -194,6 +248,8 @@ def initialize_subject(
         ggir_metadata_file: The path to the ggir file for the new subject.
         ggir_ms4_file: The path to the ggir ms4 file for the new subject.
         session: The database session.
+        progress: Called with the fraction done and a description of each
+            step, e.g. to show the progress of a background ingest.
 
     Returns:
         models.Subject: The initialized subject object.
@@ -202,11 +258,15 @@ def initialize_subject(
         Default sleep times are set to 03:00 the next day.
         Last day is not included as it doesn't include a night.
     """
+    report = progress or _ignore_progress
     logger.debug("Initializing subject %s", identifier)
+    report(0, "Reading GGIR files.")
     ggir_metadata = ggir_files.MetaData.from_file(ggir_metadata_file)
     ggir_ms4 = ggir_files.MS4.from_file(ggir_ms4_file)
 
+    report(0.3, "Reading sleep times.")
     day_models = initialize_days(ggir_metadata, ggir_ms4)
+    report(0.4, "Reading data points.")
     data_points = initialize_datapoints(ggir_metadata)
 
     n_points_per_day = 86400 // ggir_metadata.m.windowsizes[0]
@@ -215,7 +275,9 @@ def initialize_subject(
         days=day_models,
         n_points_per_day=n_points_per_day,
         data_points=data_points,
+        non_wear_intervals=initialize_non_wear_intervals(ggir_metadata),
     )
+    report(0.7, "Saving to the database.")
     session.add_all([subject, *data_points])
     session.commit()
     return subject
@@ -309,6 +371,43 @@ def _metashort_row_to_sql_datapoint(
     )
 
 
+def _non_wear_flags(ggir_metadata: ggir_files.MetaData) -> npt.NDArray[np.bool_]:
+    """Expands the non-wear scores of the long epochs to the data points.
+
+    Args:
+        ggir_metadata: The ggir metadata of the subject.
+
+    Returns:
+        Whether each row of the metashort table is non-wear.
+    """
+    window_size_ratio = ggir_metadata.m.windowsizes[1] // ggir_metadata.m.windowsizes[0]
+    n_points = len(ggir_metadata.m.metashort)
+    non_wear = np.repeat(
+        ggir_metadata.m.metalong["nonwearscore"].to_numpy() > 1,
+        window_size_ratio,
+    )[:n_points]
+    return np.pad(non_wear, (0, n_points - non_wear.size))
+
+
+def _find_runs(flags: npt.NDArray[np.bool_]) -> list[tuple[int, int]]:
+    """Finds the first and last index of every run of True values."""
+    edges = np.flatnonzero(np.diff(flags.astype(np.int8), prepend=0, append=0))
+    return list(zip(edges[::2].tolist(), (edges[1::2] - 1).tolist(), strict=True))
+
+
+def _parse_utc_timestamp(timestamp: str) -> datetime.datetime:
+    """Parses a GGIR timestamp to a naive UTC datetime, as stored in the database."""
+    return (
+        datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S%z")
+        .astimezone(datetime.UTC)
+        .replace(tzinfo=None)
+    )
+
+
+def _ignore_progress(fraction: float, message: str) -> None:
+    """Ignores the progress of a step."""
+
+
 def _keep_last_unique_date(
     datetimes: Iterable[datetime.datetime],
 ) -> list[datetime.datetime]:
@@ -332,3 +431,51 @@ def _keep_last_unique_date(
             result.append(dt)
 
     return result
+
+
+def bin_data_points(
+    session: orm.Session,
+    subject_id: int,
+    bin_minutes: int,
+) -> list[tuple[int, float, float, bool]]:
+    """Aggregates the data points of a subject into bins of local time.
+
+    The aggregation is performed by the database, such that only one row per
+    bin is transferred.
+
+    Args:
+        session: The database session.
+        subject_id: The id of the subject.
+        bin_minutes: The width of the bins in minutes.
+
+    Returns:
+        list[tuple[int, float, float, bool]]: For each bin containing data, the
+            start of the bin in local seconds since the epoch, the mean sensor
+            angle, the mean sensor acceleration and whether any data point in
+            the bin is non-wear. Sorted by bin start.
+    """
+    logger.debug("Binning data points of subject %s.", subject_id)
+    bin_seconds = bin_minutes * 60
+    local_seconds = (
+        sqlalchemy.cast(
+            sqlalchemy.func.strftime("%s", models.DataPoint.timestamp),
+            sqlalchemy.Integer,
+        )
+        + models.DataPoint.timestamp_utc_offset
+    )
+    bin_start = (local_seconds // bin_seconds) * bin_seconds
+    rows = session.execute(
+        sqlalchemy.select(
+            bin_start,
+            sqlalchemy.func.avg(models.DataPoint.sensor_angle),
+            sqlalchemy.func.avg(models.DataPoint.sensor_acceleration),
+            sqlalchemy.func.max(models.DataPoint.non_wear),
+        )
+        .where(models.DataPoint.subject_id == subject_id)
+        .group_by(bin_start)
+        .order_by(bin_start),
+    ).all()
+    return [
+        (int(start), float(angle), float(acceleration), bool(non_wear))
+        for start, angle, acceleration, non_wear in rows
+    ]
@@ -0,0 +1,36 @@
+"""Gunicorn configuration of the production server, see `actigraphy.wsgi`.
+
+Use with `gunicorn --config python:actigraphy.gunicorn_config`. Any option
+given on the command line takes precedence.
+
+Callbacks spend most of their time in SQLite and NumPy, which release the
+GIL, so a few processes with several threads each serve more users than
+many single-threaded processes, while keeping more requests on warm caches.
+A reasonable start is one worker per two CPU cores, with 4 to 8 threads
+each; `tests/benchmark/test_benchmark_server.py` measures the throughput
+for a range of workers.
+"""
+
+from typing import Any
+
+# Gunicorn reads every global of this module as a setting, "config" is one.
+from actigraphy.core import config as actigraphy_config
+
+settings = actigraphy_config.get_settings()
+
+wsgi_app = "actigraphy.wsgi:create_server()"
+bind = settings.SERVER_BIND
+workers = settings.SERVER_WORKERS
+threads = settings.SERVER_THREADS
+worker_class = "gthread"
+timeout = settings.SERVER_TIMEOUT_SECONDS
+# Every worker imports the app itself, such that no database connections,
+# threads or cache entries are inherited from the arbiter.
+preload_app = False
+
+
+def post_worker_init(worker: Any) -> None:  # noqa: ANN401, ARG001
+    """Warms up a worker before it accepts requests."""
+    from actigraphy import wsgi  # noqa: PLC0415 # Not needed by the arbiter.
+
+    wsgi.warm_up()
@@ -0,0 +1,316 @@
+"""Catalog of the subjects of a study, maintained by the preprocessing.
+
+The catalog is a small SQLite database in the GGIR output folder with a row
+per ingested subject: the size, modification time and hash of the GGIR files
+it was ingested from, the version of the ingest, its number of days, whether
+it is finished and how long the ingest took. The preprocessing uses it to
+tell an up-to-date subject from one whose GGIR outputs were regenerated by
+comparing a single row with two `stat` calls; files are only hashed again if
+their size or modification time changed.
+"""
+
+import contextlib
+import dataclasses
+import datetime
+import hashlib
+import logging
+import os
+import pathlib
+import sqlite3
+from collections.abc import Generator
+from typing import Any
+
+from actigraphy.core import config
+from actigraphy.core import utils as core_utils
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+SQLITE_BUSY_TIMEOUT_SECONDS = settings.SQLITE_BUSY_TIMEOUT_SECONDS
+CATALOG_FILE_NAME = "catalog.sqlite"
+HASH_CHUNK_BYTES = 1024**2
+
+logger = logging.getLogger(LOGGER_NAME)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    identifier TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    metadata_file TEXT NOT NULL,
+    metadata_size INTEGER NOT NULL,
+    metadata_mtime_ns INTEGER NOT NULL,
+    metadata_sha256 TEXT NOT NULL,
+    ms4_file TEXT NOT NULL,
+    ms4_size INTEGER NOT NULL,
+    ms4_mtime_ns INTEGER NOT NULL,
+    ms4_sha256 TEXT NOT NULL,
+    ingest_version INTEGER NOT NULL,
+    n_days INTEGER NOT NULL,
+    is_finished INTEGER NOT NULL,
+    ingest_seconds REAL,
+    ingested_at TEXT NOT NULL
+)
+"""
+_COLUMNS = (
+    "identifier",
+    "directory",
+    "metadata_file",
+    "metadata_size",
+    "metadata_mtime_ns",
+    "metadata_sha256",
+    "ms4_file",
+    "ms4_size",
+    "ms4_mtime_ns",
+    "ms4_sha256",
+    "ingest_version",
+    "n_days",
+    "is_finished",
+    "ingest_seconds",
+    "ingested_at",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class SourceFile:
+    """A GGIR file a subject is ingested from.
+
+    Attributes:
+        path: The path of the file.
+        size: The size of the file in bytes.
+        mtime_ns: The modification time of the file in nanoseconds.
+        sha256: The SHA-256 hash of the content of the file.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    @classmethod
+    def from_path(
+        cls,
+        path: str | pathlib.Path,
+        previous: "SourceFile | None" = None,
+    ) -> "SourceFile":
+        """Describes a file, hashing it only if it may have changed.
+
+        Args:
+            path: The path of the file.
+            previous: The previous description of the file. If its size and
+                modification time are unchanged, its hash is reused.
+
+        Returns:
+            The description of the file.
+        """
+        stat = os.stat(path)
+        if (
+            previous is not None
+            and previous.path == str(path)
+            and previous.size == stat.st_size
+            and previous.mtime_ns == stat.st_mtime_ns
+        ):
+            return previous
+        return cls(str(path), stat.st_size, stat.st_mtime_ns, _hash_file(path))
+
+
+@dataclasses.dataclass(frozen=True)
+class CatalogEntry:
+    """A subject in the catalog.
+
+    Attributes:
+        identifier: The identifier of the subject.
+        directory: The GGIR output folder of the subject.
+        metadata: The GGIR metadata file the subject was ingested from.
+        ms4: The GGIR ms4 file the subject was ingested from.
+        ingest_version: The `INGEST_VERSION` of the ingest.
+        n_days: The number of days of the subject.
+        is_finished: Whether the review of the subject is finished.
+        ingest_seconds: The duration of the ingest, if it was timed.
+        ingested_at: When the subject was ingested or added to the catalog,
+            in ISO format.
+    """
+
+    identifier: str
+    directory: str
+    metadata: SourceFile
+    ms4: SourceFile
+    ingest_version: int
+    n_days: int
+    is_finished: bool = False
+    ingest_seconds: float | None = None
+    ingested_at: str = dataclasses.field(
+        default_factory=lambda: datetime.datetime.now(datetime.UTC).isoformat(),
+    )
+
+    def refresh(
+        self,
+        file_manager: core_utils.FileManager,
+        ingest_version: int,
+    ) -> "CatalogEntry | None":
+        """Checks whether the subject is up to date with its GGIR files.
+
+        Args:
+            file_manager: The file manager of the subject.
+            ingest_version: The current version of the ingest.
+
+        Returns:
+            The entry with the current size and modification time of its
+            files, if the subject was ingested by the current version from
+            files with the same content, otherwise None.
+        """
+        if self.ingest_version != ingest_version:
+            return None
+        try:
+            metadata = SourceFile.from_path(file_manager.metadata_file, self.metadata)
+            ms4 = SourceFile.from_path(file_manager.ms4_file, self.ms4)
+        except FileNotFoundError:
+            return None
+        if (metadata.sha256, ms4.sha256) != (self.metadata.sha256, self.ms4.sha256):
+            return None
+        return dataclasses.replace(self, metadata=metadata, ms4=ms4)
+
+
+class Catalog:
+    """The catalog of the subjects in a GGIR output folder.
+
+    Attributes:
+        path: The SQLite file of the catalog.
+    """
+
+    def __init__(self, data_dir: str | pathlib.Path) -> None:
+        """Initializes a new instance of the Catalog class.
+
+        Args:
+            data_dir: The GGIR output folder. The catalog file is created when
+                an entry is first stored.
+        """
+        self.path = pathlib.Path(data_dir) / CATALOG_FILE_NAME
+
+    def get(self, identifier: str) -> CatalogEntry | None:
+        """Returns the entry of a subject, if it is in the catalog."""
+        if not self.path.exists():
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM subjects WHERE identifier = ?",  # noqa: S608
+                (identifier,),
+            ).fetchone()
+        return _entry_from_row(row) if row is not None else None
+
+    def entries(self) -> list[CatalogEntry]:
+        """Returns all entries, sorted by identifier."""
+        if not self.path.exists():
+            return []
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM subjects ORDER BY identifier",  # noqa: S608
+            ).fetchall()
+        return [_entry_from_row(row) for row in rows]
+
+    def put(self, entry: CatalogEntry) -> None:
+        """Adds or replaces the entry of a subject."""
+        with self._connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO subjects ({', '.join(_COLUMNS)}) "  # noqa: S608
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                _entry_to_row(entry),
+            )
+
+    def set_finished(self, identifier: str, *, is_finished: bool) -> None:
+        """Updates the finished flag of a subject, if it is in the catalog."""
+        if not self.path.exists():
+            return
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE subjects SET is_finished = ? WHERE identifier = ?",
+                (is_finished, identifier),
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Generator[sqlite3.Connection, None, None]:
+        """Opens a connection in autocommit mode, creating the table if needed."""
+        connection = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+        )
+        try:
+            connection.execute(_SCHEMA)
+            yield connection
+        finally:
+            connection.close()
+
+
+def describe_subject(
+    file_manager: core_utils.FileManager,
+    ingest_version: int,
+    n_days: int,
+    *,
+    is_finished: bool = False,
+    ingest_seconds: float | None = None,
+) -> CatalogEntry:
+    """Creates the entry of a subject from its current GGIR files.
+
+    Args:
+        file_manager: The file manager of the subject.
+        ingest_version: The version of the ingest.
+        n_days: The number of days of the subject.
+        is_finished: Whether the review of the subject is finished.
+        ingest_seconds: The duration of the ingest, if it was timed.
+
+    Returns:
+        The entry of the subject.
+    """
+    return CatalogEntry(
+        identifier=file_manager.identifier,
+        directory=file_manager.base_dir,
+        metadata=SourceFile.from_path(file_manager.metadata_file),
+        ms4=SourceFile.from_path(file_manager.ms4_file),
+        ingest_version=ingest_version,
+        n_days=n_days,
+        is_finished=is_finished,
+        ingest_seconds=ingest_seconds,
+    )
+
+
+def get_catalog(subject_dir: str | pathlib.Path) -> Catalog:
+    """Returns the catalog of the output folder of a subject folder."""
+    return Catalog(pathlib.Path(subject_dir).absolute().parent)
+
+
+def _hash_file(path: str | pathlib.Path) -> str:
+    """Returns the SHA-256 hash of the content of a file."""
+    digest = hashlib.sha256()
+    with pathlib.Path(path).open("rb") as file_buffer:
+        while chunk := file_buffer.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_to_row(entry: CatalogEntry) -> tuple[Any, ...]:
+    """Flattens an entry into a row of the subjects table."""
+    return (
+        entry.identifier,
+        entry.directory,
+        *dataclasses.astuple(entry.metadata),
+        *dataclasses.astuple(entry.ms4),
+        entry.ingest_version,
+        entry.n_days,
+        entry.is_finished,
+        entry.ingest_seconds,
+        entry.ingested_at,
+    )
+
+
+def _entry_from_row(row: tuple[Any, ...]) -> CatalogEntry:
+    """Reads an entry from a row of the subjects table, see `_COLUMNS`."""
+    return CatalogEntry(
+        identifier=row[0],
+        directory=row[1],
+        metadata=SourceFile(*row[2:6]),
+        ms4=SourceFile(*row[6:10]),
+        ingest_version=row[10],
+        n_days=row[11],
+        is_finished=bool(row[12]),
+        ingest_seconds=row[13],
+        ingested_at=row[14],
+    )
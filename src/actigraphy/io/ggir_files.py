@@ -1,13 +1,16 @@
 """Functions for reading and writing minor files to a format accepted by GGIR."""
 
+import contextlib
 import csv
 import dataclasses
 import datetime
 import logging
+import os
 import pathlib
 import re
+import threading
 from collections import abc
-from typing import Any
+from typing import IO, Any
 
 import pandas as pd
 import polars as pl
@@ -140,7 +143,7 @@ def write_sleeplog(file_manager: dict[str, str]) -> None:
     )
     header = ["ID", *sleep_times]
 
-    with open(file_manager["sleeplog_file"], "w") as file_buffer:
+    with _replace_file(file_manager["sleeplog_file"]) as file_buffer:
         writer = csv.writer(file_buffer)
         writer.writerow(header)
         writer.writerow(data_line)
@@ -165,7 +168,8 @@ def write_all_sleep_times(file_manager: dict[str, str]) -> None:
             "wakeup": wakeups,
         },
     ).sort_values(by="onset")
-    csv_output.to_csv(file_manager["all_sleep_times"], index=False)
+    with _replace_file(file_manager["all_sleep_times"]) as file_buffer:
+        csv_output.to_csv(file_buffer, index=False)
 
 
 def write_data_cleaning(file_manager: dict[str, str]) -> None:
@@ -192,12 +196,36 @@ def write_data_cleaning(file_manager: dict[str, str]) -> None:
         "",
         " ".join([str(value) for value in indices]),
     ]
-    with open(file_manager["data_cleaning_file"], "w") as file_buffer:
+    with _replace_file(file_manager["data_cleaning_file"]) as file_buffer:
         writer = csv.writer(file_buffer)
         writer.writerow(header)
         writer.writerow(data)
 
 
+@contextlib.contextmanager
+def _replace_file(filepath: str | pathlib.Path) -> abc.Generator[IO[str], None, None]:
+    """Opens a file for writing that replaces the given file once complete.
+
+    Readers, and other processes exporting the same file, never see a
+    partially written file.
+
+    Args:
+        filepath: The path of the file to replace.
+
+    Yields:
+        The text buffer of the new file.
+    """
+    temporary_path = pathlib.Path(
+        f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp",
+    )
+    try:
+        with temporary_path.open("w") as file_buffer:
+            yield file_buffer
+        temporary_path.replace(filepath)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
 def _flatten(iterable_of_iterables: abc.Iterable[Any]) -> list[Any]:
     """Recursively flattens an iterable of iterables into a single list.
 
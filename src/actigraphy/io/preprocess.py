@@ -1,19 +1,40 @@
 """Module for preprocessing actigraphy data."""
 
 import argparse
+import contextlib
+import dataclasses
+import datetime
 import logging
+import os
 import pathlib
+import sqlite3
+import tempfile
+import time
+from typing import Literal
 
-from actigraphy.core import config
+from actigraphy.core import config, exceptions, jobs
 from actigraphy.core import utils as core_utils
-from actigraphy.database import database
+from actigraphy.database import crud, database
 from actigraphy.database import utils as database_utils
+from actigraphy.io import catalog
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+SQLITE_BUSY_TIMEOUT_SECONDS = settings.SQLITE_BUSY_TIMEOUT_SECONDS
 
 logger = logging.getLogger(LOGGER_NAME)
 
+# Measured on synthetic recordings of 1 to 30 second epochs: the metadata file
+# holds about 48 bytes per epoch, and an ingest peaks at about 4.6 kB per epoch,
+# mostly the ORM objects of the data points, plus a fixed overhead.
+RDATA_BYTES_PER_EPOCH = 48
+INGEST_BYTES_PER_EPOCH = 4_600
+INGEST_BASE_BYTES = 16 * 1024**2
+# Assumed when the uncompressed size of an RData file is unknown.
+RDATA_COMPRESSION_RATIO = 6
+GZIP_MAGIC = b"\x1f\x8b"
+INGEST_VERSION = database_utils.INGEST_VERSION
+
 
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
@@ -34,22 +55,25 @@ def parse_args() -> argparse.Namespace:
         help="""The identifier for the participant. If not provided, all participants
           will be processed.""",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="""Ingest participants whose GGIR output changed again, even if they
+          have annotations. Their previous databases are kept as backups.""",
+    )
     return parser.parse_args()
 
 
 def run() -> None:
     """Run the preprocessing."""
     args = parse_args()
+    subject_dirs = _find_subject_dirs(args.data_dir, args.identifier)
+    if len(subject_dirs) == 0:
+        logger.warning("No participants found, exiting.")
+        return
 
-    if not args.identifier:
-        logger.info("Processing all participants")
-        subject_dirs = tuple(args.data_dir.glob("output_*"))
-        if len(subject_dirs) == 0:
-            logger.warning("No participants found, exiting.")
-            return
-    else:
-        subject_dirs = (args.data_dir / args.identifier,)
-
+    study_catalog = catalog.Catalog(args.data_dir)
+    annotated_subjects = []
     for subject_dir in subject_dirs:
         logger.info("Processing %s", subject_dir)
 
@@ -58,27 +82,261 @@ def run() -> None:
             continue
 
         file_manager = core_utils.FileManager(subject_dir)
-        if pathlib.Path(file_manager.database).exists():
-            logger.info("Subject already processed, skipping.")
+        state = _ingest_state(file_manager, study_catalog)
+        if state == "current":
             continue
+        if state == "changed":
+            if not args.force and _is_annotated(file_manager.database):
+                logger.warning("GGIR output changed, but annotated, skipping.")
+                annotated_subjects.append(file_manager.identifier)
+                continue
+            backup = _back_up_database(file_manager.database)
+            logger.warning(
+                "GGIR output or ingest changed, creating the database again. "
+                "The previous database is kept as %s.",
+                backup,
+            )
 
-        logger.info("Creating database.")
         create_subject_database(file_manager)
         logger.info("Finished processing %s", subject_dir)
 
+    if annotated_subjects:
+        logger.warning(
+            "Not ingested again, as their annotations would be lost: %s. "
+            "Run with --force to ingest them again, keeping backups of their "
+            "databases.",
+            ", ".join(annotated_subjects),
+        )
+
 
-def create_subject_database(file_manager: core_utils.FileManager) -> None:
+def create_subject_database(
+    file_manager: core_utils.FileManager,
+    progress: jobs.ProgressCallback | None = None,
+) -> None:
     """Creates a subject database.
 
+    Args:
+        file_manager: The file manager object containing the necessary files.
+        progress: Called with the progress of the ingest, see
+            `database_utils.initialize_subject`.
+
+    Notes:
+        The database is written to a temporary file, which then replaces the
+        database of the subject, if any, see `_replace_database`. The subject
+        is added to the catalog of its output folder, see
+        `actigraphy.io.catalog`.
+    """
+    start = time.perf_counter()
+    # The files are described before they are read, such that a change
+    # during the ingest is detected by the next preprocessing.
+    entry = catalog.describe_subject(file_manager, INGEST_VERSION, n_days=0)
+    file_descriptor, temporary = tempfile.mkstemp(
+        suffix=".tmp",
+        prefix=f"{pathlib.Path(file_manager.database).name}.",
+        dir=file_manager.base_dir,
+    )
+    os.close(file_descriptor)
+    try:
+        subject_database = database.Database(temporary)
+        subject_database.create_database()
+        session = subject_database.session_factory()
+        try:
+            subject = database_utils.initialize_subject(
+                file_manager.identifier,
+                file_manager.metadata_file,
+                file_manager.ms4_file,
+                session,
+                progress,
+            )
+            n_days = len(subject.days)
+        finally:
+            session.close()
+            # Closes the connection, which writes back a write-ahead log.
+            subject_database.engine.dispose()
+        _replace_database(file_manager.database, temporary)
+    finally:
+        pathlib.Path(temporary).unlink(missing_ok=True)
+    catalog.get_catalog(file_manager.base_dir).put(
+        dataclasses.replace(
+            entry,
+            n_days=n_days,
+            ingest_seconds=time.perf_counter() - start,
+        ),
+    )
+
+
+def estimate_ingest_memory(file_manager: core_utils.FileManager) -> int:
+    """Estimates the peak memory of ingesting a subject, without reading it.
+
+    The recording length, in epochs, is estimated from the uncompressed size
+    of the metadata file, which is stored in the trailer of gzip files.
+
     Args:
         file_manager: The file manager object containing the necessary files.
 
+    Returns:
+        The estimated memory in bytes.
+    """
+    n_epochs = _uncompressed_size(file_manager.metadata_file) // RDATA_BYTES_PER_EPOCH
+    return INGEST_BASE_BYTES + n_epochs * INGEST_BYTES_PER_EPOCH
+
+
+def _uncompressed_size(filepath: str | pathlib.Path) -> int:
+    """Returns the (estimated) uncompressed size of an RData file."""
+    size = pathlib.Path(filepath).stat().st_size
+    with pathlib.Path(filepath).open("rb") as file_buffer:
+        if file_buffer.read(2) != GZIP_MAGIC:
+            return size * RDATA_COMPRESSION_RATIO
+        file_buffer.seek(-4, os.SEEK_END)
+        uncompressed_size = int.from_bytes(file_buffer.read(4), "little")
+    # The trailer holds the size modulo 4 GiB.
+    if uncompressed_size < size:
+        return size * RDATA_COMPRESSION_RATIO
+    return uncompressed_size
+
+
+def _find_subject_dirs(
+    data_dir: pathlib.Path,
+    identifier: str,
+) -> tuple[pathlib.Path, ...]:
+    """Returns the folder of a participant, or of all participants if empty."""
+    if identifier:
+        return (data_dir / identifier,)
+    logger.info("Processing all participants")
+    return tuple(data_dir.glob("output_*"))
+
+
+def _ingest_state(
+    file_manager: core_utils.FileManager,
+    study_catalog: catalog.Catalog,
+) -> Literal["missing", "current", "changed"]:
+    """Checks whether a subject has to be ingested, updating its catalog entry.
+
+    Returns:
+        "missing" if the subject has no database or its database holds no
+        subject, "current" if its database is up to date, and "changed" if its
+        GGIR output or the ingest changed since it was ingested.
+    """
+    if not pathlib.Path(file_manager.database).exists():
+        logger.info("Creating database.")
+        return "missing"
+    entry = study_catalog.get(file_manager.identifier)
+    if entry is None:
+        existing_entry = _describe_existing_subject(file_manager)
+        if existing_entry is None:
+            logger.info("Database holds no subject, creating it again.")
+            return "missing"
+        logger.info("Subject already processed, adding it to the catalog.")
+        study_catalog.put(existing_entry)
+        return "current"
+    current_entry = entry.refresh(file_manager, INGEST_VERSION)
+    if current_entry is None:
+        return "changed"
+    logger.info("Subject unchanged, skipping.")
+    if current_entry != entry:
+        study_catalog.put(current_entry)
+    return "current"
+
+
+def _describe_existing_subject(
+    file_manager: core_utils.FileManager,
+) -> catalog.CatalogEntry | None:
+    """Describes a subject that was ingested before it was cataloged.
+
+    Its database is assumed to be up to date with its current GGIR files.
+    Databases this old may predate the non-wear intervals, so those are
+    derived once here rather than whenever the subject is opened.
+
+    Returns:
+        The entry of the subject, or None if the database holds no subject,
+        e.g. because an ingest by the app failed or was interrupted.
     """
-    database.Database(file_manager.database).create_database()
     session = next(database.session_generator(file_manager.database))
-    database_utils.initialize_subject(
-        file_manager.identifier,
-        file_manager.metadata_file,
-        file_manager.ms4_file,
-        session,
+    try:
+        subject = crud.read_subject(session, file_manager.identifier)
+        database_utils.backfill_non_wear_intervals(session, subject)
+        n_days, is_finished = len(subject.days), bool(subject.is_finished)
+    except exceptions.DatabaseError:
+        return None
+    finally:
+        session.close()
+    return catalog.describe_subject(
+        file_manager,
+        INGEST_VERSION,
+        n_days=n_days,
+        is_finished=is_finished,
     )
+
+
+def _is_annotated(filepath: str) -> bool:
+    """Whether a database holds annotations, which an ingest would lose.
+
+    A database is annotated once its annotations were edited, see
+    `database.AnnotationVersions`, its subject is finished, or any of its days
+    or sleep windows was changed, which older databases only record that way.
+    """
+    with contextlib.closing(
+        sqlite3.connect(filepath, timeout=SQLITE_BUSY_TIMEOUT_SECONDS),
+    ) as connection:
+        if connection.execute("PRAGMA user_version").fetchone()[0] > 0:
+            return True
+        tables = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'",
+            )
+        }
+        queries = {
+            "subjects": "SELECT 1 FROM subjects WHERE is_finished",
+            "days": "SELECT 1 FROM days "
+            "WHERE is_missing_sleep OR is_multiple_sleep OR is_reviewed",
+            "sleep_times": "SELECT 1 FROM sleep_times "
+            "WHERE time_updated > time_created",
+        }
+        return any(
+            connection.execute(f"SELECT EXISTS ({query})").fetchone()[0]
+            for table, query in queries.items()
+            if table in tables
+        )
+
+
+def _back_up_database(filepath: str) -> str:
+    """Copies a database to a timestamped backup file, including its WAL pages.
+
+    Returns:
+        The path of the backup.
+    """
+    timestamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%dT%H%M%SZ")
+    backup = f"{filepath}.{timestamp}.bak"
+    with (
+        contextlib.closing(
+            sqlite3.connect(filepath, timeout=SQLITE_BUSY_TIMEOUT_SECONDS),
+        ) as source,
+        contextlib.closing(sqlite3.connect(backup)) as target,
+    ):
+        source.backup(target)
+    return backup
+
+
+def _replace_database(filepath: str, temporary: str) -> None:
+    """Replaces a database by a new database file.
+
+    New connections open the new database, while open connections keep reading
+    the previous one until they are closed. The previous database is switched
+    to a rollback journal first, such that its write-ahead log, if any, is not
+    applied to the new database; this fails while others have it open in
+    write-ahead logging mode.
+
+    The new database continues the annotation version of the previous one, see
+    `database.AnnotationVersions`, such that caches keyed by the version do not
+    return entries of the previous database.
+    """
+    if pathlib.Path(filepath).exists():
+        with contextlib.closing(
+            sqlite3.connect(filepath, timeout=SQLITE_BUSY_TIMEOUT_SECONDS),
+        ) as connection:
+            connection.execute("PRAGMA journal_mode=DELETE")
+            version = connection.execute("PRAGMA user_version").fetchone()[0] + 1
+        with contextlib.closing(sqlite3.connect(temporary)) as connection:
+            connection.execute(f"PRAGMA user_version = {version:d}")
+    os.replace(temporary, filepath)
@@ -0,0 +1,365 @@
+"""Module for rendering static day plots for quality control.
+
+Every day of every subject shown in the app is rendered, with its sleep
+windows and non-wear overlay, to a PNG or SVG file and a contact sheet is
+written per subject.
+Rendering requires the optional `kaleido` dependency, which drives a headless
+Chrome; if no Chrome is installed, one can be fetched with `plotly_get_chrome`.
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import html
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import pathlib
+from concurrent import futures
+
+from actigraphy.components import utils as components_utils
+from actigraphy.core import config, exceptions
+from actigraphy.core import utils as core_utils
+from actigraphy.database import crud, database, models
+from actigraphy.plotting import sensor_plots
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+N_SLIDER_STEPS = settings.N_SLIDER_STEPS
+
+logger = logging.getLogger(LOGGER_NAME)
+
+MANIFEST_FILE = "manifest.json"
+CONTACT_SHEET_FILE = "index.html"
+
+
+@dataclasses.dataclass(frozen=True)
+class RenderJob:
+    """A day to render.
+
+    Attributes:
+        database: The path to the subject's database.
+        identifier: The identifier of the subject.
+        day_index: The index of the day.
+        output_file: The path of the image to write.
+        fingerprint: A hash of everything the image depends on.
+        image_format: The image format, "png" or "svg".
+        width: The width of the image in pixels.
+        height: The height of the image in pixels.
+    """
+
+    database: str
+    identifier: str
+    day_index: int
+    output_file: str
+    fingerprint: str
+    image_format: str
+    width: int
+    height: int
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Render the day plots of preprocessed participants.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=pathlib.Path,
+        default=pathlib.Path("/data"),
+        help="Path to the data directory.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Path to the output directory. Defaults to DATA_DIR/qc_plots.",
+    )
+    parser.add_argument(
+        "--identifier",
+        type=str,
+        default="",
+        help="""The identifier for the participant. If not provided, all participants
+          will be rendered.""",
+    )
+    parser.add_argument(
+        "--format",
+        dest="image_format",
+        choices=["png", "svg"],
+        default="png",
+        help="The image format.",
+    )
+    parser.add_argument("--width", type=int, default=1600, help="Image width.")
+    parser.add_argument("--height", type=int, default=500, help="Image height.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of rendering processes.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only render days that changed since the previous run.",
+    )
+    return parser.parse_args()
+
+
+def run() -> None:
+    """Run the rendering."""
+    args = parse_args()
+    if importlib.util.find_spec("kaleido") is None:
+        msg = (
+            "Rendering requires the optional kaleido dependency, install it with "
+            "`uv sync --extra render`."
+        )
+        raise exceptions.InternalError(msg)
+
+    output_dir = args.output_dir or args.data_dir / "qc_plots"
+    if not args.identifier:
+        subject_dirs = sorted(args.data_dir.glob("output_*"))
+    else:
+        subject_dirs = [args.data_dir / args.identifier]
+
+    manifests: dict[pathlib.Path, dict[str, str]] = {}
+    jobs: list[RenderJob] = []
+    for subject_dir in subject_dirs:
+        file_manager = core_utils.FileManager(subject_dir)
+        if not pathlib.Path(file_manager.database).exists():
+            logger.warning("%s has not been preprocessed, skipping.", subject_dir)
+            continue
+        subject_output_dir = output_dir / file_manager.identifier
+        subject_jobs = plan_subject(
+            file_manager.database,
+            file_manager.identifier,
+            subject_output_dir,
+            args.image_format,
+            (args.width, args.height),
+        )
+        manifests[subject_output_dir] = (
+            read_manifest(subject_output_dir) if args.incremental else {}
+        )
+        jobs.extend(pending_jobs(subject_jobs, manifests[subject_output_dir]))
+
+    logger.info("Rendering %s days with %s processes.", len(jobs), args.workers)
+    with futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        future_to_job = {executor.submit(render_day, job): job for job in jobs}
+        for future in futures.as_completed(future_to_job):
+            job = future_to_job[future]
+            try:
+                future.result()
+            except Exception:
+                logger.exception("Could not render day %s of %s.", *_describe(job))
+                continue
+            subject_output_dir = pathlib.Path(job.output_file).parent
+            manifests[subject_output_dir][str(job.day_index)] = job.fingerprint
+
+    for subject_output_dir, manifest in manifests.items():
+        write_manifest(subject_output_dir, manifest)
+        write_contact_sheet(subject_output_dir)
+
+
+def plan_subject(
+    database_path: str,
+    identifier: str,
+    output_dir: pathlib.Path,
+    image_format: str,
+    size: tuple[int, int],
+) -> list[RenderJob]:
+    """Creates the render jobs of the days of a subject shown in the app.
+
+    Args:
+        database_path: The path to the subject's database.
+        identifier: The identifier of the subject.
+        output_dir: The directory to write the subject's images to.
+        image_format: The image format.
+        size: The width and height of the images.
+
+    Returns:
+        list[RenderJob]: One job per day. The last day is skipped, as the app
+            does not show it: it only holds the morning of the last night.
+    """
+    session = next(database.session_generator(database_path))
+    subject = crud.read_subject(session, identifier)
+    return [
+        RenderJob(
+            database=database_path,
+            identifier=identifier,
+            day_index=day_index,
+            output_file=str(
+                output_dir / f"day_{day_index + 1:03d}_{day.date}.{image_format}",
+            ),
+            fingerprint=_fingerprint(subject, day, image_format, size),
+            image_format=image_format,
+            width=size[0],
+            height=size[1],
+        )
+        for day_index, day in enumerate(subject.days[:-1])
+    ]
+
+
+def pending_jobs(jobs: list[RenderJob], manifest: dict[str, str]) -> list[RenderJob]:
+    """Filters the jobs whose image is missing or outdated.
+
+    Args:
+        jobs: The render jobs.
+        manifest: The fingerprints of the previous run by day index.
+
+    Returns:
+        list[RenderJob]: The jobs that must be rendered.
+    """
+    return [
+        job
+        for job in jobs
+        if manifest.get(str(job.day_index)) != job.fingerprint
+        or not pathlib.Path(job.output_file).exists()
+    ]
+
+
+def render_day(job: RenderJob) -> None:
+    """Renders a day to an image. Runs in a worker process.
+
+    Args:
+        job: The day to render.
+    """
+    logger.debug("Rendering day %s of %s.", *_describe(job))
+    night = components_utils.get_nights_data(
+        [job.day_index],
+        job.database,
+        job.identifier,
+    )[0]
+    if not night.timestamps:
+        msg = f"No data for day {job.day_index + 1} of {job.identifier}."
+        raise exceptions.DatabaseError(msg)
+
+    figure, max_measurements = sensor_plots.build_sensor_plot(
+        night.timestamps,
+        night.sensor_angle,
+        night.sensor_acceleration,
+        f"{job.identifier} - Day {job.day_index + 1}: {night.day.date:%A, %d %B %Y}",
+        non_wear_blocks=night.non_wear_blocks,
+    )
+    figure = sensor_plots.add_overlays(
+        figure,
+        [
+            sensor_plots.non_wear_overlay(
+                night.timestamps,
+                night.non_wear_blocks,
+                max_measurements,
+            ),
+        ],
+    )
+    daylight_savings_shift = components_utils.daylight_savings_shift(
+        night.utc_offsets,
+    )
+    for points in components_utils.sleep_window_points(
+        night.day,
+        daylight_savings_shift,
+    ):
+        figure = sensor_plots.add_rectangle(
+            figure,
+            [point / N_SLIDER_STEPS for point in points],
+            "red",
+            "sleep window",
+        )
+
+    pathlib.Path(job.output_file).parent.mkdir(parents=True, exist_ok=True)
+    figure.write_image(
+        job.output_file,
+        format=job.image_format,
+        width=job.width,
+        height=job.height,
+    )
+
+
+def read_manifest(output_dir: pathlib.Path) -> dict[str, str]:
+    """Reads the fingerprints of the previous run, if any."""
+    manifest_file = output_dir / MANIFEST_FILE
+    if not manifest_file.exists():
+        return {}
+    with manifest_file.open(encoding="utf-8") as file_buffer:
+        manifest: dict[str, str] = json.load(file_buffer)
+    return manifest
+
+
+def write_manifest(output_dir: pathlib.Path, manifest: dict[str, str]) -> None:
+    """Writes the fingerprints of the rendered days."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with (output_dir / MANIFEST_FILE).open("w", encoding="utf-8") as file_buffer:
+        json.dump(manifest, file_buffer, indent=2, sort_keys=True)
+
+
+def write_contact_sheet(output_dir: pathlib.Path) -> None:
+    """Writes an HTML page showing all rendered days of a subject in a grid.
+
+    Args:
+        output_dir: The directory containing the subject's images.
+    """
+    images = sorted(
+        itertools.chain(output_dir.glob("day_*.png"), output_dir.glob("day_*.svg")),
+    )
+    figures = "\n".join(
+        f'<figure><a href="{html.escape(image.name)}">'
+        f'<img src="{html.escape(image.name)}" loading="lazy"></a>'
+        f"<figcaption>{html.escape(image.stem)}</figcaption></figure>"
+        for image in images
+    )
+    contact_sheet = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(output_dir.name)}</title>
+<style>
+body {{ font-family: sans-serif; }}
+main {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem; }}
+figure {{ margin: 0; }}
+img {{ width: 100%; border: 1px solid #ccc; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(output_dir.name)}</h1>
+<main>
+{figures}
+</main>
+</body>
+</html>
+"""
+    (output_dir / CONTACT_SHEET_FILE).write_text(contact_sheet, encoding="utf-8")
+
+
+def _fingerprint(
+    subject: models.Subject,
+    day: models.Day,
+    image_format: str,
+    size: tuple[int, int],
+) -> str:
+    """Hashes everything the image of a day depends on.
+
+    The subject's id and creation time identify the ingested data, the sleep
+    times identify the annotations.
+    """
+    content = [
+        subject.id,
+        str(subject.time_created),
+        str(day.date),
+        [
+            [
+                str(sleep_time.onset),
+                sleep_time.onset_utc_offset,
+                str(sleep_time.wakeup),
+                sleep_time.wakeup_utc_offset,
+            ]
+            for sleep_time in day.sleep_times
+        ],
+        image_format,
+        size,
+    ]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def _describe(job: RenderJob) -> tuple[int, str]:
+    """Returns the 1-indexed day and the subject of a job for logging."""
+    return job.day_index + 1, job.identifier
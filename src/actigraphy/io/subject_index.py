@@ -0,0 +1,322 @@
+"""Index of the subjects in a GGIR output folder, for the subject picker.
+
+Scanning tens of thousands of subject folders on network storage takes
+minutes, so the index is stored in the output folder and loaded at startup.
+It is refreshed in the background when it is searched and older than
+`SUBJECT_INDEX_REFRESH_SECONDS`: the output folder is listed once, new subject
+folders are scanned and the status of a subject is only read again if its
+database changed. The app updates the entry of a subject as soon as it changes
+it, e.g. when an ingest starts or the subject is marked as finished.
+"""
+
+import dataclasses
+import json
+import logging
+import math
+import os
+import pathlib
+import threading
+import time
+from typing import Literal
+
+from actigraphy.core import background, config, exceptions, jobs
+from actigraphy.database import crud, database, models
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+SUBJECT_INDEX_REFRESH_SECONDS = settings.SUBJECT_INDEX_REFRESH_SECONDS
+SUBJECT_PAGE_SIZE = settings.SUBJECT_PAGE_SIZE
+INDEX_FILE_NAME = ".subject_index.json"
+INDEX_FILE_VERSION = 1
+
+logger = logging.getLogger(LOGGER_NAME)
+
+SubjectStatus = Literal[
+    "unknown",
+    "new",
+    "ingesting",
+    "ingested",
+    "in progress",
+    "finished",
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class SubjectEntry:
+    """A subject in the index.
+
+    Attributes:
+        identifier: The identifier of the subject.
+        directory: The GGIR output folder of the subject.
+        metadata_file: The GGIR metadata file, if the folder was scanned.
+        status: Whether the subject is new, being ingested, ingested, being
+            reviewed or finished. Unknown until the folder was scanned.
+        database_mtime: The modification time of the database when the
+            status was read, if it exists.
+    """
+
+    identifier: str
+    directory: str
+    metadata_file: str | None = None
+    status: SubjectStatus = "unknown"
+    database_mtime: float | None = None
+
+
+class SubjectIndex:
+    """A cached index of the subjects in a GGIR output folder.
+
+    Attributes:
+        data_dir: The GGIR output folder.
+        index_file: The file the index is stored in.
+    """
+
+    def __init__(self, data_dir: str | pathlib.Path) -> None:
+        """Initializes the index from its file or, if there is none, a listing.
+
+        Args:
+            data_dir: The GGIR output folder.
+        """
+        self.data_dir = pathlib.Path(data_dir)
+        self.index_file = self.data_dir / INDEX_FILE_NAME
+        self._entries: dict[str, SubjectEntry] = {}
+        self._sorted: list[SubjectEntry] = []
+        self._refreshed_at = -math.inf
+        self._lock = threading.Lock()
+        self._refreshes = background.SerialQueue()
+        if not self._load():
+            self._set_entries(
+                [
+                    SubjectEntry(_identifier(directory), directory)
+                    for directory in _list_subject_directories(self.data_dir)
+                ],
+            )
+
+    def __len__(self) -> int:
+        """Returns the number of subjects."""
+        return len(self._sorted)
+
+    def search(
+        self,
+        query: str = "",
+        limit: int | None = None,
+    ) -> tuple[list[SubjectEntry], int]:
+        """Returns the first subjects whose identifier contains the query.
+
+        Schedules a refresh if the index is older than
+        `SUBJECT_INDEX_REFRESH_SECONDS`.
+
+        Args:
+            query: Case-insensitive text to search for in the identifiers.
+            limit: The largest number of subjects returned, defaults to
+                `SUBJECT_PAGE_SIZE`.
+
+        Returns:
+            The first matching subjects, sorted by identifier, and the number
+            of subjects that match the query.
+        """
+        if time.monotonic() - self._refreshed_at > SUBJECT_INDEX_REFRESH_SECONDS:
+            self._refreshes.submit("refresh", self.refresh)
+        limit = limit or SUBJECT_PAGE_SIZE
+        query = query.casefold()
+        with self._lock:
+            entries = self._sorted
+        matches = [entry for entry in entries if query in entry.identifier.casefold()]
+        return matches[:limit], len(matches)
+
+    def get(self, directory: str) -> SubjectEntry | None:
+        """Returns the entry of a subject folder, if it is indexed."""
+        with self._lock:
+            return self._entries.get(directory)
+
+    def update(self, directory: str) -> SubjectEntry:
+        """Reads the status of a subject again, e.g. after it was changed.
+
+        Args:
+            directory: The GGIR output folder of the subject.
+
+        Returns:
+            The updated entry.
+        """
+        entry = self.get(directory) or SubjectEntry(_identifier(directory), directory)
+        entry = _scan(dataclasses.replace(entry, database_mtime=None))
+        with self._lock:
+            self._entries[directory] = entry
+            self._sorted = sorted(self._entries.values(), key=_sort_key)
+        return entry
+
+    def refresh(self) -> None:
+        """Adds new subject folders, removes deleted ones and updates statuses."""
+        logger.info("Refreshing the subject index of %s.", self.data_dir)
+        with self._lock:
+            previous = dict(self._entries)
+        entries = [
+            _scan(
+                previous.get(directory)
+                or SubjectEntry(_identifier(directory), directory),
+            )
+            for directory in _list_subject_directories(self.data_dir)
+        ]
+        self._set_entries(entries)
+        self._refreshed_at = time.monotonic()
+        self._save()
+
+    def join(self) -> None:
+        """Waits until scheduled refreshes have finished."""
+        self._refreshes.join()
+
+    def _set_entries(self, entries: list[SubjectEntry]) -> None:
+        """Replaces the entries of the index."""
+        sorted_entries = sorted(entries, key=_sort_key)
+        with self._lock:
+            self._entries = {entry.directory: entry for entry in sorted_entries}
+            self._sorted = sorted_entries
+
+    def _load(self) -> bool:
+        """Loads the index from its file, returns whether it was loaded."""
+        try:
+            stored = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError):
+            logger.warning("Could not read %s, scanning again.", self.index_file)
+            return False
+        if stored.get("version") != INDEX_FILE_VERSION:
+            return False
+        self._set_entries([SubjectEntry(**entry) for entry in stored["entries"]])
+        return True
+
+    def _save(self) -> None:
+        """Stores the index in its file, if the output folder is writable."""
+        with self._lock:
+            entries = [dataclasses.asdict(entry) for entry in self._sorted]
+        temporary = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            temporary.write_text(
+                json.dumps({"version": INDEX_FILE_VERSION, "entries": entries}),
+                encoding="utf-8",
+            )
+            temporary.replace(self.index_file)
+        except OSError:
+            logger.warning("Could not write %s.", self.index_file)
+
+
+_indexes: dict[pathlib.Path, SubjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(data_dir: str | pathlib.Path) -> SubjectIndex:
+    """Returns the index of a GGIR output folder, shared within the process."""
+    data_dir = pathlib.Path(data_dir).absolute()
+    with _indexes_lock:
+        if data_dir not in _indexes:
+            _indexes[data_dir] = SubjectIndex(data_dir)
+        return _indexes[data_dir]
+
+
+def get_entry(directory: str) -> SubjectEntry | None:
+    """Returns the entry of a subject folder, if its index is loaded."""
+    index = _loaded_index(directory)
+    return index.get(directory) if index is not None else None
+
+
+def update_subject(directory: str) -> None:
+    """Updates the entry of a subject folder in its index, if it is loaded."""
+    index = _loaded_index(directory)
+    if index is not None:
+        index.update(directory)
+
+
+def _loaded_index(directory: str) -> SubjectIndex | None:
+    """Returns the loaded index of the output folder of a subject folder."""
+    data_dir = pathlib.Path(directory).absolute().parent
+    with _indexes_lock:
+        return _indexes.get(data_dir)
+
+
+def _list_subject_directories(data_dir: pathlib.Path) -> list[str]:
+    """Lists the subject folders with a single directory listing."""
+    with os.scandir(data_dir) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.name.startswith("output_") and entry.is_dir()
+        ]
+
+
+def _sort_key(entry: SubjectEntry) -> str:
+    """Sorts entries by identifier."""
+    return entry.identifier
+
+
+def _identifier(directory: str) -> str:
+    """Returns the identifier of a subject folder, see `FileManager`."""
+    return directory.rsplit("_", maxsplit=1)[-1]
+
+
+def _scan(entry: SubjectEntry) -> SubjectEntry:
+    """Finds the metadata file of a subject, if needed, and reads its status.
+
+    The status is only read from the database if it changed since the entry
+    was scanned. In write-ahead logging mode, changes are written to a
+    separate file first, so both files are checked.
+    """
+    metadata_file = entry.metadata_file or _find_metadata_file(entry.directory)
+    database_file = os.path.join(entry.directory, "actigraphy.sqlite")
+    job = jobs.ingests.get(database_file)
+    if job is not None and job.is_active:
+        return dataclasses.replace(
+            entry,
+            metadata_file=metadata_file,
+            status="ingesting",
+            database_mtime=None,
+        )
+
+    database_mtime = max(
+        (
+            os.stat(path).st_mtime
+            for path in (database_file, f"{database_file}-wal")
+            if os.path.exists(path)
+        ),
+        default=None,
+    )
+    if database_mtime is not None and database_mtime == entry.database_mtime:
+        return dataclasses.replace(entry, metadata_file=metadata_file)
+    status = "new" if database_mtime is None else _read_status(entry, database_file)
+    return dataclasses.replace(
+        entry,
+        metadata_file=metadata_file,
+        status=status,
+        database_mtime=database_mtime,
+    )
+
+
+def _find_metadata_file(directory: str) -> str | None:
+    """Returns the GGIR metadata file of a subject folder, if any."""
+    metadata_dir = os.path.join(directory, "meta", "basic")
+    try:
+        with os.scandir(metadata_dir) as entries:
+            return next(
+                (entry.path for entry in entries if entry.name.startswith("meta_")),
+                None,
+            )
+    except FileNotFoundError:
+        return None
+
+
+def _read_status(entry: SubjectEntry, database_file: str) -> SubjectStatus:
+    """Reads the review status of an ingested subject from its database."""
+    session = next(database.session_generator(database_file))
+    try:
+        subject = crud.read_subject(session, entry.identifier)
+        if subject.is_finished:
+            return "finished"
+        is_reviewed = (
+            session.query(models.Day.id)
+            .filter(models.Day.subject_id == subject.id, models.Day.is_reviewed)
+            .first()
+        )
+    except exceptions.DatabaseError:
+        return "new"
+    finally:
+        session.close()
+    return "in progress" if is_reviewed else "ingested"
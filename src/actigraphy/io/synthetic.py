@@ -0,0 +1,569 @@
+"""Module for generating synthetic GGIR output for scale testing.
+
+Writes `output_<identifier>` directories with the GGIR files read by the
+preprocessing, i.e. `meta/basic/meta_<identifier>.gt3x.RData` and
+`meta/ms4.out/<identifier>.gt3x.RData`. Every subject sleeps once per night,
+takes the device off for a configurable fraction of the recording and may
+cross a daylight savings transition. A study is reproducible from its seed,
+independent of the number of worker processes.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import gzip
+import logging
+import os
+import pathlib
+import struct
+from collections.abc import Iterator
+from concurrent import futures
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+from actigraphy.core import config, exceptions
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+METALONG_EPOCH_SECONDS = 900
+STANDARD_UTC_OFFSET = -5 * 60 * 60
+DAYLIGHT_SAVINGS_SHIFT = 60 * 60
+TRANSITIONS = ("none", "spring", "fall")
+NON_WEAR_SCORE = 3
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclasses.dataclass(frozen=True)
+class SubjectSpec:
+    """The parameters of a synthetic subject.
+
+    Attributes:
+        identifier: The identifier of the subject.
+        start: The local start time of the recording.
+        n_days: The length of the recording in days.
+        epoch_seconds: The epoch length of the data points in seconds.
+        non_wear_fraction: The approximate fraction of the recording without
+            the device worn.
+        transition: The daylight savings transition during the recording,
+            "none", "spring" or "fall".
+        transition_day: The day of the recording on whose 02:00 the
+            transition takes place.
+        seed: The seed of the subject's random number generator.
+    """
+
+    identifier: str
+    start: datetime.datetime
+    n_days: int
+    epoch_seconds: int
+    non_wear_fraction: float
+    transition: str
+    transition_day: int
+    seed: tuple[int, int]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic study of GGIR output directories.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        required=True,
+        help="The directory to write the subject directories to.",
+    )
+    parser.add_argument("--subjects", type=int, default=10, help="Number of subjects.")
+    parser.add_argument("--days", type=int, default=7, help="Days per recording.")
+    parser.add_argument(
+        "--epoch-seconds",
+        type=int,
+        default=5,
+        help=f"Epoch length in seconds, must divide {METALONG_EPOCH_SECONDS}.",
+    )
+    parser.add_argument(
+        "--non-wear-fraction",
+        type=float,
+        default=0.05,
+        help="Approximate fraction of each recording without the device worn.",
+    )
+    parser.add_argument(
+        "--dst-fraction",
+        type=float,
+        default=0.2,
+        help="Fraction of subjects whose recording crosses a daylight savings "
+        "transition.",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=datetime.date.fromisoformat,
+        default=datetime.date(2023, 3, 1),
+        help="The earliest start date of the recordings.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the study.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of processes writing subjects.",
+    )
+    return parser.parse_args()
+
+
+def run() -> None:
+    """Run the generator."""
+    args = parse_args()
+    if METALONG_EPOCH_SECONDS % args.epoch_seconds:
+        msg = f"The epoch length must divide {METALONG_EPOCH_SECONDS} seconds."
+        raise exceptions.InternalError(msg)
+
+    specs = plan_study(
+        n_subjects=args.subjects,
+        n_days=args.days,
+        epoch_seconds=args.epoch_seconds,
+        non_wear_fraction=args.non_wear_fraction,
+        dst_fraction=args.dst_fraction,
+        start_date=args.start_date,
+        seed=args.seed,
+    )
+    logger.info("Writing %s subjects with %s processes.", len(specs), args.workers)
+    with futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for subject_dir in executor.map(
+            write_subject,
+            specs,
+            [args.output_dir] * len(specs),
+            chunksize=4,
+        ):
+            logger.debug("Wrote %s.", subject_dir)
+    logger.info("Finished writing %s.", args.output_dir)
+
+
+def plan_study(  # noqa: PLR0913
+    n_subjects: int,
+    n_days: int,
+    epoch_seconds: int,
+    non_wear_fraction: float,
+    dst_fraction: float,
+    start_date: datetime.date,
+    seed: int,
+) -> list[SubjectSpec]:
+    """Draws the parameters of every subject of a study.
+
+    Recordings start between 09:00 and 17:00 within four weeks of the start
+    date. Subjects crossing a daylight savings transition are split evenly
+    between spring and fall transitions.
+
+    Args:
+        n_subjects: The number of subjects.
+        n_days: The length of the recordings in days.
+        epoch_seconds: The epoch length of the data points in seconds.
+        non_wear_fraction: The approximate fraction of each recording without
+            the device worn.
+        dst_fraction: The fraction of subjects crossing a transition.
+        start_date: The earliest start date of the recordings.
+        seed: The seed of the study.
+
+    Returns:
+        list[SubjectSpec]: The subjects.
+    """
+    generator = np.random.default_rng(seed)
+    n_digits = max(len(str(n_subjects)), 3)
+    specs = []
+    for index in range(n_subjects):
+        start = datetime.datetime.combine(
+            start_date + datetime.timedelta(days=int(generator.integers(28))),
+            datetime.time(hour=int(generator.integers(9, 17))),
+        )
+        transition = "none"
+        if n_days > 1 and generator.random() < dst_fraction:
+            transition = TRANSITIONS[1 + int(generator.integers(2))]
+        specs.append(
+            SubjectSpec(
+                identifier=f"sub{index + 1:0{n_digits}d}",
+                start=start,
+                n_days=n_days,
+                epoch_seconds=epoch_seconds,
+                non_wear_fraction=non_wear_fraction,
+                transition=transition,
+                transition_day=int(generator.integers(1, max(n_days, 2))),
+                seed=(seed, index),
+            ),
+        )
+    return specs
+
+
+def write_subject(spec: SubjectSpec, output_dir: pathlib.Path) -> pathlib.Path:
+    """Generates a subject and writes its GGIR files. Runs in a worker process.
+
+    Args:
+        spec: The subject to generate.
+        output_dir: The directory of the study.
+
+    Returns:
+        pathlib.Path: The subject's directory.
+    """
+    metadata, night_summary = generate_subject(spec)
+    subject_dir = output_dir / f"output_{spec.identifier}"
+    metadata_file = (
+        subject_dir / "meta" / "basic" / f"meta_{spec.identifier}.gt3x.RData"
+    )
+    ms4_file = subject_dir / "meta" / "ms4.out" / f"{spec.identifier}.gt3x.RData"
+    for file in (metadata_file, ms4_file):
+        file.parent.mkdir(parents=True, exist_ok=True)
+    write_rdata(metadata_file, {"M": metadata})
+    write_rdata(ms4_file, {"nightsummary": night_summary})
+    return subject_dir
+
+
+def generate_subject(spec: SubjectSpec) -> tuple[dict[str, Any], pd.DataFrame]:
+    """Generates the GGIR metadata and night summary of a subject.
+
+    Args:
+        spec: The subject to generate.
+
+    Returns:
+        The `M` object of the GGIR metadata file and the `nightsummary` of the
+        GGIR ms4 file.
+    """
+    generator = np.random.default_rng(spec.seed)
+    n_points = spec.n_days * _SECONDS_PER_DAY // spec.epoch_seconds
+    ratio = METALONG_EPOCH_SECONDS // spec.epoch_seconds
+    n_long = n_points // ratio
+
+    # Local seconds since the midnight preceding the recording.
+    midnight = spec.start.replace(hour=0)
+    utc_offsets = _utc_offsets(spec, n_points)
+    local_seconds = (
+        int((spec.start - midnight).total_seconds())
+        + np.arange(n_points, dtype=np.int64) * spec.epoch_seconds
+        + utc_offsets
+        - utc_offsets[0]
+    )
+    onsets, wakeups = _sleep_windows(generator, spec.n_days)
+    night = np.searchsorted(onsets, local_seconds, side="right") - 1
+    asleep = (night >= 0) & (local_seconds < wakeups[np.maximum(night, 0)])
+
+    non_wear_long = _non_wear_blocks(generator, n_long, spec.non_wear_fraction)
+    non_wear = np.repeat(non_wear_long, ratio)
+    non_wear = np.concatenate(
+        (non_wear, np.zeros(n_points - non_wear.size, dtype=bool)),
+    )
+    sensor_angle, sensor_acceleration = _sensor_signals(generator, asleep, non_wear)
+
+    non_wear_score = np.where(
+        non_wear_long,
+        NON_WEAR_SCORE,
+        (generator.random(n_long) < 0.1).astype(np.int64),  # noqa: PLR2004
+    )
+    timestamps = _format_timestamps(midnight, local_seconds, utc_offsets)
+    metadata = {
+        "metalong": pd.DataFrame(
+            {
+                "timestamp": timestamps[: n_long * ratio : ratio],
+                "nonwearscore": non_wear_score.astype(np.float64),
+                "clippingscore": np.zeros(n_long),
+                "EN": generator.gamma(2, 0.5, n_long) + 1,
+            },
+        ),
+        "metashort": pd.DataFrame(
+            {
+                "timestamp": timestamps,
+                "anglez": sensor_angle,
+                "ENMO": sensor_acceleration,
+            },
+        ),
+        "windowsizes": np.array(
+            [spec.epoch_seconds, METALONG_EPOCH_SECONDS, 3600],
+            dtype=np.float64,
+        ),
+    }
+    return metadata, _night_summary(spec, generator, onsets, wakeups, non_wear)
+
+
+def write_rdata(filepath: pathlib.Path, objects: dict[str, Any]) -> None:
+    """Writes objects to a gzip compressed RData file, as R's `save` does.
+
+    Supports (nested) dictionaries, which are written as named lists, pandas
+    data frames and one dimensional arrays of floats, integers, booleans and
+    ASCII strings. Arrays of equally long strings, such as timestamps, are
+    serialized without a Python loop, which makes this considerably faster
+    than the `rdata` package for the large GGIR files.
+
+    Args:
+        filepath: The path of the file.
+        objects: The objects by name.
+    """
+    with gzip.open(filepath, "wb", compresslevel=6) as file_buffer:
+        file_buffer.write(b"RDX3\nX\n")
+        file_buffer.write(struct.pack(">iii", 3, 0x040300, 0x030500))
+        file_buffer.write(struct.pack(">i", 5) + b"UTF-8")
+        for chunk in _serialize_pairlist(objects):
+            file_buffer.write(chunk)
+
+
+def _utc_offsets(spec: SubjectSpec, n_points: int) -> npt.NDArray[np.int64]:
+    """Returns the UTC offset of every data point in seconds."""
+    before, after = {
+        "none": (STANDARD_UTC_OFFSET, STANDARD_UTC_OFFSET),
+        "spring": (STANDARD_UTC_OFFSET, STANDARD_UTC_OFFSET + DAYLIGHT_SAVINGS_SHIFT),
+        "fall": (STANDARD_UTC_OFFSET + DAYLIGHT_SAVINGS_SHIFT, STANDARD_UTC_OFFSET),
+    }[spec.transition]
+    midnight = spec.start.replace(hour=0)
+    switch = midnight + datetime.timedelta(days=spec.transition_day, hours=2)
+    switch_index = -(-int((switch - spec.start).total_seconds()) // spec.epoch_seconds)
+    utc_offsets = np.full(n_points, before, dtype=np.int64)
+    utc_offsets[max(switch_index, 0) :] = after
+    return utc_offsets
+
+
+def _sleep_windows(
+    generator: np.random.Generator,
+    n_days: int,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Draws a night's sleep for every day of the recording.
+
+    Returns:
+        The onsets and wakeups in local seconds since the midnight preceding
+        the recording.
+    """
+    days = np.arange(n_days, dtype=np.int64) * _SECONDS_PER_DAY
+    onsets = days + (generator.normal(23, 0.75, n_days) * 3600).astype(np.int64)
+    durations = np.clip(generator.normal(7.5, 0.75, n_days), 4, 10) * 3600
+    return onsets, onsets + durations.astype(np.int64)
+
+
+def _non_wear_blocks(
+    generator: np.random.Generator,
+    n_long: int,
+    fraction: float,
+) -> npt.NDArray[np.bool_]:
+    """Draws blocks of half an hour to four hours without the device worn."""
+    non_wear = np.zeros(n_long, dtype=bool)
+    target = int(fraction * n_long)
+    while non_wear.sum() < target:
+        start = int(generator.integers(n_long))
+        non_wear[start : start + int(generator.integers(2, 17))] = True
+    return non_wear
+
+
+def _sensor_signals(
+    generator: np.random.Generator,
+    asleep: npt.NDArray[np.bool_],
+    non_wear: npt.NDArray[np.bool_],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Simulates the sensor's angle and arm movement.
+
+    While awake the angle varies quickly and the arm moves; while asleep the
+    angle only changes with the occasional change of posture and the arm
+    rarely moves; without the device worn both are flat.
+    """
+    n_points = asleep.size
+    awake_angle = np.convolve(generator.normal(0, 35, n_points), np.ones(5) / 5, "same")
+    posture_changes = np.cumsum(generator.random(n_points) < 1 / 480)
+    postures = generator.uniform(-80, 40, posture_changes[-1] + 1)
+    asleep_angle = postures[posture_changes] + generator.normal(0, 2, n_points)
+    off_angle = generator.uniform(-90, 90) + generator.normal(0, 0.1, n_points)
+    sensor_angle = np.select(
+        [non_wear, asleep],
+        [off_angle, asleep_angle],
+        awake_angle,
+    ).clip(-90, 90)
+
+    awake_movement = generator.gamma(0.8, 0.04, n_points)
+    asleep_movement = generator.exponential(0.002, n_points) * (
+        generator.random(n_points) < 0.05  # noqa: PLR2004
+    )
+    sensor_acceleration = np.select(
+        [non_wear, asleep],
+        [np.zeros(n_points), asleep_movement],
+        awake_movement,
+    )
+    return sensor_angle.round(4), sensor_acceleration.round(4)
+
+
+def _format_timestamps(
+    midnight: datetime.datetime,
+    local_seconds: npt.NDArray[np.int64],
+    utc_offsets: npt.NDArray[np.int64],
+) -> npt.NDArray[np.str_]:
+    """Formats local times as GGIR timestamps, e.g. 2023-03-11T12:00:00-0500."""
+    local = np.datetime64(midnight, "s") + local_seconds.astype("timedelta64[s]")
+    offsets, inverse = np.unique(utc_offsets, return_inverse=True)
+    suffixes = np.array(
+        [
+            f"{'-' if offset < 0 else '+'}{abs(offset) // 3600:02d}"
+            f"{abs(offset) % 3600 // 60:02d}"
+            for offset in offsets.tolist()
+        ],
+    )
+    return np.char.add(np.datetime_as_string(local, unit="s"), suffixes[inverse])
+
+
+def _night_summary(
+    spec: SubjectSpec,
+    generator: np.random.Generator,
+    onsets: npt.NDArray[np.int64],
+    wakeups: npt.NDArray[np.int64],
+    non_wear: npt.NDArray[np.bool_],
+) -> pd.DataFrame:
+    """Summarizes the nights that GGIR would detect.
+
+    Nights that end after the recording, that start before it, that are
+    mostly without the device worn or, at random, one in twenty nights are
+    left out, such that the preprocessing falls back to its default sleep
+    times.
+    """
+    midnight = spec.start.replace(hour=0)
+    recording_start = (spec.start - midnight).total_seconds()
+    rows = []
+    for night, (onset, wakeup) in enumerate(
+        zip(onsets.tolist(), wakeups.tolist(), strict=True),
+    ):
+        first = int((onset - recording_start) // spec.epoch_seconds)
+        last = int((wakeup - recording_start) // spec.epoch_seconds)
+        if first < 0 or last >= non_wear.size:
+            continue
+        if non_wear[first:last].mean() > 0.5 or generator.random() < 0.05:  # noqa: PLR2004
+            continue
+        date = midnight + datetime.timedelta(days=night)
+        rows.append(
+            {
+                "ID": spec.identifier,
+                "night": float(night + 1),
+                "sleeponset": (onset - night * _SECONDS_PER_DAY) / 3600,
+                "wakeup": (wakeup - night * _SECONDS_PER_DAY) / 3600,
+                "SptDuration": (wakeup - onset) / 3600,
+                "guider": "HDCZA",
+                "sleeponset_ts": _clock_time(onset),
+                "wakeup_ts": _clock_time(wakeup),
+                "calendar_date": f"{date.day}/{date.month}/{date.year}",
+                "weekday": f"{date:%A}",
+            },
+        )
+    columns = {key: [row[key] for row in rows] for key in _NIGHT_SUMMARY_COLUMNS}
+    return pd.DataFrame(
+        {
+            key: np.asarray(values, dtype=np.float64 if key in _FLOAT_COLUMNS else str)
+            for key, values in columns.items()
+        },
+    )
+
+
+_NIGHT_SUMMARY_COLUMNS = (
+    "ID",
+    "night",
+    "sleeponset",
+    "wakeup",
+    "SptDuration",
+    "guider",
+    "sleeponset_ts",
+    "wakeup_ts",
+    "calendar_date",
+    "weekday",
+)
+_FLOAT_COLUMNS = {"night", "sleeponset", "wakeup", "SptDuration"}
+
+
+def _clock_time(seconds: int) -> str:
+    """Formats local seconds as the time of day, e.g. 23:05:00."""
+    seconds = int(seconds) % _SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+# R's serialization format, see R's src/main/serialize.c.
+_SYMSXP = 1
+_LISTSXP = 2
+_CHARSXP = 9
+_LGLSXP = 10
+_INTSXP = 13
+_REALSXP = 14
+_STRSXP = 16
+_VECSXP = 19
+_NILVALUE_SXP = 254
+_IS_OBJECT = 1 << 8
+_HAS_ATTRIBUTES = 1 << 9
+_HAS_TAG = 1 << 10
+_ASCII_CHARSXP = _CHARSXP | (64 << 12)
+_NA_INTEGER = -(2**31)
+
+
+def _serialize_pairlist(items: dict[str, Any]) -> Iterator[bytes]:
+    """Serializes a pairlist of tagged values, as used for attributes and RData."""
+    for name, value in items.items():
+        yield struct.pack(">ii", _LISTSXP | _HAS_TAG, _SYMSXP)
+        yield from _serialize_strings(np.array([name]), header=False)
+        yield from _serialize_object(value)
+    yield struct.pack(">i", _NILVALUE_SXP)
+
+
+def _serialize_object(value: Any) -> Iterator[bytes]:  # noqa: ANN401
+    """Serializes a named list, data frame or vector."""
+    if isinstance(value, pd.DataFrame):
+        yield struct.pack(">ii", _VECSXP | _HAS_ATTRIBUTES | _IS_OBJECT, value.shape[1])
+        for column in value.columns:
+            yield from _serialize_object(value[column].to_numpy())
+        yield from _serialize_pairlist(
+            {
+                "names": np.array(value.columns, dtype=str),
+                "class": np.array(["data.frame"]),
+                "row.names": np.array([_NA_INTEGER, -len(value)], dtype=np.int32),
+            },
+        )
+    elif isinstance(value, dict):
+        yield struct.pack(">ii", _VECSXP | _HAS_ATTRIBUTES, len(value))
+        for element in value.values():
+            yield from _serialize_object(element)
+        yield from _serialize_pairlist(
+            {"names": np.array(list(value), dtype=str)},
+        )
+    else:
+        yield from _serialize_vector(np.asarray(value))
+
+
+def _serialize_vector(array: npt.NDArray[Any]) -> Iterator[bytes]:
+    """Serializes a one dimensional array as an R vector."""
+    if array.dtype.kind in "UO":
+        yield from _serialize_strings(array.astype(str), header=True)
+    elif array.dtype.kind == "b":
+        yield struct.pack(">ii", _LGLSXP, array.size)
+        yield array.astype(">i4").tobytes()
+    elif array.dtype.kind in "iu":
+        yield struct.pack(">ii", _INTSXP, array.size)
+        yield array.astype(">i4").tobytes()
+    elif array.dtype.kind == "f":
+        yield struct.pack(">ii", _REALSXP, array.size)
+        yield array.astype(">f8").tobytes()
+    else:
+        msg = f"Cannot write arrays of type {array.dtype} to RData."
+        raise exceptions.InternalError(msg)
+
+
+def _serialize_strings(
+    array: npt.NDArray[np.str_],
+    *,
+    header: bool,
+) -> Iterator[bytes]:
+    """Serializes ASCII strings as CHARSXPs, preceded by a STRSXP header."""
+    if header:
+        yield struct.pack(">ii", _STRSXP, array.size)
+    encoded = np.char.encode(array, "ascii")
+    lengths = np.char.str_len(array)
+    if array.size and lengths.min() == lengths.max():
+        records = np.empty(
+            array.size,
+            dtype=[("flags", ">i4"), ("length", ">i4"), ("value", encoded.dtype)],
+        )
+        records["flags"] = _ASCII_CHARSXP
+        records["length"] = lengths
+        records["value"] = encoded
+        yield records.tobytes()
+        return
+    for value in encoded.tolist():
+        yield struct.pack(">ii", _ASCII_CHARSXP, len(value)) + value
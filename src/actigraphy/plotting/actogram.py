@@ -0,0 +1,176 @@
+"""Double-plotted actogram of a whole recording.
+
+Each row shows two consecutive days, such that nights are not split at the
+edge of the plot. The actogram is built from data aggregated into bins rather
+than from the raw data points, so long recordings render quickly.
+"""
+
+import datetime
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from numpy import typing as npt
+from plotly import graph_objects
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def actogram_matrix(
+    dates: Sequence[datetime.date],
+    bin_starts: Sequence[int],
+    values: Sequence[float] | npt.NDArray[np.floating],
+    bin_minutes: int,
+) -> npt.NDArray[np.float32]:
+    """Arranges binned values into a double-plotted matrix.
+
+    Args:
+        dates: The consecutive dates of the rows.
+        bin_starts: The start of each bin in local seconds since the epoch.
+        values: The value of each bin.
+        bin_minutes: The width of the bins in minutes, must divide a day.
+
+    Returns:
+        The matrix with one row per date and two days of bins per row. Bins
+        without data are NaN.
+    """
+    bins_per_day = 24 * 60 // bin_minutes
+    starts = np.asarray(bin_starts, dtype=np.int64)
+    rows = starts // _SECONDS_PER_DAY - (dates[0] - _EPOCH).days
+    columns = starts % _SECONDS_PER_DAY // (bin_minutes * 60)
+    in_range = (rows >= 0) & (rows <= len(dates))
+
+    single = np.full((len(dates) + 1, bins_per_day), np.nan, dtype=np.float32)
+    single[rows[in_range], columns[in_range]] = np.asarray(values)[in_range]
+    return np.hstack((single[:-1], single[1:]))
+
+
+def build_actogram(  # noqa: PLR0913
+    dates: Sequence[datetime.date],
+    bin_starts: Sequence[int],
+    values: Sequence[float],
+    non_wear: Sequence[bool],
+    bin_minutes: int,
+    value_label: str,
+) -> graph_objects.Figure:
+    """Builds a double-plotted actogram heatmap.
+
+    Args:
+        dates: The consecutive dates of the rows.
+        bin_starts: The start of each bin in local seconds since the epoch.
+        values: The value of each bin.
+        non_wear: Whether each bin contains non-wear.
+        bin_minutes: The width of the bins in minutes.
+        value_label: The label of the values in the color bar.
+
+    Returns:
+        The actogram. Rows are on the y-axis by date index, hours since the
+        midnight starting the row are on the x-axis.
+    """
+    logger.debug("Building actogram of %s days.", len(dates))
+    matrix = actogram_matrix(dates, bin_starts, values, bin_minutes)
+    non_wear_matrix = actogram_matrix(
+        dates,
+        bin_starts,
+        np.where(non_wear, 1.0, np.nan),
+        bin_minutes,
+    )
+    hours = (np.arange(matrix.shape[1]) + 0.5) * bin_minutes / 60
+    rows = np.arange(len(dates))
+
+    figure = graph_objects.Figure()
+    figure.add_trace(
+        graph_objects.Heatmap(
+            x=hours,
+            y=rows,
+            z=matrix,
+            colorscale="Greys",
+            colorbar={"title": {"text": value_label}},
+            hovertemplate="%{x:.1f} h<br>%{z:.3f}<extra></extra>",
+        ),
+    )
+    figure.add_trace(
+        graph_objects.Heatmap(
+            x=hours,
+            y=rows,
+            z=non_wear_matrix,
+            colorscale=[[0, "green"], [1, "green"]],
+            opacity=0.4,
+            showscale=False,
+            hoverinfo="skip",
+            name="non-wear",
+        ),
+    )
+    figure.update_layout(
+        height=max(300, 18 * len(dates) + 120),
+        margin={"t": 30, "b": 40},
+        xaxis={
+            "range": [0, 48],
+            "tickvals": list(range(0, 49, 6)),
+            "ticktext": [f"{hour % 24:02d}:00" for hour in range(0, 49, 6)],
+            "fixedrange": True,
+        },
+        yaxis={
+            "autorange": "reversed",
+            "tickvals": rows.tolist(),
+            "ticktext": [
+                f"{index + 1}: {date:%d %b}" for index, date in enumerate(dates)
+            ],
+            "fixedrange": True,
+        },
+    )
+    return figure
+
+
+def window_shapes(
+    dates: Sequence[datetime.date],
+    windows: Sequence[tuple[int, datetime.datetime, datetime.datetime]],
+    color: str,
+) -> list[dict[str, Any]]:
+    """Creates outlined rectangles of time windows on a double-plotted actogram.
+
+    Every window is drawn on its own row and, shifted by a day, on the
+    preceding row.
+
+    Args:
+        dates: The dates of the rows.
+        windows: The row index, start and end of each window, in local time.
+        color: The color of the outlines.
+
+    Returns:
+        The layout shapes.
+    """
+    shapes = []
+    for row, start, end in windows:
+        midnight = datetime.datetime.combine(dates[row], datetime.time())
+        limits = [
+            (time.replace(tzinfo=None) - midnight).total_seconds() / 3600
+            for time in (start, end)
+        ]
+        for shift_row, shift_hours in ((row, 0), (row - 1, 24)):
+            lower, upper = (min(limit + shift_hours, 48) for limit in limits)
+            if shift_row < 0 or lower >= upper:
+                continue
+            shapes.append(
+                {
+                    "type": "rect",
+                    "xref": "x",
+                    "yref": "y",
+                    "x0": lower,
+                    "x1": upper,
+                    "y0": shift_row - 0.5,
+                    "y1": shift_row + 0.5,
+                    "line": {"color": color, "width": 2},
+                    "fillcolor": "rgba(0, 0, 0, 0)",
+                },
+            )
+    return shapes
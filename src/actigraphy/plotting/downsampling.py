@@ -0,0 +1,96 @@
+"""Downsampling of sensor traces for display.
+
+The graph is only a few thousand pixels wide, so sending every epoch to the
+browser wastes bandwidth and render time. The functions in this module select a
+subset of indices that preserves the visual envelope of the traces.
+"""
+
+import logging
+from collections.abc import Sequence
+
+import numpy as np
+from numpy import typing as npt
+
+from actigraphy.core import config
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def min_max_indices(
+    series: Sequence[Sequence[float] | npt.NDArray[np.floating]],
+    n_points: int,
+    keep: npt.NDArray[np.integer] | None = None,
+) -> npt.NDArray[np.int64]:
+    """Selects the indices of the minimum and maximum of each bucket.
+
+    The samples are split into equally sized buckets and, for every series, the
+    location of the minimum and maximum within each bucket is retained. As all
+    series share the same indices, they remain aligned on a shared x-axis.
+    The first and last index and the kept indices count towards `n_points`,
+    so fewer buckets are used the more indices are kept.
+
+    Args:
+        series: One or more series of equal length.
+        n_points: The maximum number of points. If zero or negative, or if the
+            series are already short enough, all indices are returned.
+        keep: Indices that must always be retained, e.g. state boundaries.
+
+    Returns:
+        The sorted, unique indices to retain. At most `n_points`, unless the
+        kept indices leave no room for a single bucket.
+    """
+    n_samples = len(series[0])
+    if n_points <= 0 or n_samples <= n_points:
+        return np.arange(n_samples, dtype=np.int64)
+
+    logger.debug("Downsampling %s samples to %s points.", n_samples, n_points)
+    keep = (
+        np.empty(0, dtype=np.int64)
+        if keep is None
+        else np.unique(np.asarray(keep, dtype=np.int64))
+    )
+    keep = keep[(keep >= 0) & (keep < n_samples)]
+    n_reserved = 2 + len(keep)
+    n_target_buckets = max((n_points - n_reserved) // (2 * len(series)), 1)
+    bucket_size = -(-n_samples // n_target_buckets)
+    n_buckets = -(-n_samples // bucket_size)
+    bucket_starts = np.arange(n_buckets, dtype=np.int64) * bucket_size
+
+    selected = [np.array([0, n_samples - 1], dtype=np.int64), keep]
+    for values in series:
+        buckets = np.pad(
+            np.asarray(values, dtype=np.float64),
+            (0, n_buckets * bucket_size - n_samples),
+            mode="edge",
+        ).reshape(n_buckets, bucket_size)
+        selected.append(bucket_starts + buckets.argmin(axis=1))
+        selected.append(bucket_starts + buckets.argmax(axis=1))
+
+    indices: npt.NDArray[np.int64] = np.unique(np.concatenate(selected))
+    return indices
+
+
+def boundary_indices(
+    blocks: Sequence[tuple[int, int]],
+    n_points: int,
+) -> npt.NDArray[np.int64]:
+    """Finds the indices on either side of the edges of blocks of a series.
+
+    Args:
+        blocks: The first and last index of every block, e.g. of non-wear.
+        n_points: The length of the series.
+
+    Returns:
+        The sorted indices immediately before and after each change of state.
+    """
+    edges = np.asarray(blocks, dtype=np.int64).reshape(-1, 2)
+    boundaries = np.concatenate(
+        [edges[:, 0] - 1, edges[:, 0], edges[:, 1], edges[:, 1] + 1],
+    )
+    inside: npt.NDArray[np.int64] = np.unique(
+        boundaries[(boundaries >= 0) & (boundaries < n_points)],
+    )
+    return inside
@@ -1,26 +1,76 @@
 """Module for all plotting functions."""
 
-import bisect
+import dataclasses
 import datetime
 import logging
 from collections.abc import Sequence
+from typing import Any
 
 import numpy as np
-from plotly import graph_objects
+from numpy import typing as npt
+from plotly import colors, graph_objects, subplots
+from plotly.basedatatypes import BaseTraceType
 
 from actigraphy.core import config, exceptions
+from actigraphy.plotting import downsampling
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+MAX_GRAPH_POINTS = settings.MAX_GRAPH_POINTS
+GRAPH_RENDER_MODE = settings.GRAPH_RENDER_MODE
+WEBGL_POINT_THRESHOLD = settings.WEBGL_POINT_THRESHOLD
 
 logger = logging.getLogger(LOGGER_NAME)
 
+_MICROSECOND = datetime.timedelta(microseconds=1)
+_MICROSECONDS_PER_DAY = 24 * 60 * 60 * 1_000_000
+_CLOCK_LABELS = np.array(
+    [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60)],
+)
+_TIMEZONE_FORMAT = "{clock}<br><b>{timezone}</b>"
+_COMPARISON_ROW_HEIGHT = 160
+_COMPARISON_AXIS_TITLES = {
+    "sensor_angle": "Angle of sensor's z-axis (degrees)",
+    "sensor_acceleration": "Arm movement (mg)",
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class SensorSeries:
+    """The full-resolution traces and x-axis of a sensor plot.
+
+    Attributes:
+        x: The x-axis value of every point.
+        sensor_angle: The sensor's angle at every point.
+        sensor_acceleration: The arm movement at every point.
+        hover_data: The hour and minute of every point.
+        keep: Indices of points that are never removed by downsampling.
+        x_range: The range of the x-axis.
+        x_tick_values: The x-axis tick values.
+        x_tick_names: The x-axis tick names.
+        hover_template: Template that formats the hover data.
+        max_measurements: The number of measurements on the full x-axis.
+    """
+
+    x: npt.NDArray[np.int32]
+    sensor_angle: npt.NDArray[np.float32]
+    sensor_acceleration: npt.NDArray[np.float32]
+    hover_data: npt.NDArray[np.uint8]
+    keep: npt.NDArray[np.int64]
+    x_range: tuple[float, float]
+    x_tick_values: list[int]
+    x_tick_names: list[str]
+    hover_template: str
+    max_measurements: int
+
 
-def build_sensor_plot(
+def build_sensor_plot(  # noqa: PLR0913
     timestamps: Sequence[datetime.datetime],
     sensor_angle: Sequence[float | int],
     sensor_acceleration: Sequence[float | int],
     title_day: str,
+    non_wear_blocks: Sequence[tuple[int, int]] | None = None,
+    max_points: int = MAX_GRAPH_POINTS,
 ) -> tuple[graph_objects.Figure, int]:
     """Builds a plot of the sensor's angle and arm movement.
 
@@ -29,45 +79,360 @@ def build_sensor_plot(
         sensor_angle: The sensor's angle.
         sensor_acceleration: The arm movement.
         title_day: The title of the plot.
-        n_ticks: The number of ticks on the x-axis.
+        non_wear_blocks: The first and last index of every block of non-wear
+            data points. The points on either side of a non-wear boundary are
+            never removed by downsampling.
+        max_points: The maximum number of points per trace. Set to 0 to
+            disable downsampling.
 
     Returns:
         The plot.
 
     Notes:
         We assume that the delta time between timestamps is constant.
+        The traces are downsampled by retaining the minimum and maximum of
+        each bucket, see `downsampling.min_max_indices`.
     """
-    logger.debug("Building sensor plot.")
-    _validate_timezones(timestamps)
-    n_hours = _calculate_number_of_hours(timestamps)
+    series = build_sensor_series(
+        timestamps,
+        sensor_angle,
+        sensor_acceleration,
+        non_wear_blocks,
+    )
+    return plot_sensor_series(series, title_day, max_points), series.max_measurements
+
+
+def build_sensor_series(
+    timestamps: Sequence[datetime.datetime],
+    sensor_angle: Sequence[float | int],
+    sensor_acceleration: Sequence[float | int],
+    non_wear_blocks: Sequence[tuple[int, int]] | None = None,
+) -> SensorSeries:
+    """Computes the full-resolution traces and x-axis of a sensor plot.
+
+    Args:
+        timestamps: The timestamps of the sensor's angle and arm movement.
+        sensor_angle: The sensor's angle.
+        sensor_acceleration: The arm movement.
+        non_wear_blocks: The first and last index of every block of non-wear
+            data points.
+
+    Returns:
+        The series, see `plot_sensor_series` and `resample`.
+    """
+    logger.debug("Building sensor series.")
+    timezones, timezone_codes = _get_timezones(timestamps)
+    _validate_timezones(timezones)
+    n_hours = _calculate_number_of_hours(timezones)
     delta_time = timestamps[1] - timestamps[0]
     max_measurements = int(n_hours * 60 * 60 / delta_time.total_seconds())
 
     timestamp_values = _get_timestamp_x_values(timestamps, delta_time, max_measurements)
     x_min = 0.0
     x_max = n_hours * 60 * 60 / delta_time.total_seconds()
-    x_tick_values, x_tick_names, x_hover_names = _get_x_axis(
+    x_tick_values, x_tick_names, x_hover_minutes = _get_x_axis(
         timestamps,
+        timezone_codes,
         n_hours,
         delta_time,
         max_measurements,
         (x_min, x_max),
     )
-    x_hover_names = [x_hover_names[index] for index in timestamp_values]
 
-    figure = _build_figure(
-        sensor_angle,
-        sensor_acceleration,
+    return SensorSeries(
+        x=timestamp_values.astype(np.int32),
+        sensor_angle=np.asarray(sensor_angle, dtype=np.float32),
+        sensor_acceleration=np.asarray(sensor_acceleration, dtype=np.float32),
+        hover_data=_get_hover_data(x_hover_minutes[timestamp_values]),
+        keep=(
+            np.empty(0, dtype=np.int64)
+            if non_wear_blocks is None
+            else downsampling.boundary_indices(non_wear_blocks, len(timestamps))
+        ),
+        x_range=(x_min, x_max),
+        x_tick_values=x_tick_values,
+        x_tick_names=x_tick_names,
+        hover_template=_get_hover_template(timestamps),
+        max_measurements=max_measurements,
+    )
+
+
+def plot_sensor_series(
+    series: SensorSeries,
+    title_day: str,
+    max_points: int = MAX_GRAPH_POINTS,
+) -> graph_objects.Figure:
+    """Plots the sensor's angle and arm movement over the full x-axis.
+
+    Args:
+        series: The series to plot.
+        title_day: The title of the plot.
+        max_points: The maximum number of points per trace. Set to 0 to
+            disable downsampling.
+
+    Returns:
+        The plot.
+    """
+    indices = resample_indices(series, series.x_range, max_points)
+    return _build_figure(
+        series.sensor_angle[indices],
+        series.sensor_acceleration[indices],
         title_day,
-        timestamp_values,
-        x_min,
-        x_max,
-        x_tick_values,
-        x_tick_names,
-        x_hover_names,
+        series.x[indices],
+        *series.x_range,
+        series.x_tick_values,
+        series.x_tick_names,
+        series.hover_data[indices],
+        series.hover_template,
+    )
+
+
+def resample_indices(
+    series: SensorSeries,
+    x_range: Sequence[float],
+    max_points: int = MAX_GRAPH_POINTS,
+) -> npt.NDArray[np.int64]:
+    """Selects the points to draw for a range of the x-axis.
+
+    The points within the range, and one point on either side so that lines
+    reach the edges, are downsampled to at most `max_points`. Zoomed in far
+    enough, every point is retained.
+
+    Args:
+        series: The full-resolution series.
+        x_range: The visible range of the x-axis.
+        max_points: The maximum number of points per trace. Set to 0 to
+            disable downsampling.
+
+    Returns:
+        The sorted indices of the points to draw.
+    """
+    lower = max(int(np.searchsorted(series.x, x_range[0], side="left")) - 1, 0)
+    upper = min(
+        int(np.searchsorted(series.x, x_range[1], side="right")) + 1,
+        len(series.x),
+    )
+    keep = series.keep[(series.keep >= lower) & (series.keep < upper)] - lower
+    indices: npt.NDArray[np.int64] = lower + downsampling.min_max_indices(
+        (
+            series.sensor_angle[lower:upper],
+            series.sensor_acceleration[lower:upper],
+        ),
+        max_points,
+        keep=keep,
     )
+    return indices
 
-    return figure, max_measurements
+
+def resample(
+    series: SensorSeries,
+    x_range: Sequence[float],
+    max_points: int = MAX_GRAPH_POINTS,
+) -> list[dict[str, Any]]:
+    """Resamples the traces of a sensor plot to a range of the x-axis.
+
+    Args:
+        series: The full-resolution series.
+        x_range: The visible range of the x-axis.
+        max_points: The maximum number of points per trace.
+
+    Returns:
+        The x, y and customdata of the angle and arm movement traces, with
+        arrays encoded as base64 typed arrays.
+    """
+    indices = resample_indices(series, x_range, max_points)
+    figure = graph_objects.Figure(
+        [
+            graph_objects.Scatter(
+                x=series.x[indices],
+                y=values[indices],
+                customdata=series.hover_data[indices],
+            )
+            for values in (series.sensor_angle, series.sensor_acceleration)
+        ],
+    )
+    return [
+        {key: trace[key] for key in ("x", "y", "customdata")}
+        for trace in figure.to_dict()["data"]
+    ]
+
+
+def build_comparison_plot(
+    nights: Sequence[tuple[str, SensorSeries]],
+    metric: str,
+    sleep_windows: Sequence[Sequence[Sequence[float]]],
+    *,
+    stacked: bool,
+    max_points: int = MAX_GRAPH_POINTS,
+) -> graph_objects.Figure:
+    """Plots one trace of several nights on the shared noon-to-noon x-axis.
+
+    The point budget is divided among the nights, such that comparing several
+    nights draws about as many points as a single day plot.
+
+    Args:
+        nights: The label and series of every night.
+        metric: The trace to plot, "sensor_angle" or "sensor_acceleration".
+        sleep_windows: The sleep windows of every night, with limits in range
+            [0, 1] of the night's x-axis.
+        stacked: Whether to plot every night in its own row rather than
+            overlaying all nights in one plot.
+        max_points: The maximum number of points over all traces. Set to 0 to
+            disable downsampling.
+
+    Returns:
+        The plot. Sleep windows are shaded in stacked plots and outlined in the
+        color of their night in overlaid plots.
+    """
+    logger.debug("Building comparison plot of %s nights.", len(nights))
+    points_per_night = max(max_points // max(len(nights), 1), 1) if max_points else 0
+    n_rows = len(nights) if stacked else 1
+    figure = subplots.make_subplots(
+        rows=n_rows,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.1 / n_rows,
+    )
+    palette = colors.qualitative.Plotly
+    shapes = []
+    for index, ((label, series), windows) in enumerate(
+        zip(nights, sleep_windows, strict=True),
+    ):
+        color = "blue" if stacked else palette[index % len(palette)]
+        row = index + 1 if stacked else 1
+        indices = resample_indices(series, series.x_range, points_per_night)
+        scatter = _get_scatter_class(len(indices))
+        figure.add_trace(
+            scatter(
+                x=series.x[indices],
+                y=getattr(series, metric)[indices],
+                hovertemplate=series.hover_template,
+                customdata=series.hover_data[indices],
+                mode="lines",
+                name=label,
+                line_color=color,
+                showlegend=not stacked,
+            ),
+            row=row,
+            col=1,
+        )
+        axis_suffix = str(row) if row > 1 else ""
+        x_max = series.x_range[1]
+        for lower, upper in windows:
+            shape = overlay_shape(
+                (lower * x_max, upper * x_max),
+                "red" if stacked else color,
+                "sleep window",
+                show_legend=False,
+            )
+            shape.update(
+                xref=f"x{axis_suffix}",
+                yref=f"y{axis_suffix} domain",
+            )
+            if not stacked:
+                shape.update(
+                    fillcolor="rgba(0, 0, 0, 0)",
+                    opacity=1,
+                    line={"color": color, "width": 2, "dash": "dot"},
+                )
+            shapes.append(shape)
+        if stacked:
+            figure.update_yaxes(
+                title={"text": label},
+                fixedrange=True,
+                row=row,
+                col=1,
+            )
+
+    reference = max((series for _, series in nights), key=lambda s: s.x_range[1])
+    figure.update_xaxes(
+        tickmode="array",
+        tickangle=0,
+        range=list(reference.x_range),
+        tickvals=reference.x_tick_values,
+        ticktext=reference.x_tick_names,
+    )
+    if not stacked:
+        figure.update_yaxes(
+            title={"text": _COMPARISON_AXIS_TITLES[metric]},
+            fixedrange=True,
+        )
+    figure.update_layout(
+        height=max(_COMPARISON_ROW_HEIGHT * n_rows, 2 * _COMPARISON_ROW_HEIGHT) + 100,
+        margin={"t": 30, "b": 40},
+        shapes=shapes,
+        legend={
+            "orientation": "h",
+            "yanchor": "bottom",
+            "y": 1.02,
+            "xanchor": "right",
+            "x": 1,
+        },
+    )
+    return figure
+
+
+@dataclasses.dataclass
+class Overlay:
+    """A category of rectangles drawn over the sensor plot.
+
+    Attributes:
+        intervals: The limits of the rectangles in range [0, 1].
+        color: The color of the rectangles.
+        label: The label of the category, shown once in the legend.
+        merge_gap: Rectangles separated by no more than this gap, in range
+            [0, 1], are merged into one.
+        merge: Whether to merge rectangles. If False, one shape is emitted per
+            interval in the given order.
+    """
+
+    intervals: Sequence[Sequence[float]]
+    color: str
+    label: str
+    merge_gap: float = 0.0
+    merge: bool = True
+
+
+def add_overlays(
+    figure: graph_objects.Figure,
+    overlays: Sequence[Overlay],
+) -> graph_objects.Figure:
+    """Adds categories of rectangles to the figure in a single layout update.
+
+    Overlapping or adjacent rectangles within a category are merged, and each
+    category is labelled once through a legend entry on its first rectangle.
+
+    Args:
+        figure: The figure to add the rectangles to.
+        overlays: The categories of rectangles to add.
+
+    Returns:
+        The figure with the rectangles added.
+    """
+    logger.debug("Adding overlays to figure.")
+    x_range = figure.layout.xaxis.range
+    labelled = {shape.legendgroup for shape in figure.layout.shapes}
+    shapes = []
+    for overlay in overlays:
+        if overlay.merge:
+            intervals = merge_intervals(overlay.intervals, overlay.merge_gap)
+        else:
+            intervals = [(interval[0], interval[1]) for interval in overlay.intervals]
+        for lower, upper in intervals:
+            shapes.append(
+                overlay_shape(
+                    (
+                        x_range[0] + (x_range[1] - x_range[0]) * lower,
+                        x_range[0] + (x_range[1] - x_range[0]) * upper,
+                    ),
+                    overlay.color,
+                    overlay.label,
+                    show_legend=overlay.label not in labelled,
+                ),
+            )
+            labelled.add(overlay.label)
+    figure.update_layout(shapes=[*figure.layout.shapes, *shapes])
+    return figure
 
 
 def add_rectangle(
@@ -85,36 +450,149 @@ def add_rectangle(
         label: The label of the rectangle.
     """
     logger.debug("Adding rectangle to figure.")
-    x_min = (figure.layout.xaxis.range[1] - figure.layout.xaxis.range[0]) * limits[
-        0
-    ] + figure.layout.xaxis.range[0]
-    x_max = (figure.layout.xaxis.range[1] - figure.layout.xaxis.range[0]) * limits[
-        1
-    ] + figure.layout.xaxis.range[0]
-
-    figure.add_vrect(
-        x0=x_min,
-        x1=x_max,
-        fillcolor=color,
-        opacity=0.2,
-        annotation={"text": label},
-    )
-    return figure
+    return add_overlays(figure, [Overlay([limits], color, label)])
+
 
+def overlay_shape(
+    limits: tuple[float, float],
+    color: str,
+    label: str,
+    *,
+    show_legend: bool,
+) -> dict[str, Any]:
+    """Creates a full-height rectangle shape.
 
-def _validate_timezones(timestamps: Sequence[datetime.datetime]) -> None:
+    Args:
+        limits: The limits of the rectangle in x-axis coordinates.
+        color: The color of the rectangle.
+        label: The label of the rectangle's category.
+        show_legend: Whether to show the category in the legend.
+
+    Returns:
+        The layout shape.
+    """
+    return {
+        "type": "rect",
+        "xref": "x",
+        "yref": "paper",
+        "x0": limits[0],
+        "x1": limits[1],
+        "y0": 0,
+        "y1": 1,
+        "fillcolor": color,
+        "opacity": 0.2,
+        "line": {"width": 0},
+        "layer": "above",  # Shapes below the data are hidden by WebGL traces.
+        "name": label,
+        "legendgroup": label,
+        "showlegend": show_legend,
+    }
+
+
+def merge_intervals(
+    intervals: Sequence[Sequence[float]],
+    gap: float = 0.0,
+) -> list[tuple[float, float]]:
+    """Merges overlapping intervals and intervals separated by at most `gap`.
+
+    Args:
+        intervals: The intervals as (lower, upper) pairs.
+        gap: The largest gap between two intervals that are merged.
+
+    Returns:
+        The merged intervals, sorted by their lower limit.
+    """
+    merged: list[tuple[float, float]] = []
+    for lower, upper in sorted((interval[0], interval[1]) for interval in intervals):
+        if merged and lower - merged[-1][1] <= gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], upper))
+        else:
+            merged.append((lower, upper))
+    return merged
+
+
+def non_wear_overlay(
+    timestamps: Sequence[datetime.datetime],
+    non_wear_blocks: Sequence[tuple[int, int]],
+    max_measurements: int,
+) -> Overlay:
+    """Creates the overlay of the non-wear blocks of a day.
+
+    Args:
+        timestamps: The timestamps of the data points shown.
+        non_wear_blocks: The first and last index of every block of non-wear
+            data points, see `find_continuous_blocks`.
+        max_measurements: The number of measurements on the full x-axis, as
+            returned by `build_sensor_plot`.
+
+    Returns:
+        The non-wear overlay. Blocks of adjacent epochs are merged; blocks
+        separated by any wear are kept apart.
+    """
+    offset = 0.0
+    all_timepoints_included = len(timestamps) == max_measurements
+    if not all_timepoints_included:
+        includes_start = timestamps[0].hour == 12 and timestamps[0].minute == 0  # noqa: PLR2004
+        if not includes_start:
+            offset = 1 - len(timestamps) / max_measurements
+    fractions = [
+        [start / max_measurements + offset, end / max_measurements + offset]
+        for start, end in non_wear_blocks
+    ]
+    # Blocks of adjacent epochs are one epoch apart and blocks with wear between
+    # them at least two; the half epoch only absorbs rounding.
+    return Overlay(fractions, "green", "non-wear", merge_gap=1.5 / max_measurements)
+
+
+def find_continuous_blocks(vector: Sequence[bool]) -> list[tuple[int, int]]:
+    """Finds the continuous blocks of True values in a vector.
+
+    Args:
+        vector: The vector to search.
+
+    Returns:
+        list[tuple[int, int]]: The first and last index of every continuous
+            block of True values in the vector.
+    """
+    padded = np.concatenate(([0], np.asarray(vector, dtype=np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2].tolist(), (edges[1::2] - 1).tolist(), strict=True))
+
+
+def _get_timezones(
+    timestamps: Sequence[datetime.datetime],
+) -> tuple[list[datetime.tzinfo | None], npt.NDArray[np.intp]]:
+    """Finds the timezones of the timestamps in a single pass.
+
+    Args:
+        timestamps: The timestamps.
+
+    Returns:
+        The unique timezones in order of appearance and, for every timestamp,
+        the index of its timezone in that list.
+    """
+    logger.debug("Getting timezones.")
+    tzinfos = [timestamp.tzinfo for timestamp in timestamps]
+    timezones = list(dict.fromkeys(tzinfos))
+    timezone_codes = np.zeros(len(tzinfos), dtype=np.intp)
+    if len(timezones) > 1:
+        tzinfo_array = np.array(tzinfos, dtype=object)
+        for code, timezone in enumerate(timezones[1:], start=1):
+            timezone_codes[tzinfo_array == timezone] = code
+    return timezones, timezone_codes
+
+
+def _validate_timezones(timezones: Sequence[datetime.tzinfo | None]) -> None:
     """Validates that the timestamps contain no more than two different timezones."""
     logger.debug("Validating timezones.")
-    timezones = {ts.tzinfo for ts in timestamps}
     if len(timezones) > 2:  # noqa: PLR2004
         msg = "More than two timezones in timestamps."
         raise exceptions.InternalError(msg)
 
 
-def _calculate_number_of_hours(timestamps: Sequence[datetime.datetime]) -> float:
+def _calculate_number_of_hours(timezones: Sequence[datetime.tzinfo | None]) -> float:
     """Calculates the number of hours in the graph."""
     logger.debug("Calculating number of hours.")
-    timezones = list(dict.fromkeys(ts.tzinfo for ts in timestamps))
     max_timezones = 2
     if len(timezones) > max_timezones:
         msg = "More than two timezones in timestamps."
@@ -138,143 +616,200 @@ def _get_timestamp_x_values(
     timestamps: Sequence[datetime.datetime],
     delta_time: datetime.timedelta,
     n_ticks: int,
-) -> Sequence[int]:
-    """Calculates the x values for the timestamps."""
-    x_times = [
-        datetime.datetime.combine(
-            timestamps[0].date(),
-            datetime.time(hour=12),
-            tzinfo=timestamps[0].tzinfo,
-        )
-        + datetime.timedelta(seconds=delta_time.total_seconds() * tick)
-        for tick in range(int(n_ticks))
-    ]
-    first_timestamp_index = min(
-        range(len(x_times)),
-        key=lambda i: abs(x_times[i] - timestamps[0]),
+) -> npt.NDArray[np.int64]:
+    """Calculates the x values for the timestamps.
+
+    The first timestamp is placed on the tick nearest to it, counting ticks of
+    `delta_time` from noon of its date. Ties are resolved towards the earlier
+    tick.
+    """
+    noon = datetime.datetime.combine(
+        timestamps[0].date(),
+        datetime.time(hour=12),
+        tzinfo=timestamps[0].tzinfo,
     )
-    return list(
-        range(
-            first_timestamp_index,
-            first_timestamp_index + len(timestamps),
-        ),
+    delta_microseconds = delta_time // _MICROSECOND
+    offset_microseconds = (timestamps[0] - noon) // _MICROSECOND
+    first_timestamp_index = -(
+        (delta_microseconds - 2 * offset_microseconds) // (2 * delta_microseconds)
+    )
+    first_timestamp_index = min(max(first_timestamp_index, 0), int(n_ticks) - 1)
+    return np.arange(
+        first_timestamp_index,
+        first_timestamp_index + len(timestamps),
+        dtype=np.int64,
     )
 
 
-def _get_x_axis(
+def _get_x_axis(  # noqa: PLR0913
     timestamps: Sequence[datetime.datetime],
+    timezone_codes: npt.NDArray[np.intp],
     n_hours: float,
     delta_time: datetime.timedelta,
     max_measurements: int,
     x_lim: tuple[float, float],
-) -> tuple[list[float], list[str], list[str]]:
+) -> tuple[list[int], list[str], npt.NDArray[np.int64]]:
     """Calculate the x-axis tick values for a plot.
 
+    Every x value is expressed as the number of microseconds since noon of the
+    first day, so that clock times can be derived with integer arithmetic
+    rather than per-timestamp datetime operations.
+
     Args:
         timestamps: List of x-axis timestamps.
+        timezone_codes: The timezone index of every timestamp, see
+            `_get_timezones`.
         n_hours: Number of hours to plot.
         delta_time: Time interval between measurements.
         max_measurements: Maximum number of measurements.
         x_lim: Tuple representing the lower and upper limits of the x-axis.
 
     Returns:
-        tuple: Tuple containing the x-axis tick values and names.
+        tuple: Tuple containing the x-axis tick values and names, and the
+            minute of the day of every x value in the first timezone, which
+            is used for the hover labels.
     """
-    timestamps_including_missing: list[datetime.datetime] = [
-        timestamps[0].replace(hour=12, minute=0, second=0, microsecond=0)
-        + datetime.timedelta(seconds=delta_time.total_seconds() * tick)
-        for tick in range(int(max_measurements))
+    n_timezones = int(timezone_codes.max()) + 1
+    if n_timezones > 2:  # noqa: PLR2004
+        msg = "More than two timezones in timestamps."
+        raise exceptions.InternalError(msg)
+    timezone_timestamps = [
+        timestamps[int(np.argmax(timezone_codes == code))]
+        for code in range(n_timezones)
     ]
-    first_timestamp_index = bisect.bisect_left(
-        timestamps_including_missing,
-        timestamps[0],
+    utc_offsets = np.array(
+        [
+            (timestamp.utcoffset() or datetime.timedelta()) // _MICROSECOND
+            for timestamp in timezone_timestamps
+        ],
+        dtype=np.int64,
     )
 
-    timestamps_timezone_update = [
-        timestamps_including_missing[first_timestamp_index + index].astimezone(
-            timestamps[index].tzinfo,
-        )
-        for index in range(
-            len(timestamps),
-        )
-    ]
-    timestamps_including_missing[
-        first_timestamp_index : first_timestamp_index
-        + len(
-            timestamps,
-        )
-    ] = timestamps_timezone_update
+    delta_microseconds = delta_time // _MICROSECOND
+    noon = timestamps[0].replace(hour=12, minute=0, second=0, microsecond=0)
+    offset_microseconds = (timestamps[0] - noon) // _MICROSECOND
+    first_timestamp_index = min(
+        max(-(-offset_microseconds // delta_microseconds), 0),
+        max_measurements,
+    )
+    n_included = min(len(timestamps), max_measurements - first_timestamp_index)
 
-    timestamps_including_missing.append(
-        timestamps_including_missing[-1] + datetime.timedelta(days=1),
+    x_codes = np.zeros(max_measurements + 1, dtype=np.intp)
+    x_codes[first_timestamp_index : first_timestamp_index + n_included] = (
+        timezone_codes[:n_included]
+    )
+    x_codes[-1] = x_codes[-2]
+    microseconds_since_noon = (
+        np.arange(max_measurements + 1, dtype=np.int64) * delta_microseconds
     )
+    microseconds_since_noon[-1] = microseconds_since_noon[-2] + _MICROSECONDS_PER_DAY
 
     x_tick_values = np.linspace(x_lim[0], x_lim[1], int(n_hours) + 1, dtype=int)
 
-    x_tick_times = [timestamps_including_missing[tick] for tick in x_tick_values]
-    x_tick_names = [
-        datetime.datetime.strftime(
-            time,
-            "%H:%M",
-        )
-        if time.hour % 3 == 0
-        else ""
-        for time in x_tick_times
-    ]
-    n_timezones = len(list(dict.fromkeys(ts.tzinfo for ts in timestamps)))
-    timezone_format = "%H:%M<br><b>%Z</b>"
-    if n_timezones > 2:  # noqa: PLR2004
-        msg = "More than two timezones in timestamps."
-        raise exceptions.InternalError(msg)
+    tick_minutes = _minute_of_day(
+        microseconds_since_noon[x_tick_values]
+        + utc_offsets[x_codes[x_tick_values]]
+        - utc_offsets[0],
+    )
+    x_tick_names = np.where(
+        tick_minutes // 60 % 3 == 0,
+        _CLOCK_LABELS[tick_minutes],
+        "",
+    ).tolist()
     if n_timezones == 2:  # noqa: PLR2004
-        x_tick_names[0] = datetime.datetime.strftime(x_tick_times[0], timezone_format)
-        x_tick_names[-1] = datetime.datetime.strftime(x_tick_times[-1], timezone_format)
+        for tick in (0, -1):
+            x_tick_names[tick] = _TIMEZONE_FORMAT.format(
+                clock=_CLOCK_LABELS[tick_minutes[tick]],
+                timezone=timezone_timestamps[x_codes[x_tick_values[tick]]].strftime(
+                    "%Z",
+                ),
+            )
+
+    x_hover_minutes = _minute_of_day(microseconds_since_noon)
+
+    return x_tick_values.tolist(), x_tick_names, x_hover_minutes
 
-    x_hover_names = [
-        datetime.datetime.strftime(
-            time.astimezone(timestamps[0].tzinfo),
-            timezone_format,
-        )
-        for time in timestamps_including_missing
-    ]
 
-    return x_tick_values.tolist(), x_tick_names, x_hover_names
+def _get_hover_data(minutes: npt.NDArray[np.int64]) -> npt.NDArray[np.uint8]:
+    """Converts minutes of the day to hour and minute columns for hovering.
+
+    Args:
+        minutes: The minute of the day of every point.
+
+    Returns:
+        An array of shape (n, 2) with the hour and minute of every point.
+    """
+    hours, remainder = np.divmod(minutes, 60)
+    return np.column_stack((hours, remainder)).astype(np.uint8)
+
+
+def _get_hover_template(timestamps: Sequence[datetime.datetime]) -> str:
+    """Creates the hover template for the hover data of `_get_hover_data`.
+
+    Hover labels are always displayed in the timezone of the first timestamp.
+
+    Args:
+        timestamps: The timestamps of the plot.
+
+    Returns:
+        The hover template.
+    """
+    timezone = timestamps[0].astimezone(timestamps[0].tzinfo).strftime("%Z")
+    clock = "%{customdata[0]:02d}:%{customdata[1]:02d}"
+    return "<b>" + _TIMEZONE_FORMAT.format(clock=clock, timezone=timezone) + "</b>"
+
+
+def _minute_of_day(
+    microseconds_since_noon: npt.NDArray[np.int64],
+) -> npt.NDArray[np.int64]:
+    """Converts microseconds since noon to the minute of the day."""
+    minutes: npt.NDArray[np.int64] = (
+        (microseconds_since_noon + _MICROSECONDS_PER_DAY // 2) // 60_000_000
+    ) % (24 * 60)
+    return minutes
 
 
 def _build_figure(  # noqa: PLR0913
-    sensor_angle: Sequence[float | int],
-    sensor_acceleration: Sequence[float | int],
+    sensor_angle: npt.NDArray[np.float32],
+    sensor_acceleration: npt.NDArray[np.float32],
     title_day: str,
-    timestamp_values: Sequence[int],
+    timestamp_values: npt.NDArray[np.int32],
     x_min: float,
     x_max: float,
     x_tick_values: Sequence[float],
     x_tick_names: Sequence[str],
-    x_hover_names: Sequence[str],
+    hover_data: npt.NDArray[np.uint8],
+    hover_template: str,
 ) -> graph_objects.Figure:
     """Build a figure for sensor plots.
 
     Args:
-        sensor_angle: List of sensor angles.
-        sensor_acceleration: List of sensor accelerations.
+        sensor_angle: Array of sensor angles.
+        sensor_acceleration: Array of sensor accelerations.
         title_day: Title for the figure.
-        timestamp_values: List of timestamp values on the x-axis.
+        timestamp_values: Array of timestamp values on the x-axis.
         x_min: Minimum x-axis value.
         x_max: Maximum x-axis value.
         x_tick_values: List of x-axis tick values.
         x_tick_names: List of x-axis tick names.
-        x_hover_names: List of x-axis hover names.
+        hover_data: Array of the hour and minute of every point.
+        hover_template: Template that formats the hover data.
 
     Returns:
         graph_objects.Figure: The built figure.
+
+    Notes:
+        Traces are passed as NumPy arrays so that Plotly serializes them as
+        base64 encoded typed arrays.
     """
+    scatter = _get_scatter_class(len(timestamp_values))
     figure = graph_objects.Figure()
     figure.add_trace(
-        graph_objects.Scatter(
+        scatter(
             x=timestamp_values,
             y=sensor_angle,
-            hovertemplate="<b>%{text}</b>",
-            text=x_hover_names,
+            hovertemplate=hover_template,
+            customdata=hover_data,
             mode="lines",
             name="Angle of sensor's z-axis",
             line_color="blue",
@@ -282,11 +817,11 @@ def _build_figure(  # noqa: PLR0913
         ),
     )
     figure.add_trace(
-        graph_objects.Scatter(
+        scatter(
             x=timestamp_values,
             y=sensor_acceleration,
-            hovertemplate="<b>%{text}</b>",
-            text=x_hover_names,
+            hovertemplate=hover_template,
+            customdata=hover_data,
             mode="lines",
             name="Arm movement",
             line_color="gray",
@@ -305,7 +840,6 @@ def _build_figure(  # noqa: PLR0913
                 "x": 1,
             },
             "xaxis": {
-                "fixedrange": True,
                 "tickmode": "array",
                 "tickangle": 0,
                 "range": [x_min, x_max],
@@ -327,3 +861,22 @@ def _build_figure(  # noqa: PLR0913
     )
 
     return figure
+
+
+def _get_scatter_class(n_points: int) -> type[BaseTraceType]:
+    """Selects the SVG or WebGL scatter trace based on the render mode.
+
+    Args:
+        n_points: The number of points per trace.
+
+    Returns:
+        The scatter trace class to use.
+    """
+    if GRAPH_RENDER_MODE == "webgl" or (
+        GRAPH_RENDER_MODE == "auto" and n_points > WEBGL_POINT_THRESHOLD
+    ):
+        logger.debug("Using WebGL for %s points.", n_points)
+        scatter: type[BaseTraceType] = graph_objects.Scattergl
+    else:
+        scatter = graph_objects.Scatter
+    return scatter
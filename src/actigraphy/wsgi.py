@@ -0,0 +1,125 @@
+"""WSGI entry point of the production server.
+
+`actigraphy` runs Flask's development server, which is meant for a single
+user. For several reviewers at once, the app is served by gunicorn, which is
+installed with the `serve` extra and configured by `gunicorn_config`:
+
+    uv sync --extra serve
+    ACTIGRAPHY_DATA_DIR=/data uv run actigraphy-serve
+
+Every worker process builds its own app and caches, and warms them up before
+accepting requests. The threads of a worker share its caches. Workers share
+the subjects' SQLite databases and the on-disk figure cache, if
+`FIGURE_CACHE_DIR` is set. The databases use a rollback journal; write-ahead
+logging, which lets reviewers read while another one writes, is off by default
+and enabled by `SQLITE_WAL` for data on a local disk. Annotation versions are
+stored in the databases, such that an edit in one worker invalidates the
+cached sleep windows of all workers.
+"""
+
+import argparse
+import datetime
+import importlib
+import importlib.util
+import logging
+import pathlib
+import sys
+from collections.abc import Sequence
+
+import flask
+from plotly import io as plotly_io
+from sqlalchemy import orm
+
+from actigraphy import app
+from actigraphy.core import cache, config, exceptions
+from actigraphy.database import database
+from actigraphy.plotting import sensor_plots
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+DATA_DIR = settings.DATA_DIR
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def create_server(data_dir: str | pathlib.Path | None = None) -> flask.Flask:
+    """Creates the WSGI application of a worker.
+
+    Args:
+        data_dir: The GGIR output folder. Defaults to the `DATA_DIR` setting.
+
+    Returns:
+        The Flask server of the app.
+
+    Raises:
+        InternalError: If no data directory is given.
+    """
+    data_dir = data_dir or DATA_DIR
+    if data_dir is None:
+        msg = "Set ACTIGRAPHY_DATA_DIR to the GGIR output folder to serve."
+        raise exceptions.InternalError(msg)
+
+    dash_app = app.create_app(
+        argparse.Namespace(
+            input_folder=pathlib.Path(data_dir),
+            verbosity=logging.INFO,
+        ),
+    )
+    app.attach_health_endpoint(dash_app)
+    cache.annotation_versions.use_store(database.AnnotationVersions())
+    server: flask.Flask = dash_app.server
+    return server
+
+
+def warm_up() -> None:
+    """Runs the slow first-time code paths of a worker before it serves users.
+
+    The first figure imports and validates large parts of Plotly and the
+    first query configures the database models, which takes seconds that
+    would otherwise be added to the first request of every worker.
+    """
+    logger.info("Warming up worker.")
+    orm.configure_mappers()
+    start = datetime.datetime(2000, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=minute) for minute in range(60)]
+    values = [0.0] * len(timestamps)
+    figure, max_measurements = sensor_plots.build_sensor_plot(
+        timestamps,
+        values,
+        values,
+        "",
+        non_wear_blocks=[(0, 1)],
+    )
+    figure = sensor_plots.add_overlays(
+        figure,
+        [sensor_plots.non_wear_overlay(timestamps, [(0, 1)], max_measurements)],
+    )
+    plotly_io.to_json(figure)
+
+
+def serve(argv: Sequence[str] | None = None) -> None:
+    """Runs the production server.
+
+    Args:
+        argv: Additional gunicorn options, which take precedence over
+            `gunicorn_config`. Defaults to the command line arguments.
+
+    Raises:
+        InternalError: If gunicorn is not installed.
+    """
+    if importlib.util.find_spec("gunicorn") is None:
+        msg = (
+            "The production server requires the optional gunicorn dependency, "
+            "install it with `uv sync --extra serve`."
+        )
+        raise exceptions.InternalError(msg)
+
+    if argv is None:
+        argv = sys.argv[1:]
+    sys.argv = [
+        "actigraphy-serve",
+        "--config",
+        "python:actigraphy.gunicorn_config",
+        *argv,
+    ]
+    importlib.import_module("gunicorn.app.wsgiapp").run()
@@ -0,0 +1 @@
+"""Contains benchmarks of the hot paths."""
@@ -0,0 +1,190 @@
+"""Benchmark harness for the plotting and callback hot paths.
+
+Every benchmark reports its latency percentiles, peak allocations and, for
+figures, the size of the JSON sent to the browser. Results are compared
+against a stored baseline and a benchmark fails when any metric regresses by
+more than the threshold. Run `pytest tests/benchmark --benchmark-save` to
+record a new baseline after an intended change or on a new machine.
+"""
+
+import dataclasses
+import json
+import pathlib
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+import pytest
+from _pytest import terminal
+from plotly import io as plotly_io
+
+BASELINE_FILE = pathlib.Path(__file__).parent / "baseline.json"
+N_REPEATS = 7
+# Latency differences below this are considered noise.
+LATENCY_TOLERANCE_SECONDS = 0.01
+
+_results: dict[str, "BenchmarkResult"] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    """The measurements of a benchmark.
+
+    Attributes:
+        p50_seconds: The median latency.
+        p90_seconds: The 90th percentile latency.
+        max_seconds: The largest latency.
+        peak_bytes: The peak memory allocated during a single call.
+        json_bytes: The size of the JSON serialized result, if it is a figure.
+    """
+
+    p50_seconds: float
+    p90_seconds: float
+    max_seconds: float
+    peak_bytes: int
+    json_bytes: int | None
+
+
+class Benchmark:
+    """Measures a callable and compares it against the baseline."""
+
+    def __init__(
+        self,
+        name: str,
+        baseline: dict[str, dict[str, Any]],
+        threshold: float,
+    ) -> None:
+        """Initializes the benchmark.
+
+        Args:
+            name: The name of the benchmark, i.e. the test's node ID.
+            baseline: The baseline results by benchmark name.
+            threshold: The largest allowed relative regression.
+        """
+        self.name = name
+        self.baseline = baseline.get(name)
+        self.threshold = threshold
+
+    def __call__(
+        self,
+        func: Callable[[], Any],
+        *,
+        repeats: int = N_REPEATS,
+        figure: bool = False,
+    ) -> Any:  # noqa: ANN401
+        """Runs and measures the callable.
+
+        The callable is run once to warm up, `repeats` times to measure its
+        latency and once more under tracemalloc, which slows it down, to
+        measure its allocations.
+
+        Args:
+            func: The callable to measure.
+            repeats: The number of timed calls.
+            figure: Whether the callable returns a figure whose JSON size is
+                measured.
+
+        Returns:
+            The return value of the last call.
+        """
+        func()
+        durations = []
+        for _ in range(repeats):
+            tic = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - tic)
+
+        tracemalloc.start()
+        try:
+            value = func()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = BenchmarkResult(
+            p50_seconds=statistics.median(durations),
+            p90_seconds=float(np.percentile(durations, 90)),
+            max_seconds=max(durations),
+            peak_bytes=peak_bytes,
+            json_bytes=len(plotly_io.to_json(value)) if figure else None,
+        )
+        _results[self.name] = result
+        self._compare(result)
+        return value
+
+    def _compare(self, result: BenchmarkResult) -> None:
+        """Fails the benchmark if it regressed beyond the threshold."""
+        if self.baseline is None:
+            return
+        regressions = []
+        for metric, tolerance in (
+            ("p50_seconds", LATENCY_TOLERANCE_SECONDS),
+            ("peak_bytes", 0),
+            ("json_bytes", 0),
+        ):
+            current = getattr(result, metric)
+            reference = self.baseline.get(metric)
+            if current is None or reference is None:
+                continue
+            if current > reference * (1 + self.threshold) + tolerance:
+                regressions.append(f"{metric}: {reference} -> {current}")
+        if regressions:
+            pytest.fail(
+                f"{self.name} regressed by more than {self.threshold:.0%}: "
+                + ", ".join(regressions),
+            )
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    """Returns a benchmark named after the test."""
+    config = request.config
+    baseline: dict[str, dict[str, Any]] = {}
+    baseline_file = config.getoption("--benchmark-baseline") or BASELINE_FILE
+    if not config.getoption("--benchmark-save") and baseline_file.exists():
+        baseline = json.loads(baseline_file.read_text(encoding="utf-8"))
+    return Benchmark(
+        request.node.nodeid,
+        baseline,
+        config.getoption("--benchmark-threshold"),
+    )
+
+
+def pytest_terminal_summary(
+    terminalreporter: terminal.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+    """Reports the benchmark results and saves them if requested."""
+    if not _results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<80} {'p50 ms':>8} {'p90 ms':>8} {'peak MiB':>9} {'JSON KiB':>9}",
+    )
+    for name, result in sorted(_results.items()):
+        json_kib = (
+            "" if result.json_bytes is None else f"{result.json_bytes / 1024:.0f}"
+        )
+        terminalreporter.write_line(
+            f"{name:<80} {result.p50_seconds * 1000:>8.2f} "
+            f"{result.p90_seconds * 1000:>8.2f} "
+            f"{result.peak_bytes / 2**20:>9.1f} {json_kib:>9}",
+        )
+    if config.getoption("--benchmark-save"):
+        baseline_file = config.getoption("--benchmark-baseline") or BASELINE_FILE
+        baseline = (
+            json.loads(baseline_file.read_text(encoding="utf-8"))
+            if baseline_file.exists()
+            else {}
+        )
+        baseline.update(
+            {name: dataclasses.asdict(result) for name, result in _results.items()},
+        )
+        baseline_file.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+        terminalreporter.write_line(f"Saved baseline to {baseline_file}.")
@@ -0,0 +1,54 @@
+"""Synthetic recordings for the benchmarks."""
+
+import datetime
+
+import numpy as np
+
+
+def timestamps(
+    epoch_seconds: int,
+    hours: float,
+    transition: str = "none",
+) -> list[datetime.datetime]:
+    """Creates the local timestamps of a window starting at noon.
+
+    Args:
+        epoch_seconds: The epoch length in seconds.
+        hours: The length of the window in hours.
+        transition: The daylight savings transition during the night, "none",
+            "spring" (UTC-5 to UTC-4) or "fall" (UTC-4 to UTC-5).
+
+    Returns:
+        The timestamps with fixed UTC offsets, as read from the database. The
+        transition occurs at 02:00 local time, such that the window covers one
+        hour less or more than `hours`.
+    """
+    before, after = {"none": (-5, -5), "spring": (-5, -4), "fall": (-4, -5)}[transition]
+    timezones = [
+        datetime.timezone(datetime.timedelta(hours=offset))
+        for offset in (before, after)
+    ]
+    start = datetime.datetime(2023, 3, 11, 12, tzinfo=timezones[0])
+    switch = datetime.datetime(2023, 3, 12, 2, tzinfo=timezones[0])
+    delta_time = datetime.timedelta(seconds=epoch_seconds)
+    n_points = int((hours + before - after) * 60 * 60 // epoch_seconds)
+    instants = (start + delta_time * index for index in range(n_points))
+    return [instant.astimezone(timezones[instant >= switch]) for instant in instants]
+
+
+def signals(n_points: int) -> tuple[list[float], list[float], list[bool]]:
+    """Creates a reproducible angle, arm movement and non-wear signal.
+
+    Args:
+        n_points: The number of data points.
+
+    Returns:
+        The sensor angle, arm movement and non-wear flags. Non-wear covers a
+        single block of a tenth of the window.
+    """
+    generator = np.random.default_rng(0)
+    sensor_angle = np.cumsum(generator.normal(0, 2, n_points)).clip(-90, 90)
+    sensor_acceleration = np.abs(generator.normal(0, 20, n_points))
+    non_wear = np.zeros(n_points, dtype=bool)
+    non_wear[n_points // 3 : n_points // 3 + n_points // 10] = True
+    return sensor_angle.tolist(), sensor_acceleration.tolist(), non_wear.tolist()
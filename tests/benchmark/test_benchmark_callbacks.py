@@ -0,0 +1,220 @@
+"""Benchmarks for the database reads and callbacks behind the day graph."""
+
+import datetime
+import itertools
+from collections.abc import Callable
+from typing import Any
+
+import dash
+import pytest
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.components import utils as components_utils
+from actigraphy.core import cache, callback_manager
+from actigraphy.database import models
+from actigraphy.plotting import sensor_plots
+
+from . import conftest, synthetic
+
+callback_manager.initialize_components()
+CALLBACKS: dict[str, Callable[..., Any]] = {
+    callback.func.__name__: callback.func
+    for callback in callback_manager.global_manager._callbacks
+}
+# Reading a recording at 1 second epochs takes too long to run routinely.
+EPOCHS = [5, 30]
+
+
+def _fill_recording(session: orm.Session, epoch_seconds: int) -> None:
+    """Adds four days of data points around the test day of the subject."""
+    subject = session.query(models.Subject).one()
+    day = session.query(models.Day).one()
+    timestamps = synthetic.timestamps(epoch_seconds, 4 * 24)
+    sensor_angle, sensor_acceleration, non_wear = synthetic.signals(len(timestamps))
+    shift = datetime.datetime.combine(day.date, datetime.time()) - datetime.datetime(
+        2023,
+        3,
+        11,
+    )
+    utc_timestamps = [
+        timestamp.astimezone(datetime.UTC).replace(tzinfo=None)
+        + shift
+        - datetime.timedelta(days=1)
+        for timestamp in timestamps
+    ]
+    session.execute(
+        models.DataPoint.__table__.insert(),
+        [
+            {
+                "subject_id": subject.id,
+                "timestamp": utc_timestamp,
+                "timestamp_utc_offset": int(timestamp.utcoffset().total_seconds()),  # type: ignore[union-attr]
+                "sensor_angle": angle,
+                "sensor_acceleration": acceleration,
+                "non_wear": is_non_wear,
+            }
+            for utc_timestamp, timestamp, angle, acceleration, is_non_wear in zip(
+                utc_timestamps,
+                timestamps,
+                sensor_angle,
+                sensor_acceleration,
+                non_wear,
+                strict=True,
+            )
+        ],
+    )
+    session.add_all(
+        models.NonWearInterval(
+            subject=subject,
+            start=utc_timestamps[first],
+            end=utc_timestamps[last],
+        )
+        for first, last in sensor_plots.find_continuous_blocks(non_wear)
+    )
+    session.commit()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_get_day_context_uncached(
+    benchmark: conftest.Benchmark,
+    session: orm.Session,
+    file_manager: dict[str, str],
+    epoch_seconds: int,
+) -> None:
+    """Benchmark reading the day, its sleep times and its data."""
+    _fill_recording(session, epoch_seconds)
+
+    def get_day_context() -> components_utils.DayContext:
+        cache.day_contexts.clear()
+        return components_utils.get_day_context(
+            0,
+            file_manager["database"],
+            file_manager["identifier"],
+        )
+
+    context = benchmark(get_day_context, repeats=3)
+
+    assert len(context.night.timestamps) > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_get_nights_data(
+    benchmark: conftest.Benchmark,
+    session: orm.Session,
+    file_manager: dict[str, str],
+    epoch_seconds: int,
+) -> None:
+    """Benchmark reading the data of a day, as the night comparison does."""
+    _fill_recording(session, epoch_seconds)
+
+    nights = benchmark(
+        lambda: components_utils.get_nights_data(
+            [0],
+            file_manager["database"],
+            file_manager["identifier"],
+        ),
+        repeats=3,
+    )
+
+    assert len(nights[0].timestamps) > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_create_graph_uncached(
+    benchmark: conftest.Benchmark,
+    session: orm.Session,
+    file_manager: dict[str, str],
+    epoch_seconds: int,
+) -> None:
+    """Benchmark the graph callback when the day is not cached."""
+    _fill_recording(session, epoch_seconds)
+
+    def create_graph() -> dict[str, Any]:
+        cache.sensor_figures.clear()
+        cache.sensor_series.clear()
+        cache.sleep_windows.clear()
+        cache.day_contexts.clear()
+        figure: dict[str, Any]
+        figure, _ = CALLBACKS["create_graph"]("", 0, file_manager, None, None)
+        return figure
+
+    figure = benchmark(create_graph, repeats=3, figure=True)
+
+    assert len(figure["data"]) == 2  # noqa: PLR2004
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_day_change_uncached(
+    benchmark: conftest.Benchmark,
+    session: orm.Session,
+    file_manager: dict[str, str],
+    epoch_seconds: int,
+) -> None:
+    """Benchmark all callbacks triggered by selecting a day that is not cached."""
+    _fill_recording(session, epoch_seconds)
+
+    def change_day() -> list[Any]:
+        for lru_cache in (
+            cache.sensor_figures,
+            cache.sensor_series,
+            cache.sleep_windows,
+            cache.day_contexts,
+        ):
+            lru_cache.clear()
+        _, shift, trigger = CALLBACKS["update_daylight_savings"](0, file_manager)
+        CALLBACKS["update_switches"](0, file_manager)
+        CALLBACKS["create_graph"](trigger, 0, file_manager, shift, None)
+        sliders: list[Any]
+        sliders, _, _ = CALLBACKS["refresh_range_slider"](
+            trigger,
+            0,
+            file_manager,
+            shift,
+        )
+        return sliders
+
+    sliders = benchmark(change_day, repeats=3)
+
+    assert len(sliders) == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_persist_sleep_window(
+    benchmark: conftest.Benchmark,
+    session: orm.Session,
+    file_manager: dict[str, str],
+    epoch_seconds: int,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Benchmark storing a sleep window released in the browser.
+
+    Overlaps are resolved in the browser, see `test_graph`, so this is all the
+    server does when a slider is released. The exports run in the background
+    and are not measured.
+    """
+    mocker.patch("actigraphy.components.graph.background.exports.submit")
+    _fill_recording(session, epoch_seconds)
+    sleep_time = session.query(models.SleepTime).one()
+    # Every call moves the window, such that every call writes.
+    shifts = itertools.count()
+
+    def persist() -> dash.Patch:
+        shift = next(shifts) % 60
+        commit = {
+            "index": 0,
+            "primary_key": sleep_time.id,
+            "day_index": 0,
+            "values": [60 + shift, 600 + shift],
+        }
+        patch: dash.Patch = CALLBACKS["persist_sleep_window"](commit, 0, file_manager)
+        return patch
+
+    patch = benchmark(persist)
+
+    assert patch is not dash.no_update
@@ -0,0 +1,94 @@
+"""Benchmarks for the sensor plots."""
+
+import pytest
+
+from actigraphy.components import graph
+from actigraphy.plotting import sensor_plots
+
+from . import conftest, synthetic
+
+EPOCHS = [1, 5, 30]
+TRANSITIONS = ["none", "spring", "fall"]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("transition", TRANSITIONS)
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_x_axis(
+    benchmark: conftest.Benchmark,
+    epoch_seconds: int,
+    transition: str,
+) -> None:
+    """Benchmark the x-axis and hover labels of a 36 hour window."""
+    timestamps = synthetic.timestamps(epoch_seconds, 36, transition)
+    delta_time = timestamps[1] - timestamps[0]
+
+    def x_axis() -> list[str]:
+        timezones, timezone_codes = sensor_plots._get_timezones(timestamps)
+        n_hours = sensor_plots._calculate_number_of_hours(timezones)
+        max_measurements = int(n_hours * 60 * 60 / delta_time.total_seconds())
+        _, x_tick_names, _ = sensor_plots._get_x_axis(
+            timestamps,
+            timezone_codes,
+            n_hours,
+            delta_time,
+            max_measurements,
+            (0, max_measurements),
+        )
+        return list(x_tick_names)
+
+    x_tick_names = benchmark(x_axis)
+
+    assert len(x_tick_names) > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    ("hours", "transition"),
+    [(36, "none"), (12, "none"), (36, "spring"), (36, "fall")],
+)
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_build_sensor_plot(
+    benchmark: conftest.Benchmark,
+    epoch_seconds: int,
+    hours: int,
+    transition: str,
+) -> None:
+    """Benchmark a full and a truncated day plot, with downsampling."""
+    timestamps = synthetic.timestamps(epoch_seconds, hours, transition)
+    sensor_angle, sensor_acceleration, non_wear = synthetic.signals(len(timestamps))
+
+    figure = benchmark(
+        lambda: sensor_plots.build_sensor_plot(
+            timestamps,
+            sensor_angle,
+            sensor_acceleration,
+            "Day 1",
+            non_wear_blocks=sensor_plots.find_continuous_blocks(non_wear),
+        )[0],
+        figure=True,
+    )
+
+    assert len(figure.data) == 2  # noqa: PLR2004
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epoch_seconds", EPOCHS)
+def test_build_figure(benchmark: conftest.Benchmark, epoch_seconds: int) -> None:
+    """Benchmark adding the sleep windows to a cached sensor figure."""
+    timestamps = synthetic.timestamps(epoch_seconds, 36)
+    sensor_angle, sensor_acceleration, non_wear = synthetic.signals(len(timestamps))
+    sensor_figure = sensor_plots.build_sensor_plot(
+        timestamps,
+        sensor_angle,
+        sensor_acceleration,
+        "Day 1",
+        non_wear_blocks=sensor_plots.find_continuous_blocks(non_wear),
+    )[0].to_dict()
+
+    figure = benchmark(
+        lambda: graph._build_figure(sensor_figure, [[600, 1200], [1500, 1560]]),
+        figure=True,
+    )
+
+    assert len(figure["layout"]["shapes"]) == 2  # noqa: PLR2004
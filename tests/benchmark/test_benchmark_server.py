@@ -0,0 +1,189 @@
+"""Benchmarks the throughput of the production server for a range of workers.
+
+A synthetic study is served by gunicorn, as in production, and a batch of
+concurrent reviewers requests the graph of a different day each. The caches
+are disabled, such that every request reads and plots its day. Latencies are
+those of a whole batch, i.e. the inverse of the throughput.
+"""
+
+import contextlib
+import json
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections.abc import Generator
+from concurrent import futures
+from typing import Any
+
+import pytest
+
+import actigraphy
+from actigraphy.core import utils as core_utils
+
+from . import conftest
+
+pytest.importorskip("gunicorn")
+
+N_SUBJECTS = 4
+N_DAYS = 4
+N_CONCURRENT_REQUESTS = 16
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def _environment(**variables: str) -> dict[str, str]:
+    """Returns the environment of a subprocess that imports this package."""
+    source_dir = str(pathlib.Path(actigraphy.__file__).parents[1])
+    python_path = os.pathsep.join(
+        filter(None, (source_dir, os.environ.get("PYTHONPATH"))),
+    )
+    return {**os.environ, "PYTHONPATH": python_path, **variables}
+
+
+def _run_entrypoint(entrypoint: str, *args: str) -> None:
+    """Runs an entrypoint of `actigraphy.__main__` in a new process.
+
+    A new process is needed because the test fixtures mock the database.
+    """
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            f"from actigraphy.__main__ import {entrypoint}; {entrypoint}()",
+            *args,
+        ],
+        check=True,
+        capture_output=True,
+        env=_environment(),
+    )
+
+
+@pytest.fixture(scope="module")
+def study(tmp_path_factory: pytest.TempPathFactory) -> pathlib.Path:
+    """Returns the directory of a preprocessed synthetic study."""
+    data_dir = tmp_path_factory.mktemp("study")
+    _run_entrypoint(
+        "synthetic_entrypoint",
+        *("--output-dir", str(data_dir)),
+        *("--subjects", str(N_SUBJECTS)),
+        *("--days", str(N_DAYS)),
+        *("--epoch-seconds", "30"),
+        *("--seed", "0"),
+    )
+    _run_entrypoint("preprocess_entrypoint", "--data-dir", str(data_dir))
+    return data_dir
+
+
+@contextlib.contextmanager
+def _serve(data_dir: pathlib.Path, workers: int) -> Generator[str, None, None]:
+    """Runs the production server and yields its URL once it is healthy."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = _environment(
+        ACTIGRAPHY_DATA_DIR=str(data_dir),
+        ACTIGRAPHY_FIGURE_CACHE_SIZE="0",
+        ACTIGRAPHY_DAY_CONTEXT_CACHE_SIZE="0",
+    )
+    process = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *("--config", "python:actigraphy.gunicorn_config"),
+            *("--bind", f"127.0.0.1:{port}"),
+            *("--workers", str(workers)),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        while True:
+            try:
+                with urllib.request.urlopen(f"{url}/health"):  # noqa: S310
+                    break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise
+                time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _post(url: str, payload: dict[str, Any]) -> Any:  # noqa: ANN401
+    """Posts JSON and returns the decoded response."""
+    request = urllib.request.Request(  # noqa: S310
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:  # noqa: S310
+        return json.loads(response.read())
+
+
+def _create_graph_payload(
+    file_manager: dict[str, str],
+    day_index: int,
+) -> dict[str, Any]:
+    """Returns the request Dash sends for the graph of a day."""
+    return {
+        "output": "..graph.figure...graph_x_range.data..",
+        "outputs": [
+            {"id": "graph", "property": "figure"},
+            {"id": "graph_x_range", "property": "data"},
+        ],
+        "inputs": [
+            {"id": "trigger_day_load", "property": "value", "value": "load"},
+        ],
+        "state": [
+            {"id": "day_slider", "property": "value", "value": day_index},
+            {"id": "file_manager", "property": "data", "value": file_manager},
+            {"id": "daylight_savings_shift", "property": "value", "value": None},
+            {"id": "graph_x_range", "property": "data", "value": None},
+        ],
+        "changedPropIds": ["trigger_day_load.value"],
+    }
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_create_graph_throughput(
+    benchmark: conftest.Benchmark,
+    study: pathlib.Path,
+    workers: int,
+) -> None:
+    """Benchmark a batch of concurrent graph requests."""
+    file_managers = [
+        core_utils.FileManager(subject_dir).__dict__
+        for subject_dir in sorted(study.glob("output_*"))
+    ]
+    payloads = [
+        _create_graph_payload(
+            file_managers[request % len(file_managers)],
+            request // len(file_managers) % N_DAYS,
+        )
+        for request in range(N_CONCURRENT_REQUESTS)
+    ]
+
+    with (
+        _serve(study, workers) as url,
+        futures.ThreadPoolExecutor(N_CONCURRENT_REQUESTS) as executor,
+    ):
+        endpoint = f"{url}/_dash-update-component"
+
+        def request_batch() -> list[Any]:
+            return list(
+                executor.map(lambda payload: _post(endpoint, payload), payloads),
+            )
+
+        responses = benchmark(request_batch, repeats=5)
+
+    assert all("graph" in response["response"] for response in responses)
@@ -1,15 +1,40 @@
 """Pytest configuration file."""
 
 import datetime
+import pathlib
 from collections.abc import Generator
 
 import pytest
 import pytest_mock
 from sqlalchemy import orm
 
+from actigraphy.core import cache
 from actigraphy.database import database, models
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Adds the options of the benchmarks in tests/benchmark."""
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-baseline",
+        type=pathlib.Path,
+        default=None,
+        help="The baseline results to compare against. Defaults to "
+        "tests/benchmark/baseline.json.",
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.5,
+        help="The largest allowed relative regression of any benchmark metric.",
+    )
+    group.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="Write the benchmark results to the baseline instead of comparing.",
+    )
+
+
 @pytest.fixture
 def session(in_memory_db: database.Database) -> Generator[orm.Session, None, None]:
     """Returns a database session in memory.
@@ -51,11 +76,25 @@ def _fill_database(session: orm.Session) -> None:
     session.commit()
 
 
+@pytest.fixture(autouse=True)
+def _clear_caches() -> None:
+    """Clears the caches shared across components, as the databases are not."""
+    for lru_cache in (
+        cache.sensor_figures,
+        cache.sensor_series,
+        cache.binned_data,
+        cache.sleep_windows,
+        cache.day_contexts,
+    ):
+        lru_cache.clear()
+
+
 @pytest.fixture
 def file_manager() -> dict[str, str]:
     """Return a file manager dictionary."""
     return {
         "identifier": "subject",
+        "base_dir": "",
         "database": "",
         "multiple_sleeplog_file": "",
         "missing_sleep_file": "",
@@ -0,0 +1,53 @@
+"""Tests the actogram component."""
+
+import datetime
+
+from plotly import graph_objects
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.components import utils as components_utils
+from actigraphy.database import models
+
+from . import callback_test_manager
+
+
+def test_update_actogram_patches_shapes_once_drawn(
+    session: orm.Session,
+    file_manager: dict[str, str],
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that the heatmap is sent once and only outlines are patched."""
+    subject = session.query(models.Subject).one()
+    session.add(
+        models.DataPoint(
+            timestamp=datetime.datetime(1993, 8, 26, 23),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=1,
+            non_wear=False,
+            subject=subject,
+        ),
+    )
+    session.commit()
+    callback = callback_test_manager.get_callback("update_actogram")
+    read_day_context = mocker.spy(components_utils, "_read_day_context")
+
+    figure, shown = callback("", "sensor_acceleration", 0, file_manager, None)
+    patch, _ = callback("", "sensor_acceleration", 0, file_manager, shown)
+
+    assert read_day_context.call_count == 1
+    assert isinstance(figure, graph_objects.Figure)
+    assert len(figure.layout.shapes) == 2  # noqa: PLR2004
+    operations = patch.to_plotly_json()["operations"]
+    assert [operation["location"] for operation in operations] == [
+        ["layout", "shapes"],
+    ]
+
+
+def test_select_day_from_actogram() -> None:
+    """Test that clicking the last row selects the last slider position."""
+    callback = callback_test_manager.get_callback("select_day_from_actogram")
+
+    assert callback({"points": [{"y": 3}]}, 5) == 3  # noqa: PLR2004
+    assert callback({"points": [{"y": 6}]}, 5) == 5  # noqa: PLR2004
@@ -0,0 +1,79 @@
+"""Tests the day slider component."""
+
+import datetime
+
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.components import utils
+from actigraphy.database import models
+
+from . import callback_test_manager
+
+
+def _add_spring_forward(session: orm.Session) -> None:
+    """Adds data points every 5 minutes around a shift from UTC to UTC+1."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    transition = datetime.datetime(1993, 8, 27, 1)
+    session.add_all(
+        models.DataPoint(
+            timestamp=timestamp,
+            timestamp_utc_offset=0 if timestamp < transition else 3600,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=subject,
+        )
+        for timestamp in (
+            start + datetime.timedelta(minutes=minute)
+            for minute in range(0, 36 * 60, 5)
+        )
+    )
+    session.commit()
+
+
+def test_update_daylight_savings(
+    session: orm.Session,
+    file_manager: dict[str, str],
+) -> None:
+    """Test that the last data point before the shift and the shift are found."""
+    _add_spring_forward(session)
+    callback = callback_test_manager.get_callback("update_daylight_savings")
+
+    timepoint, shift, trigger = callback(0, file_manager)
+
+    assert timepoint == "1993-08-27 00:55:00+00:00"
+    assert shift == -3600  # noqa: PLR2004
+    assert trigger
+
+
+def test_day_change_reads_context_once(
+    mocker: plugin.MockerFixture,
+    session: orm.Session,
+    file_manager: dict[str, str],
+) -> None:
+    """Test that the callbacks of a day change share a single database read."""
+    _add_spring_forward(session)
+    read_day_context = mocker.spy(utils, "_read_day_context")
+
+    _, shift, trigger = callback_test_manager.get_callback("update_daylight_savings")(
+        0,
+        file_manager,
+    )
+    callback_test_manager.get_callback("update_switches")(0, file_manager)
+    callback_test_manager.get_callback("create_graph")(
+        trigger,
+        0,
+        file_manager,
+        shift,
+        None,
+    )
+    callback_test_manager.get_callback("refresh_range_slider")(
+        trigger,
+        0,
+        file_manager,
+        shift,
+    )
+
+    assert read_day_context.call_count == 1
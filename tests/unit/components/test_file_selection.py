@@ -0,0 +1,116 @@
+"""Tests the file selection callbacks."""
+
+import datetime
+import pathlib
+
+import pytest
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.core import jobs
+from actigraphy.database import models
+
+from . import callback_test_manager
+
+
+def _subject_dir(root: pathlib.Path, identifier: str) -> str:
+    """Creates the GGIR output directory of a subject."""
+    subject_dir = root / f"output_{identifier}"
+    metadata_dir = subject_dir / "meta" / "basic"
+    metadata_dir.mkdir(parents=True)
+    (metadata_dir / f"meta_{identifier}.gt3x.RData").touch()
+    return str(subject_dir)
+
+
+@pytest.fixture
+def subject_dir(tmp_path: pathlib.Path, session: orm.Session) -> str:
+    """Returns the directory of the subject in the database."""
+    subject = session.query(models.Subject).one()
+    session.add(
+        models.DataPoint(
+            timestamp=datetime.datetime(1993, 8, 26, 12),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=subject,
+        ),
+    )
+    session.commit()
+    return _subject_dir(tmp_path, "subject")
+
+
+def test_parse_files_shows_ingested_subject(subject_dir: str) -> None:
+    """Test that a subject in its database is shown without ingesting it."""
+    parse_files = callback_test_manager.get_callback("parse_files")
+
+    components, _, file_manager, _, is_polling_disabled, _ = parse_files(
+        1,
+        subject_dir,
+    )
+
+    assert len(components) > 0
+    assert file_manager["identifier"] == "subject"
+    assert is_polling_disabled
+
+
+def test_parse_files_submits_ingest(
+    mocker: plugin.MockerFixture,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that a new subject is ingested in the background."""
+    new_subject_dir = _subject_dir(tmp_path, "new")
+    job = jobs.Job(key="key", run_id="run", state="queued")
+    submit = mocker.patch("actigraphy.core.jobs.ingests.submit", return_value=job)
+    mocker.patch("actigraphy.core.jobs.ingests.queue_position", return_value=2)
+    parse_files = callback_test_manager.get_callback("parse_files")
+
+    components, _, file_manager, progress, is_polling_disabled, filepath = parse_files(
+        1,
+        new_subject_dir,
+    )
+
+    assert submit.call_args.args[0] == f"{new_subject_dir}/actigraphy.sqlite"
+    assert (components, file_manager) == ([], None)
+    assert "position 3" in progress.children[0].children
+    assert not is_polling_disabled
+    assert filepath == new_subject_dir
+
+
+def test_poll_ingest_shows_subject_when_done(
+    mocker: plugin.MockerFixture,
+    subject_dir: str,
+) -> None:
+    """Test that polling stops and shows the subject once it is ingested."""
+    job = jobs.Job(key="key", run_id="run", state="done", progress=1)
+    mocker.patch("actigraphy.core.jobs.ingests.get", return_value=job)
+    poll_ingest = callback_test_manager.get_callback("poll_ingest")
+
+    components, file_manager, progress, is_polling_disabled = poll_ingest(
+        3,
+        subject_dir,
+    )
+
+    assert len(components) > 0
+    assert file_manager["identifier"] == "subject"
+    assert (progress, is_polling_disabled) == (None, True)
+
+
+def test_search_subjects_limits_matches(
+    mocker: plugin.MockerFixture,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that a search lists the first subjects and keeps the selection."""
+    for identifier in ("a1", "b1", "b2", "b3"):
+        (tmp_path / f"output_{identifier}").mkdir()
+    mocker.patch("actigraphy.io.subject_index.SUBJECT_PAGE_SIZE", 2)
+    search_subjects = callback_test_manager.get_callback("search_subjects")
+
+    options = search_subjects("b", str(tmp_path / "output_a1"), str(tmp_path))
+
+    assert [option["label"] for option in options] == [
+        "a1",
+        "b1",
+        "b2",
+        "1 more, type to narrow down.",
+    ]
@@ -0,0 +1,371 @@
+"""Tests the graph component."""
+
+import datetime
+import json
+import pathlib
+import shutil
+import subprocess
+from typing import Any
+
+import dash
+import numpy as np
+import pytest
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.components import graph
+from actigraphy.components import utils as components_utils
+from actigraphy.core import cache, config
+from actigraphy.database import models
+from actigraphy.plotting import sensor_plots
+
+from . import callback_test_manager
+
+N_SLIDER_STEPS = config.get_settings().N_SLIDER_STEPS
+SLEEP_WINDOWS_JS = (
+    pathlib.Path(graph.__file__).parents[1] / "assets" / "sleep_windows.js"
+)
+
+requires_node = pytest.mark.skipif(
+    shutil.which("node") is None,
+    reason="Node.js is required to test the clientside callbacks.",
+)
+
+
+def _run_javascript(expression: str, args: Any) -> Any:  # noqa: ANN401
+    """Evaluates a JavaScript expression with the sleep window callbacks loaded.
+
+    Args:
+        expression: The expression; `args` and `sleepWindows` are in scope.
+        args: The JSON serializable arguments.
+
+    Returns:
+        The result of the expression, deserialized from JSON.
+    """
+    script = (
+        f"const sleepWindows = require({json.dumps(str(SLEEP_WINDOWS_JS))});"
+        "const args = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        f"process.stdout.write(JSON.stringify({expression}));"
+    )
+    result = subprocess.run(  # noqa: S603
+        ["node", "-e", script],  # noqa: S607
+        input=json.dumps(args),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _random_windows(
+    generator: np.random.Generator,
+    n_windows: int,
+) -> list[list[int]]:
+    """Returns random, possibly overlapping, sleep windows."""
+    onsets = generator.integers(0, N_SLIDER_STEPS, n_windows)
+    lengths = generator.integers(0, N_SLIDER_STEPS // 8, n_windows)
+    wakeups = np.minimum(onsets + lengths, N_SLIDER_STEPS)
+    return [
+        [onset, wakeup]
+        for onset, wakeup in zip(onsets.tolist(), wakeups.tolist(), strict=True)
+    ]
+
+
+@requires_node
+def test_resolve_overlap() -> None:
+    """Test that the window is clipped to, or moved into, the nearest gap."""
+    cases = [
+        ([50, 200], [[0, 100]], [101, 200]),
+        ([0, 150], [[100, 200]], [0, 99]),
+        ([0, 300], [[100, 200]], [0, 99]),
+        ([0, 400], [[100, 200]], [201, 400]),
+        ([120, 150], [[100, 200]], [69, 99]),
+        ([110, 120], [[0, 100], [101, 200]], [201, 211]),
+        ([10, 20], [[0, 5], [30, 40]], [10, 20]),
+        ([], [[0, 5]], []),
+        (
+            [10, 20],
+            [[0, N_SLIDER_STEPS // 2], [N_SLIDER_STEPS // 2 + 1, N_SLIDER_STEPS]],
+            None,
+        ),
+    ]
+
+    actual = _run_javascript(
+        "args.cases.map(([drag, others]) =>"
+        "  sleepWindows.resolveOverlap(drag, others, args.limits))",
+        {"cases": [case[:2] for case in cases], "limits": [0, N_SLIDER_STEPS]},
+    )
+
+    assert actual == [expected for _, _, expected in cases]
+
+
+@requires_node
+def test_resolve_overlap_properties() -> None:
+    """Test the invariants of the browser's overlap resolution on random windows."""
+    generator = np.random.default_rng(0)
+    cases = []
+    for _ in range(500):
+        drag_values, *other_drag_values = _random_windows(
+            generator,
+            int(generator.integers(2, 40)),
+        )
+        cases.append((drag_values, other_drag_values))
+
+    results = _run_javascript(
+        "args.cases.map(([drag, others]) => {"
+        "  const resolve = (values, windows) =>"
+        "    sleepWindows.resolveOverlap(values, windows, args.limits);"
+        "  const actual = resolve(drag, others);"
+        "  return [actual, resolve(actual, others), resolve(drag, others.reverse())];"
+        "})",
+        {"cases": cases, "limits": [0, N_SLIDER_STEPS]},
+    )
+
+    for (drag_values, other_drag_values), (actual, again, reversed_others) in zip(
+        cases,
+        results,
+        strict=True,
+    ):
+        assert 0 <= actual[0] <= actual[1] <= N_SLIDER_STEPS
+        assert all(
+            actual[1] < other[0] or actual[0] > other[1] for other in other_drag_values
+        )
+        assert actual[1] - actual[0] <= drag_values[1] - drag_values[0]
+        assert again == actual
+        assert reversed_others == actual
+        free = set(range(drag_values[0], drag_values[1] + 1)).difference(
+            *(range(other[0], other[1] + 1) for other in other_drag_values),
+        )
+        if free:
+            assert drag_values[0] <= actual[0] <= actual[1] <= drag_values[1]
+            assert actual[0] in free
+        if len(free) == drag_values[1] - drag_values[0] + 1:
+            assert actual == drag_values
+
+
+@requires_node
+def test_update_sleep_windows() -> None:
+    """Test that a released slider is resolved, drawn and sent for persistence."""
+    figure: dict[str, Any] = {
+        "data": [],
+        "layout": {"shapes": [{"x0": 0, "x1": 10}, {"x0": 20, "x1": 30}, {}]},
+    }
+
+    actual = _run_javascript(
+        "(() => {"
+        "  dash_clientside.no_update = 'no_update';"
+        "  dash_clientside.callback_context = {triggered: [{"
+        '    prop_id: \'{"index":1,"type":"range_slider"}.value\'}]};'
+        "  return sleepWindows.updateSleepWindows(...args);"
+        "})()",
+        [
+            [[0, 100], [50, 400]],
+            [0, 0],
+            [N_SLIDER_STEPS, N_SLIDER_STEPS],
+            ["7", "8"],
+            2,
+            figure,
+            [0, N_SLIDER_STEPS],
+        ],
+    )
+
+    drag_values, new_figure, commit = actual
+    assert drag_values == [[0, 100], [101, 400]]
+    assert new_figure["layout"]["shapes"][1] == {"x0": 101, "x1": 400}
+    assert new_figure["layout"]["shapes"][0] == {"x0": 0, "x1": 10}
+    assert figure["layout"]["shapes"][1] == {"x0": 20, "x1": 30}
+    assert {key: commit[key] for key in ("index", "primary_key", "day_index")} == {
+        "index": 1,
+        "primary_key": 8,
+        "day_index": 2,
+    }
+    assert commit["values"] == [101, 400]
+
+
+@requires_node
+def test_update_sleep_windows_without_gap() -> None:
+    """Test that a window without a free gap is neither moved nor stored."""
+    actual = _run_javascript(
+        "(() => {"
+        "  dash_clientside.no_update = 'no_update';"
+        "  dash_clientside.callback_context = {triggered: [{"
+        '    prop_id: \'{"index":0,"type":"range_slider"}.value\'}]};'
+        "  return sleepWindows.updateSleepWindows(...args);"
+        "})()",
+        [
+            [[10, 20], [0, N_SLIDER_STEPS]],
+            [0, 0],
+            [N_SLIDER_STEPS, N_SLIDER_STEPS],
+            ["7", "8"],
+            0,
+            {"data": [], "layout": {"shapes": [{}, {}]}},
+            [0, N_SLIDER_STEPS],
+        ],
+    )
+
+    assert actual == ["no_update", "no_update", "no_update"]
+
+
+def test_persist_sleep_window(
+    mocker: plugin.MockerFixture,
+    session: orm.Session,
+    file_manager: dict[str, str],
+) -> None:
+    """Test that the sleep window is written and its exports are queued."""
+    submit = mocker.patch("actigraphy.components.graph.background.exports.submit")
+    sleep_time = session.query(models.SleepTime).one()
+    session.add(
+        models.DataPoint(
+            timestamp=datetime.datetime(1993, 8, 26, 12),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=session.query(models.Subject).one(),
+        ),
+    )
+    session.commit()
+    callback = callback_test_manager.get_callback("persist_sleep_window")
+    commit = {
+        "index": 0,
+        "primary_key": sleep_time.id,
+        "day_index": 0,
+        "values": [60, 120],
+    }
+
+    actual = callback(commit, 0, file_manager).to_plotly_json()
+    other_day = callback(commit, 1, file_manager)
+
+    sleep_time = session.query(models.SleepTime).one()
+    assert sleep_time.onset_with_tz == datetime.datetime(
+        1993,
+        8,
+        26,
+        13,
+        tzinfo=datetime.UTC,
+    )
+    assert sleep_time.wakeup_with_tz == datetime.datetime(
+        1993,
+        8,
+        26,
+        14,
+        tzinfo=datetime.UTC,
+    )
+    assert actual["operations"][0]["location"] == [0]
+    assert actual["operations"][0]["params"]["value"]["duration"] == "1:00:00"
+    assert other_day is dash.no_update
+    assert submit.call_count == 2  # noqa: PLR2004
+
+
+def test_figure_patch() -> None:
+    """Test that a day switch patches traces, title, ticks and shapes only."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(36 * 60)]
+    values = [float(i) for i in range(len(timestamps))]
+    sensor_figure, _ = sensor_plots.build_sensor_plot(
+        timestamps,
+        values,
+        values,
+        "Day 2",
+    )
+    figure = graph._build_figure(sensor_figure.to_dict(), [(60, 120)])
+
+    actual = graph._figure_patch(figure).to_plotly_json()
+
+    locations = [operation["location"] for operation in actual["operations"]]
+    assert ["data", 0, "x"] in locations
+    assert ["data", 1, "customdata"] in locations
+    assert ["layout", "title", "text"] in locations
+    assert ["layout", "xaxis", "ticktext"] in locations
+    assert ["layout", "shapes"] in locations
+    assert not any(location[:2] == ["layout", "legend"] for location in locations)
+    x_operation = actual["operations"][locations.index(["data", 0, "x"])]
+    assert "bdata" in x_operation["params"]["value"]
+
+
+def test_build_figure_does_not_modify_sensor_figure() -> None:
+    """Test that sleep windows are prepended without touching cached figures."""
+    sensor_figure: dict[str, Any] = {
+        "data": [],
+        "layout": {
+            "title": {"text": "Day 1"},
+            "xaxis": {"range": [0, 100]},
+            "shapes": [{"name": "non-wear"}],
+        },
+    }
+
+    actual = graph._build_figure(sensor_figure, [(0, N_SLIDER_STEPS // 2)])
+
+    assert [shape["name"] for shape in actual["layout"]["shapes"]] == [
+        graph.SLEEP_WINDOW_LABEL,
+        "non-wear",
+    ]
+    assert actual["layout"]["shapes"][0]["x1"] == 50  # noqa: PLR2004
+    assert sensor_figure["layout"]["shapes"] == [{"name": "non-wear"}]
+
+
+def test_resample_on_zoom(
+    session: orm.Session,
+    file_manager: dict[str, str],
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that zooming patches the traces and other relayouts are ignored."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(36 * 60)]
+    values = [float(i) for i in range(len(timestamps))]
+    subject = session.query(models.Subject).one()
+    cache.sensor_series.put(
+        graph._sensor_figure_key(file_manager, 0, subject),
+        sensor_plots.build_sensor_series(timestamps, values, values),
+    )
+    callback = callback_test_manager.get_callback("resample_on_zoom")
+    read_day_context = mocker.spy(components_utils, "_read_day_context")
+
+    ignored = callback({"dragmode": "pan"}, 0, file_manager, [0, 2160])
+    callback({"xaxis.autorange": True}, 0, file_manager, [0, 2160])
+    actual = callback(
+        {"xaxis.range[0]": 100, "xaxis.range[1]": 200},
+        0,
+        file_manager,
+        [0, 2160],
+    ).to_plotly_json()
+
+    assert ignored is dash.no_update
+    assert read_day_context.call_count == 1
+    locations = [operation["location"] for operation in actual["operations"]]
+    assert ["data", 1, "customdata"] in locations
+    assert "bdata" in actual["operations"][0]["params"]["value"]
+
+
+def test_create_graph_sleep_windows_follow_ingest(
+    session: orm.Session,
+    file_manager: dict[str, str],
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that cached sleep windows are not reused for a re-ingested subject."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=subject,
+        )
+        for minute in range(0, 24 * 60, 5)
+    )
+    session.commit()
+    callback = callback_test_manager.get_callback("create_graph")
+    sleep_window_points = mocker.spy(components_utils, "sleep_window_points")
+
+    callback("", 0, file_manager, None, None)
+    session.query(models.Subject).update(
+        {models.Subject.time_created: datetime.datetime(2000, 1, 1)},
+    )
+    session.commit()
+    cache.day_contexts.clear()
+    callback("", 0, file_manager, None, None)
+
+    assert sleep_window_points.call_count == 2  # noqa: PLR2004
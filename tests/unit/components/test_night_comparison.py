@@ -0,0 +1,78 @@
+"""Tests the night comparison component."""
+
+import datetime
+
+from plotly import graph_objects
+from sqlalchemy import orm
+
+from actigraphy.components import utils
+from actigraphy.database import models
+
+from . import callback_test_manager
+
+
+def _add_nights(session: orm.Session) -> None:
+    """Adds a second day and data points every 5 minutes from noon to noon."""
+    subject = session.query(models.Subject).one()
+    session.add(models.Day(date=datetime.date(1993, 8, 27), subject=subject))
+    start = datetime.datetime(1993, 8, 26, 12)
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=0,
+            sensor_angle=minute,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=subject,
+        )
+        for minute in range(0, 2 * 24 * 60, 5)
+    )
+    session.commit()
+
+
+def test_get_nights_data(session: orm.Session, file_manager: dict[str, str]) -> None:
+    """Test that overlapping nights each hold all of their data points."""
+    _add_nights(session)
+    session.add(
+        models.NonWearInterval(
+            start=datetime.datetime(1993, 8, 27, 10),
+            end=datetime.datetime(1993, 8, 27, 13),
+            subject=session.query(models.Subject).one(),
+        ),
+    )
+    session.commit()
+
+    first, second = utils.get_nights_data(
+        [0, 1],
+        file_manager["database"],
+        file_manager["identifier"],
+    )
+
+    assert len(first.timestamps) == 36 * 12
+    assert len(second.timestamps) == 24 * 12
+    assert first.timestamps[0] == datetime.datetime(
+        1993,
+        8,
+        26,
+        12,
+        tzinfo=datetime.UTC,
+    )
+    assert second.timestamps[0].date() == datetime.date(1993, 8, 27)
+    assert len(first.day.sleep_times) == 1
+    assert first.non_wear_blocks == [(22 * 12, 25 * 12)]
+    assert second.non_wear_blocks == [(0, 12)]
+
+
+def test_update_comparison(session: orm.Session, file_manager: dict[str, str]) -> None:
+    """Test that the selected nights are plotted with their sleep windows."""
+    _add_nights(session)
+    callback = callback_test_manager.get_callback("update_comparison")
+
+    figure = callback([1, 0], "sensor_angle", "stacked", file_manager)
+
+    assert isinstance(figure, graph_objects.Figure)
+    assert [trace.name for trace in figure.data] == [
+        "Day 1: Thu 26 Aug",
+        "Day 2: Fri 27 Aug",
+    ]
+    assert len(figure.layout.shapes) == 1
@@ -5,33 +5,39 @@ directly. Instead, we use global manager to get the callback function and then
 call it with the appropriate arguments.
 """
 
-from typing import NamedTuple
+from sqlalchemy import orm
 
-from pytest_mock import plugin
+from actigraphy.database import models
 
 from . import callback_test_manager
 
 
-def test_update_switches(
-    mocker: plugin.MockerFixture,
-    file_manager: dict[str, str],
-) -> None:
+def test_update_switches(session: orm.Session, file_manager: dict[str, str]) -> None:
     """Test the update_switches function."""
-
-    class MockReturn(NamedTuple):
-        is_multiple_sleep: bool = True
-        is_missing_sleep: bool = True
-        is_reviewed: bool = True
-
-    expected_status_flags = (True, True, True)
-    mocker.patch(
-        "actigraphy.components.switches.crud.read_day_by_subject",
-        return_value=MockReturn(),
-    )
+    day = session.query(models.Day).one()
+    day.is_multiple_sleep = True
+    day.is_missing_sleep = True
+    day.is_reviewed = True
+    session.commit()
     update_switches_callback = callback_test_manager.get_callback("update_switches")
 
     actual_status_flags = update_switches_callback(0, file_manager)
 
-    assert actual_status_flags == expected_status_flags, (
+    assert actual_status_flags == (True, True, True), (
         "update_switches did not return the expected status flags"
     )
+
+
+def test_toggle_review_night_refreshes_switches(
+    file_manager: dict[str, str],
+) -> None:
+    """Test that a toggled switch is not reset from a stale day context."""
+    update_switches = callback_test_manager.get_callback("update_switches")
+    toggle_review_night = callback_test_manager.get_callback("toggle_review_night")
+
+    before = update_switches(0, file_manager)
+    toggle_review_night(True, 0, file_manager)
+    after = update_switches(0, file_manager)
+
+    assert before == (False, False, False)
+    assert after == (False, False, True)
@@ -0,0 +1,40 @@
+"""Unit tests for the actogram plotting module."""
+
+import datetime
+
+import numpy as np
+
+from actigraphy.plotting import actogram
+
+DATES = [datetime.date(1970, 1, 1), datetime.date(1970, 1, 2)]
+
+
+def test_actogram_matrix_is_double_plotted() -> None:
+    """Test that each row holds its own day followed by the next day."""
+    day = 24 * 60 * 60
+    bin_starts = [0, 6 * 3600, day, day + 6 * 3600, 2 * day]
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    actual = actogram.actogram_matrix(DATES, bin_starts, values, 6 * 60)
+
+    np.testing.assert_array_equal(
+        actual,
+        [
+            [1, 2, np.nan, np.nan, 3, 4, np.nan, np.nan],
+            [3, 4, np.nan, np.nan, 5] + [np.nan] * 3,
+        ],
+    )
+
+
+def test_window_shapes_are_drawn_on_both_rows() -> None:
+    """Test that a window is drawn on its row and shifted on the previous row."""
+    tz = datetime.timezone(datetime.timedelta(hours=-4))
+    start = datetime.datetime(1970, 1, 2, 22, tzinfo=tz)
+    end = datetime.datetime(1970, 1, 3, 7, tzinfo=tz)
+
+    actual = actogram.window_shapes(DATES, [(1, start, end)], "red")
+
+    assert [(shape["x0"], shape["x1"], shape["y0"]) for shape in actual] == [
+        (22, 31, 0.5),
+        (46, 48, -0.5),
+    ]
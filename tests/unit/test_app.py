@@ -24,10 +24,7 @@ def test_create_app(mocker: plugin.MockerFixture) -> None:
     mock_dash = mocker.patch("actigraphy.app.dash.Dash", autospec=True)
     mocker.patch("actigraphy.app.callback_manager.initialize_components")
     mocker.patch("actigraphy.app.callback_manager.global_manager.attach_to_app")
-    mocker.patch(
-        "actigraphy.app.cli.get_subject_folders",
-        return_value=["dir1", "dir2"],
-    )
+    mocker.patch("actigraphy.app.cli.get_input_folder", return_value="data")
     mocker.patch(
         "actigraphy.app.file_selection.file_selection",
         return_value=mocker.MagicMock(),
@@ -44,6 +41,7 @@ def test_create_app(mocker: plugin.MockerFixture) -> None:
     assert isinstance(actual, mock.NonCallableMagicMock)
     mock_dash.assert_called_once_with(
         app.APP_NAME,
+        assets_folder=str(app.ASSETS_DIR),
         external_stylesheets=[dash_bootstrap_components.themes.BOOTSTRAP],
     )
     assert actual.title == app.APP_NAME
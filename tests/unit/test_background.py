@@ -0,0 +1,28 @@
+"""Unit tests for the background module."""
+
+import threading
+
+from actigraphy.core import background
+
+
+def test_submit_coalesces_queued_tasks() -> None:
+    """Test that a task is queued once, and again once it has started."""
+    queue = background.SerialQueue()
+    started = threading.Event()
+    release = threading.Event()
+    completed: list[str] = []
+
+    def blocking_task() -> None:
+        started.set()
+        release.wait(timeout=5)
+        completed.append("blocking")
+
+    queue.submit("block", blocking_task)
+    started.wait(timeout=5)
+    queue.submit("export", lambda: completed.append("first"))
+    queue.submit("export", lambda: completed.append("second"))
+    queue.submit("block", blocking_task)
+    release.set()
+    queue.join()
+
+    assert completed == ["blocking", "first", "blocking"]
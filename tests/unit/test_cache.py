@@ -0,0 +1,114 @@
+"""Unit tests for the cache module."""
+
+import pathlib
+import threading
+import time
+
+from pytest_mock import plugin
+
+from actigraphy.core import cache
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    """Test that the least recently used entry is evicted and stats are kept."""
+    lru_cache = cache.LRUCache(max_size=2)
+    lru_cache.put("a", 1)
+    lru_cache.put("b", 2)
+    lru_cache.get("a")
+    lru_cache.put("c", 3)
+
+    assert "a" in lru_cache
+    assert "b" not in lru_cache
+    assert lru_cache.get("b") is None
+    assert lru_cache.stats.hits == 1
+    assert lru_cache.stats.misses == 1
+    assert lru_cache.stats.evictions == 1
+    assert lru_cache.stats.hit_rate == 0.5  # noqa: PLR2004
+
+
+def test_lru_cache_disk_tier(tmp_path: pathlib.Path) -> None:
+    """Test that evicted entries are read back from disk."""
+    lru_cache = cache.LRUCache(max_size=1, cache_dir=tmp_path, max_disk_size=2)
+    lru_cache.put(("subject", 0), {"data": [1, 2]})
+    lru_cache.put(("subject", 1), {"data": [3]})
+    lru_cache.put(("subject", 2), {"data": [4]})
+
+    actual = cache.LRUCache(max_size=1, cache_dir=tmp_path).get(("subject", 2))
+
+    assert actual == {"data": [4]}
+    assert len(list(tmp_path.glob("*.pkl"))) == 2  # noqa: PLR2004
+
+
+def test_get_or_create_with_version_counter() -> None:
+    """Test that bumping a version invalidates entries keyed by it."""
+    lru_cache = cache.LRUCache(max_size=4)
+    versions = cache.VersionCounter()
+    calls: list[None] = []
+
+    def factory() -> int:
+        calls.append(None)
+        return len(calls)
+
+    first = lru_cache.get_or_create(("subject", versions.get("subject")), factory)
+    second = lru_cache.get_or_create(("subject", versions.get("subject")), factory)
+    versions.bump("subject")
+    third = lru_cache.get_or_create(("subject", versions.get("subject")), factory)
+
+    assert (first, second, third) == (1, 1, 2)
+
+
+def test_version_counter_uses_store(mocker: plugin.MockerFixture) -> None:
+    """Test that versions are read from and bumped in the store, if set."""
+    versions = cache.VersionCounter()
+    store = mocker.MagicMock()
+    store.get.return_value = 3
+    store.bump.return_value = 4
+
+    versions.use_store(store)
+    actual = (versions.get("subject"), versions.bump("subject"))
+    versions.use_store(None)
+
+    assert actual == (3, 4)
+    assert versions.get("subject") == 0
+    store.bump.assert_called_once_with("subject")
+
+
+def test_lru_cache_entries_expire(mocker: plugin.MockerFixture) -> None:
+    """Test that entries are not returned after their lifetime."""
+    monotonic = mocker.patch("actigraphy.core.cache.time.monotonic", return_value=0)
+    lru_cache = cache.LRUCache(max_size=2, ttl_seconds=10)
+    lru_cache.put("a", 1)
+
+    monotonic.return_value = 9
+    fresh = lru_cache.get("a")
+    monotonic.return_value = 10
+    expired = lru_cache.get("a")
+
+    assert (fresh, expired) == (1, None)
+    assert "a" not in lru_cache
+
+
+def test_get_or_create_calls_factory_once_concurrently() -> None:
+    """Test that concurrent lookups of a missing entry share one factory call."""
+    lru_cache = cache.LRUCache(max_size=2)
+    calls: list[None] = []
+
+    def factory() -> int:
+        calls.append(None)
+        time.sleep(0.05)
+        return len(calls)
+
+    results: list[int] = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(lru_cache.get_or_create("a", factory)),
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1, 1, 1, 1]
+    assert len(calls) == 1
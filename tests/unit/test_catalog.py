@@ -0,0 +1,226 @@
+"""Unit tests for the study catalog."""
+
+import argparse
+import contextlib
+import dataclasses
+import datetime
+import os
+import pathlib
+import sqlite3
+
+import pytest
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.core import utils as core_utils
+from actigraphy.database import database, models
+from actigraphy.io import catalog, preprocess, synthetic
+
+# The tests replace the class with an in-memory database, see conftest.py.
+FILE_DATABASE = database.Database
+
+
+@pytest.fixture
+def file_manager(tmp_path: pathlib.Path) -> core_utils.FileManager:
+    """Returns the file manager of a subject with small GGIR files."""
+    subject_dir = tmp_path / "output_subject"
+    (subject_dir / "meta" / "basic").mkdir(parents=True)
+    (subject_dir / "meta" / "ms4.out").mkdir(parents=True)
+    (subject_dir / "meta" / "basic" / "meta_subject.gt3x.RData").write_bytes(b"meta")
+    (subject_dir / "meta" / "ms4.out" / "subject.gt3x.RData").write_bytes(b"ms4")
+    return core_utils.FileManager(subject_dir)
+
+
+def test_refresh_hashes_only_touched_files(
+    file_manager: core_utils.FileManager,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that unchanged files are recognized without reading them."""
+    entry = catalog.describe_subject(file_manager, ingest_version=1, n_days=3)
+    hash_file = mocker.spy(catalog, "_hash_file")
+
+    unchanged = entry.refresh(file_manager, ingest_version=1)
+    os.utime(file_manager.ms4_file, ns=(0, entry.ms4.mtime_ns + 10**9))
+    touched = entry.refresh(file_manager, ingest_version=1)
+
+    assert unchanged == entry
+    assert hash_file.call_count == 1
+    assert touched is not None
+    assert touched.ms4.mtime_ns == entry.ms4.mtime_ns + 10**9
+    assert touched.ms4.sha256 == entry.ms4.sha256
+
+
+def test_refresh_detects_changed_files_and_ingest(
+    file_manager: core_utils.FileManager,
+) -> None:
+    """Test that new content, missing files and a new ingest are detected."""
+    entry = catalog.describe_subject(file_manager, ingest_version=1, n_days=3)
+
+    new_version = entry.refresh(file_manager, ingest_version=2)
+    pathlib.Path(file_manager.metadata_file).write_bytes(b"regenerated")
+    changed = entry.refresh(file_manager, ingest_version=1)
+    pathlib.Path(file_manager.ms4_file).unlink()
+    missing = entry.refresh(file_manager, ingest_version=1)
+
+    assert new_version is None
+    assert changed is None
+    assert missing is None
+
+
+def test_catalog_stores_entries(
+    tmp_path: pathlib.Path,
+    file_manager: core_utils.FileManager,
+) -> None:
+    """Test that entries round trip and the finished flag is updated."""
+    study_catalog = catalog.Catalog(tmp_path)
+    entry = catalog.describe_subject(
+        file_manager,
+        ingest_version=1,
+        n_days=3,
+        ingest_seconds=1.5,
+    )
+
+    missing = study_catalog.get("subject")
+    study_catalog.put(entry)
+    stored = study_catalog.get("subject")
+    catalog.get_catalog(file_manager.base_dir).set_finished(
+        "subject",
+        is_finished=True,
+    )
+
+    assert missing is None
+    assert stored == entry
+    assert study_catalog.entries() == [dataclasses.replace(entry, is_finished=True)]
+
+
+def _write_synthetic_subject(output_dir: pathlib.Path) -> core_utils.FileManager:
+    """Writes the GGIR files of a small synthetic subject."""
+    spec = synthetic.SubjectSpec(
+        identifier="sub001",
+        start=datetime.datetime(2023, 3, 11, 14),
+        n_days=2,
+        epoch_seconds=60,
+        non_wear_fraction=0,
+        transition="none",
+        transition_day=0,
+        seed=(0, 0),
+    )
+    return core_utils.FileManager(synthetic.write_subject(spec, output_dir))
+
+
+def test_create_subject_database_adds_subject(tmp_path: pathlib.Path) -> None:
+    """Test that an ingest is recorded in the catalog of its output folder."""
+    file_manager = _write_synthetic_subject(tmp_path)
+
+    preprocess.create_subject_database(file_manager)
+    entry = catalog.Catalog(tmp_path).get("sub001")
+
+    assert entry is not None
+    assert entry.ingest_version == preprocess.INGEST_VERSION
+    assert entry.n_days == 3  # noqa: PLR2004
+    assert not entry.is_finished
+    assert entry.ingest_seconds is not None
+    assert entry.refresh(file_manager, preprocess.INGEST_VERSION) == entry
+
+
+def test_existing_subject_is_backfilled(
+    session: orm.Session,
+    file_manager: core_utils.FileManager,
+) -> None:
+    """Test that cataloging an older database derives its non-wear intervals."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=minute >= 2,  # noqa: PLR2004
+            subject=subject,
+        )
+        for minute in range(4)
+    )
+    session.commit()
+
+    entry = preprocess._describe_existing_subject(file_manager)
+
+    intervals = session.query(models.NonWearInterval).all()
+    assert [(interval.start, interval.end) for interval in intervals] == [
+        (start + datetime.timedelta(minutes=2), start + datetime.timedelta(minutes=3)),
+    ]
+    assert entry is not None
+    assert entry.n_days == 1
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_run_keeps_annotated_subjects_unless_forced(
+    tmp_path: pathlib.Path,
+    file_manager: core_utils.FileManager,
+    mocker: plugin.MockerFixture,
+    *,
+    force: bool,
+) -> None:
+    """Test that annotations are only replaced with --force, keeping a backup."""
+    with contextlib.closing(sqlite3.connect(file_manager.database)) as connection:
+        connection.execute("PRAGMA user_version = 1")
+    catalog.Catalog(tmp_path).put(
+        catalog.describe_subject(
+            file_manager,
+            ingest_version=preprocess.INGEST_VERSION - 1,
+            n_days=1,
+        ),
+    )
+    mocker.patch(
+        "actigraphy.io.preprocess.parse_args",
+        return_value=argparse.Namespace(data_dir=tmp_path, identifier="", force=force),
+    )
+    create = mocker.patch("actigraphy.io.preprocess.create_subject_database")
+
+    preprocess.run()
+
+    backups = list(pathlib.Path(file_manager.base_dir).glob("actigraphy.sqlite.*.bak"))
+    assert create.call_count == len(backups) == int(force)
+    assert pathlib.Path(file_manager.database).exists()
+
+
+def test_replace_database(tmp_path: pathlib.Path) -> None:
+    """Test that a database is replaced by a new file with a later version."""
+    current, new = tmp_path / "current.sqlite", tmp_path / "new.sqlite"
+    with contextlib.closing(sqlite3.connect(current)) as connection:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA user_version = 5")
+    with contextlib.closing(sqlite3.connect(new)) as connection:
+        connection.execute("CREATE TABLE subjects (name TEXT)")
+
+    preprocess._replace_database(str(current), str(new))
+
+    with contextlib.closing(sqlite3.connect(current)) as connection:
+        tables = connection.execute("SELECT name FROM sqlite_master").fetchall()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+    assert (tables, version) == ([("subjects",)], 6)
+    assert not new.exists()
+
+
+def test_run_ingests_empty_databases(
+    tmp_path: pathlib.Path,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that a database left empty by an interrupted ingest is ingested."""
+    mocker.patch("actigraphy.database.database.Database", FILE_DATABASE)
+    file_manager = _write_synthetic_subject(tmp_path)
+    database.Database(file_manager.database).create_database()
+    mocker.patch(
+        "actigraphy.io.preprocess.parse_args",
+        return_value=argparse.Namespace(data_dir=tmp_path, identifier="", force=False),
+    )
+
+    preprocess.run()
+    preprocess.run()
+
+    entry = catalog.Catalog(tmp_path).get("sub001")
+    with contextlib.closing(sqlite3.connect(file_manager.database)) as connection:
+        n_subjects = connection.execute("SELECT COUNT(*) FROM subjects").fetchone()[0]
+    assert entry is not None
+    assert entry.n_days == 3  # noqa: PLR2004
+    assert n_subjects == 1
@@ -26,14 +26,13 @@ def test_parse_args(mocker: plugin.MockerFixture) -> None:
     assert args.verbosity == logging.INFO
 
 
-def test_get_subject_folders(tmp_path: pathlib.Path) -> None:
-    """Test that get_subject_folders finds all output_ directories."""
-    (tmp_path / "output_test").mkdir()
-    args = argparse.Namespace(input_folder=str(tmp_path))
+def test_get_input_folder_is_absolute() -> None:
+    """Test that a relative input folder is resolved against the working directory."""
+    args = argparse.Namespace(input_folder="data")
 
-    result = cli.get_subject_folders(args)
+    result = cli.get_input_folder(args)
 
-    assert result[0] == str(tmp_path / "output_test")
+    assert result == pathlib.Path.cwd() / "data"
 
 
 def test__add_string_quotation_string() -> None:
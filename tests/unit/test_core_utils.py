@@ -2,6 +2,9 @@
 
 import datetime
 
+import numpy as np
+import pytest
+
 from actigraphy.core import utils
 
 
@@ -29,3 +32,82 @@ def test_point2time() -> None:
     actual = utils.point2time(point, date, 0, None, None)
 
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    ("timezone_offset", "daylight_savings_timepoint", "daylight_savings_shift"),
+    [
+        (0, None, None),
+        (-5 * 3600, "2023-03-12 01:59:00-05:00", -3600),
+        (-4 * 3600, "2023-11-05 01:59:00-04:00", 3600),
+        (19800, "2023-03-12 00:00:00+05:30", 1800),
+    ],
+)
+def test_points2times_matches_point2time(
+    timezone_offset: int,
+    daylight_savings_timepoint: str | None,
+    daylight_savings_shift: int | None,
+) -> None:
+    """Test that the array variant equals the scalar one on every point."""
+    date = datetime.date.fromisoformat(
+        (daylight_savings_timepoint or "2023-03-11")[:10],
+    ) - datetime.timedelta(days=1)
+    points = np.concatenate(
+        [
+            np.arange(utils.N_SLIDER_STEPS + 1),
+            np.random.default_rng(0).uniform(0, utils.N_SLIDER_STEPS, 1000),
+        ],
+    )
+
+    utc_times, utc_offsets = utils.points2times(
+        points,
+        date,
+        timezone_offset,
+        utils.parse_daylight_savings_timepoint(daylight_savings_timepoint),
+        daylight_savings_shift,
+    )
+
+    expected = [
+        utils.point2time(
+            point,
+            date,
+            timezone_offset,
+            daylight_savings_timepoint,
+            daylight_savings_shift,
+        )
+        for point in points.tolist()
+    ]
+    assert utc_times.tolist() == [
+        time.astimezone(datetime.UTC).replace(tzinfo=None) for time in expected
+    ]
+    assert utc_offsets.tolist() == [
+        time.utcoffset().total_seconds()  # type: ignore[union-attr]
+        for time in expected
+    ]
+
+
+@pytest.mark.parametrize("daylight_savings_shift", [None, 3600, -3600])
+def test_times2points_matches_time2point(daylight_savings_shift: int | None) -> None:
+    """Test that the array variant equals the scalar one on random times."""
+    generator = np.random.default_rng(0)
+    date = datetime.date(2023, 3, 11)
+    utc_times = np.datetime64("2023-03-11T12:00", "us") + generator.integers(
+        -(10**11),
+        3 * 10**11,
+        1000,
+    ).astype("timedelta64[us]")
+    utc_offsets = generator.choice([-5 * 3600, -4 * 3600, 0, 19800], 1000)
+
+    actual = utils.times2points(utc_times, utc_offsets, date, daylight_savings_shift)
+
+    expected = [
+        utils.time2point(
+            time.replace(tzinfo=datetime.UTC).astimezone(
+                datetime.timezone(datetime.timedelta(seconds=offset)),
+            ),
+            date,
+            daylight_savings_shift,
+        )
+        for time, offset in zip(utc_times.tolist(), utc_offsets.tolist(), strict=True)
+    ]
+    assert actual.tolist() == expected
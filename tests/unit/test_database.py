@@ -1,8 +1,15 @@
 """Tests for the database module."""
 
+import datetime
+import os
+import pathlib
+
 import sqlalchemy
+from pytest_mock import plugin
+from sqlalchemy import orm
 
-from actigraphy.database import database
+from actigraphy.database import database, models
+from actigraphy.database import utils as database_utils
 
 
 def test_database_initialization(in_memory_db: database.Database) -> None:
@@ -22,3 +29,94 @@ def test_session_generator_activate() -> None:
     session = next(database.session_generator(":memory:"))
 
     assert session.is_active
+
+
+def test_bin_data_points(session: orm.Session) -> None:
+    """Test that data points are aggregated into bins of local time."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=-3600,
+            sensor_angle=minute,
+            sensor_acceleration=1,
+            non_wear=minute == 12,  # noqa: PLR2004
+            subject=subject,
+        )
+        for minute in range(15)
+    )
+    session.commit()
+    local_start = (
+        int(
+            (start - datetime.datetime(1970, 1, 1)).total_seconds(),
+        )
+        - 3600
+    )
+
+    actual = database_utils.bin_data_points(session, subject.id, 10)
+
+    assert actual == [
+        (local_start, 4.5, 1.0, False),
+        (local_start + 600, 12.0, 1.0, True),
+    ]
+
+
+def test_backfill_non_wear_intervals(session: orm.Session) -> None:
+    """Test that intervals are derived from the non-wear flags only once."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    non_wear_minutes = {2, 3, 4, 8}
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=minute in non_wear_minutes,
+            subject=subject,
+        )
+        for minute in range(10)
+    )
+    session.commit()
+
+    database_utils.backfill_non_wear_intervals(session, subject)
+    database_utils.backfill_non_wear_intervals(session, subject)
+
+    actual = session.query(models.NonWearInterval).order_by("start").all()
+    assert [(interval.start, interval.end) for interval in actual] == [
+        (start + datetime.timedelta(minutes=2), start + datetime.timedelta(minutes=4)),
+        (start + datetime.timedelta(minutes=8), start + datetime.timedelta(minutes=8)),
+    ]
+
+
+def test_annotation_versions_are_shared(tmp_path: pathlib.Path) -> None:
+    """Test that versions bumped by one process are seen by another."""
+    key = (str(tmp_path / "subject.db"), "subject")
+    first = database.AnnotationVersions()
+    second = database.AnnotationVersions()
+
+    initial = first.get(key)
+    bumped = first.bump(key)
+
+    assert (initial, bumped, second.get(key)) == (0, 1, 1)
+
+
+def test_annotation_versions_are_cached(
+    tmp_path: pathlib.Path,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that versions are only read again once their database changed."""
+    key = (str(tmp_path / "subject.db"), "subject")
+    reader = database.AnnotationVersions()
+    writer = database.AnnotationVersions()
+    writer.bump(key)
+    os.utime(key[0], ns=(0, 10**9))
+    connect = mocker.spy(database, "_connect")
+
+    cached = (reader.get(key), reader.get(key))
+    writer.bump(key)
+    changed = reader.get(key)
+
+    assert (cached, changed) == ((1, 1), 2)
+    assert connect.call_count == 3  # noqa: PLR2004
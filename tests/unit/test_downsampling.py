@@ -0,0 +1,55 @@
+"""Unit tests for the downsampling module."""
+
+import numpy as np
+
+from actigraphy.plotting import downsampling
+
+
+def test_min_max_indices_short_series() -> None:
+    """Test that short series are returned in full."""
+    values = [1.0, 2.0, 3.0]
+
+    actual = downsampling.min_max_indices((values,), 10)
+
+    assert actual.tolist() == [0, 1, 2]
+
+
+def test_min_max_indices_preserves_extremes() -> None:
+    """Test that the extremes and kept indices survive downsampling."""
+    rng = np.random.default_rng(0)
+    angle = rng.normal(size=10_000)
+    acceleration = rng.normal(size=10_000)
+    keep = np.array([1234, 1235])
+    n_points = 400
+
+    actual = downsampling.min_max_indices((angle, acceleration), n_points, keep)
+
+    assert len(actual) <= n_points
+    assert np.argmin(angle) in actual
+    assert np.argmax(angle) in actual
+    assert np.argmin(acceleration) in actual
+    assert np.argmax(acceleration) in actual
+    assert set(keep) <= set(actual.tolist())
+    assert actual[0] == 0
+    assert actual[-1] == len(angle) - 1
+
+
+def test_min_max_indices_counts_kept_indices() -> None:
+    """Test that many kept indices do not exceed the number of points."""
+    values = np.random.default_rng(0).normal(size=10_000)
+    keep = np.arange(0, 10_000, 50)
+    n_points = 300
+
+    actual = downsampling.min_max_indices((values, values), n_points, keep)
+
+    assert len(actual) <= n_points
+    assert set(keep) <= set(actual.tolist())
+
+
+def test_boundary_indices() -> None:
+    """Test that the indices around the edges of blocks are found."""
+    blocks = [(1, 2), (5, 5)]
+
+    actual = downsampling.boundary_indices(blocks, 6)
+
+    assert sorted(actual.tolist()) == [0, 1, 2, 3, 4, 5]
@@ -0,0 +1,152 @@
+"""Unit tests for the jobs module."""
+
+import contextlib
+import dataclasses
+import pathlib
+import threading
+import time
+from concurrent import futures
+
+import pytest
+from pytest_mock import plugin
+
+from actigraphy.core import jobs
+
+
+def _report_progress(progress: jobs.ProgressCallback) -> None:
+    """A job that reports its progress."""
+    progress(0.5, "Halfway.")
+
+
+def _fail(progress: jobs.ProgressCallback) -> None:
+    """A job that fails."""
+    msg = "Corrupt file."
+    raise ValueError(msg)
+
+
+def _wait(store: jobs.JobStore, key: str) -> jobs.Job:
+    """Waits until a job is no longer active."""
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        job = store.get(key)
+        if job is not None and not job.is_active:
+            return job
+        time.sleep(0.1)
+    pytest.fail(f"Job {key} did not finish.")
+
+
+def test_claim_deduplicates_active_jobs(tmp_path: pathlib.Path) -> None:
+    """Test that a job is queued once while it is active."""
+    store = jobs.JobStore(tmp_path)
+
+    first, is_first_new = store.claim("subject")
+    second, is_second_new = store.claim("subject")
+
+    assert (is_first_new, is_second_new) == (True, False)
+    assert second == first
+    assert sorted(tmp_path.iterdir()) == sorted(
+        [store._path("subject"), tmp_path / "admission.lock"],
+    )
+
+
+def test_claim_replaces_abandoned_jobs(
+    tmp_path: pathlib.Path,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that a job whose process died is queued again."""
+    store = jobs.JobStore(tmp_path)
+    first, _ = store.claim("subject")
+    mocker.patch("actigraphy.core.jobs._is_alive", return_value=False)
+
+    second, is_new = store.claim("subject")
+    store.update(first)
+
+    assert is_new
+    assert store.get("subject") == second
+
+
+def test_claim_replaces_failed_jobs_once(
+    tmp_path: pathlib.Path,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that of two processes retrying a failed job, only one queues it."""
+    store = jobs.JobStore(tmp_path)
+    failed, _ = store.claim("subject")
+    store.update(dataclasses.replace(failed, state="failed"))
+    both_checked = threading.Barrier(2)
+    get = store.get
+
+    def get_then_wait(key: str) -> jobs.Job | None:
+        job = get(key)
+        with contextlib.suppress(threading.BrokenBarrierError):
+            both_checked.wait(timeout=1)
+        return job
+
+    mocker.patch.object(store, "get", side_effect=get_then_wait)
+    with futures.ThreadPoolExecutor(2) as executor:
+        claims = list(executor.map(lambda _: store.claim("subject"), range(2)))
+
+    assert sorted(is_new for _, is_new in claims) == [False, True]
+    assert claims[0][0] == claims[1][0]
+
+
+def test_runner_records_progress_and_errors(tmp_path: pathlib.Path) -> None:
+    """Test that jobs run in another process and record their outcome."""
+    store = jobs.JobStore(tmp_path)
+    runner = jobs.JobRunner(store, max_workers=1, max_running=1, memory_budget=0)
+
+    runner.submit("done", _report_progress)
+    runner.submit("failed", _fail)
+    done = _wait(store, "done")
+    failed = _wait(store, "failed")
+
+    assert (done.state, done.progress) == ("done", 1)
+    assert (failed.state, failed.message) == ("failed", "Corrupt file.")
+
+
+def test_admit_respects_order_concurrency_and_memory(tmp_path: pathlib.Path) -> None:
+    """Test that jobs start in order, within the concurrency and memory limits."""
+    store = jobs.JobStore(tmp_path)
+    first, _ = store.claim("first", memory_bytes=600)
+    second, _ = store.claim("second", memory_bytes=600)
+    third, _ = store.claim("third", memory_bytes=100)
+
+    running = store.admit(first, max_running=2, memory_budget=1000)
+    third_before_second = store.admit(third, max_running=2, memory_budget=1000)
+    second_over_budget = store.admit(second, max_running=2, memory_budget=1000)
+    positions = [store.queue_position(job) for job in (second, third)]
+    assert running is not None
+    store.update(dataclasses.replace(running, state="done"))
+    second_alone = store.admit(second, max_running=2, memory_budget=100)
+
+    assert (third_before_second, second_over_budget) == (None, None)
+    assert positions == [0, 1]
+    assert second_alone is not None
+    assert second_alone.state == "running"
+
+
+def test_runner_keeps_queued_jobs_out_of_the_pool(tmp_path: pathlib.Path) -> None:
+    """Test that a job waits for admission without starting a process."""
+    store = jobs.JobStore(tmp_path)
+    runner = jobs.JobRunner(store, max_workers=1, max_running=0, memory_budget=0)
+
+    job = runner.submit("queued", _report_progress)
+    time.sleep(2 * jobs.ADMISSION_POLL_SECONDS)
+
+    assert store.get("queued") == job
+    assert runner._executor is None
+
+
+def test_runner_records_cancelled_jobs(tmp_path: pathlib.Path) -> None:
+    """Test that a job cancelled before it ran is marked as failed."""
+    store = jobs.JobStore(tmp_path)
+    runner = jobs.JobRunner(store, max_workers=1, max_running=1, memory_budget=0)
+    job, _ = store.claim("cancelled")
+    future: futures.Future[None] = futures.Future()
+    future.cancel()
+
+    runner._record_crash(job, future)
+
+    actual = store.get("cancelled")
+    assert actual is not None
+    assert (actual.state, actual.message) == ("failed", "Cancelled.")
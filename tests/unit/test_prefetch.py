@@ -0,0 +1,45 @@
+"""Unit tests for the prefetch module."""
+
+import threading
+
+from actigraphy.core import prefetch
+
+
+def test_schedule_cancels_pending_tasks() -> None:
+    """Test that rescheduling a group cancels tasks that have not started."""
+    prefetcher = prefetch.Prefetcher(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    completed: list[str | int] = []
+
+    def blocking_task() -> None:
+        started.set()
+        release.wait(timeout=5)
+        completed.append("blocking")
+
+    prefetcher.schedule(
+        "subject",
+        {0: blocking_task, 1: lambda: completed.append(1)},
+    )
+    started.wait(timeout=5)
+    prefetcher.schedule(
+        "subject",
+        {0: blocking_task, 5: lambda: completed.append(5)},
+    )
+    pending = prefetcher.pending("subject")
+    release.set()
+    prefetcher._executor.shutdown(wait=True)  # type: ignore[union-attr]
+
+    assert pending == [0, 5]
+    assert completed == ["blocking", 5]
+
+
+def test_schedule_without_workers_is_disabled() -> None:
+    """Test that no tasks run when prefetching is disabled."""
+    prefetcher = prefetch.Prefetcher(max_workers=0)
+    completed = []
+
+    prefetcher.schedule("subject", {0: lambda: completed.append(0)})
+
+    assert completed == []
+    assert prefetcher.pending("subject") == []
@@ -0,0 +1,119 @@
+"""Unit tests for the render module."""
+
+import dataclasses
+import datetime
+import pathlib
+
+from plotly import graph_objects
+from pytest_mock import plugin
+from sqlalchemy import orm
+
+from actigraphy.database import models
+from actigraphy.io import render
+
+
+def _add_last_day(session: orm.Session) -> None:
+    """Adds a day after the day of the subject, which the app does not show."""
+    subject = session.query(models.Subject).one()
+    session.add(models.Day(date=datetime.date(1993, 8, 27), subject=subject))
+    session.commit()
+
+
+def test_plan_subject_skips_last_day(
+    session: orm.Session,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that only the days shown in the app are rendered."""
+    _add_last_day(session)
+
+    actual = render.plan_subject("", "subject", tmp_path, "png", (800, 400))
+
+    assert [job.output_file for job in actual] == [
+        str(tmp_path / "day_001_1993-08-26.png"),
+    ]
+
+
+def test_plan_subject_fingerprint_follows_sleep_times(
+    session: orm.Session,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that editing a sleep time changes the fingerprint of its day."""
+    _add_last_day(session)
+    before = render.plan_subject("", "subject", tmp_path, "png", (800, 400))
+    sleep_time = session.query(models.SleepTime).one()
+    sleep_time.wakeup = datetime.datetime(1993, 8, 26, 14, tzinfo=datetime.UTC)
+    session.commit()
+
+    after = render.plan_subject("", "subject", tmp_path, "png", (800, 400))
+
+    assert before[0].output_file == str(tmp_path / "day_001_1993-08-26.png")
+    assert before[0].fingerprint != after[0].fingerprint
+
+
+def test_pending_jobs_skips_unchanged_days(tmp_path: pathlib.Path) -> None:
+    """Test that only days with a new fingerprint or no image are pending."""
+    job = render.RenderJob(
+        database="",
+        identifier="subject",
+        day_index=0,
+        output_file=str(tmp_path / "day_001.png"),
+        fingerprint="abc",
+        image_format="png",
+        width=800,
+        height=400,
+    )
+    changed = dataclasses.replace(job, day_index=1, output_file=str(tmp_path / "b"))
+    missing = dataclasses.replace(job, day_index=2, output_file=str(tmp_path / "c"))
+    pathlib.Path(job.output_file).touch()
+    pathlib.Path(changed.output_file).touch()
+
+    actual = render.pending_jobs(
+        [job, changed, missing],
+        {"0": "abc", "1": "old", "2": "abc"},
+    )
+
+    assert actual == [changed, missing]
+
+
+def test_render_day(
+    mocker: plugin.MockerFixture,
+    session: orm.Session,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that a day is rendered with its sleep window and contact sheet."""
+    subject = session.query(models.Subject).one()
+    start = datetime.datetime(1993, 8, 26, 12)
+    session.add_all(
+        models.DataPoint(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            timestamp_utc_offset=0,
+            sensor_angle=0,
+            sensor_acceleration=0,
+            non_wear=False,
+            subject=subject,
+        )
+        for minute in range(0, 24 * 60, 5)
+    )
+    session.commit()
+    _add_last_day(session)
+    write_image = mocker.patch.object(
+        graph_objects.Figure,
+        "write_image",
+        autospec=True,
+    )
+    job = render.plan_subject("", "subject", tmp_path, "svg", (800, 400))[0]
+
+    render.render_day(job)
+    pathlib.Path(job.output_file).touch()
+    render.write_contact_sheet(tmp_path)
+
+    figure = write_image.call_args.args[0]
+    assert write_image.call_args.args[1] == job.output_file
+    assert write_image.call_args.kwargs == {
+        "format": "svg",
+        "width": 800,
+        "height": 400,
+    }
+    assert [shape.name for shape in figure.layout.shapes] == ["sleep window"]
+    contact_sheet = (tmp_path / render.CONTACT_SHEET_FILE).read_text()
+    assert 'src="day_001_1993-08-26.svg"' in contact_sheet
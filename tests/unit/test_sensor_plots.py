@@ -2,6 +2,7 @@
 
 import datetime
 
+import pytest
 from plotly import graph_objects
 
 from actigraphy.plotting import sensor_plots
@@ -33,6 +34,78 @@ def test_build_sensor_plot() -> None:
     assert figure.layout.title.text == title_day
 
 
+def test_build_sensor_plot_downsampled() -> None:
+    """Test that build_sensor_plot downsamples traces with aligned hover labels."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    n_points = 36 * 60 * 12
+    timestamps = [start + datetime.timedelta(seconds=5 * i) for i in range(n_points)]
+    sensor_angle = [float(i % 97) for i in range(n_points)]
+    arm_movement = [float(i % 89) for i in range(n_points)]
+    non_wear_start, non_wear_end = 1000, 2000
+    max_points = 1000
+
+    figure, _ = sensor_plots.build_sensor_plot(
+        timestamps,
+        sensor_angle,
+        arm_movement,
+        "Day 1",
+        non_wear_blocks=[(non_wear_start, non_wear_end - 1)],
+        max_points=max_points,
+    )
+
+    x_values = list(figure.data[0].x)
+    assert len(x_values) < n_points
+    assert {999, 1000, 1999, 2000} <= set(x_values)
+    hover_data = figure.data[0].customdata
+    assert len(hover_data) == len(x_values)
+    assert hover_data[x_values.index(1000)].tolist() == [13, 23]
+    assert figure.data[0].hovertemplate.endswith("<br><b>UTC</b></b>")
+
+
+def test_build_sensor_plot_typed_arrays() -> None:
+    """Test that traces are serialized as typed arrays without hover text."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(60)]
+    values = [float(i) for i in range(60)]
+
+    figure, _ = sensor_plots.build_sensor_plot(timestamps, values, values, "Day 1")
+
+    for trace in figure.to_dict()["data"]:
+        assert "text" not in trace
+        assert "bdata" in trace["x"]
+        assert "bdata" in trace["y"]
+        assert "bdata" in trace["customdata"]
+
+
+@pytest.mark.parametrize(
+    ("render_mode", "threshold", "expected_type"),
+    [
+        ("auto", 10000, "scatter"),
+        ("auto", 10, "scattergl"),
+        ("svg", 10, "scatter"),
+        ("webgl", 10000, "scattergl"),
+    ],
+)
+def test_build_sensor_plot_render_mode(
+    monkeypatch: pytest.MonkeyPatch,
+    render_mode: str,
+    threshold: int,
+    expected_type: str,
+) -> None:
+    """Test that the render mode selects SVG or WebGL traces."""
+    monkeypatch.setattr(sensor_plots, "GRAPH_RENDER_MODE", render_mode)
+    monkeypatch.setattr(sensor_plots, "WEBGL_POINT_THRESHOLD", threshold)
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(60)]
+    values = [float(i) for i in range(60)]
+
+    figure, _ = sensor_plots.build_sensor_plot(timestamps, values, values, "Day 1")
+    sensor_plots.add_rectangle(figure, [0.1, 0.2], "red", "sleep window")
+
+    assert [trace.type for trace in figure.data] == [expected_type] * 2
+    assert figure.layout.shapes[0].layer == "above"
+
+
 def test_add_rectangle() -> None:
     """Test the add_rectangle function."""
     limits = [1, 2]
@@ -51,3 +124,138 @@ def test_add_rectangle() -> None:
     assert new_figure.layout.shapes[0].x1 == limits[1]
     assert new_figure.layout.shapes[0].fillcolor == color
     assert new_figure.layout.shapes[0].opacity == expected_opacity
+
+
+def test_build_sensor_plot_daylight_savings() -> None:
+    """Test the x-axis of a window containing a daylight savings transition."""
+    standard_time = datetime.timezone(datetime.timedelta(hours=-5))
+    daylight_time = datetime.timezone(datetime.timedelta(hours=-4))
+    start = datetime.datetime(2023, 3, 11, 12, tzinfo=standard_time)
+    timestamps = [
+        (start + datetime.timedelta(minutes=minute)).astimezone(
+            standard_time if minute < 15 * 60 else daylight_time,
+        )
+        for minute in range(35 * 60)
+    ]
+    values = [0.0] * len(timestamps)
+    expected_n_ticks = 36
+
+    figure, max_measurements = sensor_plots.build_sensor_plot(
+        timestamps,
+        values,
+        values,
+        "Day 1",
+    )
+
+    tick_text = figure.layout.xaxis.ticktext
+    assert max_measurements == len(timestamps)
+    assert len(tick_text) == expected_n_ticks
+    assert tick_text[0] == "12:00<br><b>UTC-05:00</b>"
+    assert tick_text[-1] == "23:59<br><b>UTC-04:00</b>"
+    assert tick_text[17] == "06:00"
+
+
+def test_add_overlays() -> None:
+    """Test that overlays are merged and each category is labelled once."""
+    figure = graph_objects.Figure()
+    figure.update_xaxes(range=[0, 100])
+    overlays = [
+        sensor_plots.Overlay([[0.1, 0.2], [0.5, 0.6]], "red", "sleep window"),
+        sensor_plots.Overlay(
+            [[0.3, 0.35], [0.36, 0.4], [0.38, 0.45], [0.9, 1.0]],
+            "green",
+            "non-wear",
+            merge_gap=0.02,
+        ),
+    ]
+    expected_limits = [(10, 20), (50, 60), (30, 45), (90, 100)]
+
+    sensor_plots.add_overlays(figure, overlays)
+
+    shapes = figure.layout.shapes
+    assert [(shape.x0, shape.x1) for shape in shapes] == expected_limits
+    assert [shape.showlegend for shape in shapes] == [True, False, True, False]
+    assert not figure.layout.annotations
+
+
+def test_find_continuous_blocks() -> None:
+    """Test that blocks, including single elements, are found."""
+    vector = [True, True, False, True, False, False, True, True, True]
+
+    actual = sensor_plots.find_continuous_blocks(vector)
+
+    assert actual == [(0, 1), (3, 3), (6, 8)]
+
+
+def test_non_wear_overlay_truncated_day() -> None:
+    """Test that blocks of a day starting late are offset to the right."""
+    start = datetime.datetime(2022, 1, 1, 18, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(30 * 60)]
+    max_measurements = 36 * 60
+
+    actual = sensor_plots.non_wear_overlay(timestamps, [(60, 119)], max_measurements)
+
+    assert list(actual.intervals[0]) == pytest.approx(
+        [(6 * 60 + 60) / max_measurements, (6 * 60 + 119) / max_measurements],
+    )
+    assert len(actual.intervals) == 1
+
+
+def test_non_wear_overlay_keeps_wear_between_blocks() -> None:
+    """Test that only blocks of adjacent epochs are drawn as one rectangle."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(minutes=i) for i in range(100)]
+    figure = graph_objects.Figure()
+    figure.update_xaxes(range=[0, 100])
+
+    sensor_plots.add_overlays(
+        figure,
+        [sensor_plots.non_wear_overlay(timestamps, [(0, 9), (10, 19), (21, 29)], 100)],
+    )
+
+    shapes = figure.layout.shapes
+    limits = [limit for shape in shapes for limit in (shape.x0, shape.x1)]
+    assert limits == pytest.approx([0, 19, 21, 29])
+
+
+def test_resample_indices_full_resolution_when_zoomed_in() -> None:
+    """Test that all points in a narrow range, plus one on each side, are kept."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(seconds=5 * i) for i in range(25920)]
+    values = [float(i % 7) for i in range(len(timestamps))]
+    series = sensor_plots.build_sensor_series(timestamps, values, values)
+
+    zoomed_in = sensor_plots.resample_indices(series, (1000, 1100), 400)
+    zoomed_out = sensor_plots.resample_indices(series, series.x_range, 400)
+
+    assert zoomed_in.tolist() == list(range(999, 1102))
+    assert len(zoomed_out) <= 400 + 2
+
+
+@pytest.mark.parametrize("stacked", [True, False])
+def test_build_comparison_plot(*, stacked: bool) -> None:
+    """Test that nights share the point budget and each get their windows."""
+    start = datetime.datetime(2022, 1, 1, 12, tzinfo=datetime.UTC)
+    timestamps = [start + datetime.timedelta(seconds=5 * i) for i in range(25920)]
+    values = [float(i % 7) for i in range(len(timestamps))]
+    series = sensor_plots.build_sensor_series(timestamps, values, values)
+    max_points = 900
+
+    figure = sensor_plots.build_comparison_plot(
+        [("Day 1", series), ("Day 2", series), ("Day 3", series)],
+        "sensor_angle",
+        [[[0.5, 0.75]], [], [[0.25, 0.5]]],
+        stacked=stacked,
+        max_points=max_points,
+    )
+
+    assert [trace.name for trace in figure.data] == ["Day 1", "Day 2", "Day 3"]
+    assert all(len(trace.x) <= max_points // 3 + 2 for trace in figure.data)
+    assert [shape.x0 for shape in figure.layout.shapes] == [
+        0.5 * series.x_range[1],
+        0.25 * series.x_range[1],
+    ]
+    if stacked:
+        assert [shape.xref for shape in figure.layout.shapes] == ["x", "x3"]
+    else:
+        assert {shape.xref for shape in figure.layout.shapes} == {"x"}
@@ -0,0 +1,68 @@
+"""Unit tests for the subject index."""
+
+import pathlib
+
+import pytest
+from pytest_mock import plugin
+
+from actigraphy.io import subject_index
+
+
+@pytest.fixture
+def data_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Returns a GGIR output folder with a new and an ingested subject."""
+    for identifier in ("new", "subject"):
+        metadata_dir = tmp_path / f"output_{identifier}" / "meta" / "basic"
+        metadata_dir.mkdir(parents=True)
+        (metadata_dir / f"meta_{identifier}.gt3x.RData").touch()
+    (tmp_path / "output_subject" / "actigraphy.sqlite").touch()
+    (tmp_path / "output_file").touch()
+    return tmp_path
+
+
+def test_refresh_reads_statuses_and_persists(data_dir: pathlib.Path) -> None:
+    """Test that statuses are read on refresh and loaded from the index file."""
+    index = subject_index.SubjectIndex(data_dir)
+    before = [entry.status for entry in index.search()[0]]
+
+    index.refresh()
+    reloaded = subject_index.SubjectIndex(data_dir)
+
+    assert before == ["unknown", "unknown"]
+    assert [(entry.identifier, entry.status) for entry in reloaded.search()[0]] == [
+        ("new", "new"),
+        ("subject", "ingested"),
+    ]
+    assert reloaded.get(str(data_dir / "output_subject")).metadata_file == str(  # type: ignore[union-attr]
+        data_dir / "output_subject" / "meta" / "basic" / "meta_subject.gt3x.RData",
+    )
+
+
+def test_refresh_only_reads_changed_databases(
+    data_dir: pathlib.Path,
+    mocker: plugin.MockerFixture,
+) -> None:
+    """Test that the status is not read again from an unchanged database."""
+    read_status = mocker.patch(
+        "actigraphy.io.subject_index._read_status",
+        return_value="ingested",
+    )
+    index = subject_index.SubjectIndex(data_dir)
+
+    index.refresh()
+    index.refresh()
+    index.update(str(data_dir / "output_subject"))
+
+    assert read_status.call_count == 2  # noqa: PLR2004
+
+
+def test_search_limits_case_insensitive_matches(tmp_path: pathlib.Path) -> None:
+    """Test that a search returns the first matches and their number."""
+    for identifier in ("a1", "B2", "b3", "b4", "c5"):
+        (tmp_path / f"output_{identifier}").mkdir()
+    index = subject_index.SubjectIndex(tmp_path)
+
+    entries, n_matches = index.search("b", limit=2)
+
+    assert [entry.identifier for entry in entries] == ["B2", "b3"]
+    assert n_matches == 3  # noqa: PLR2004
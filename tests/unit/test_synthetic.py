@@ -0,0 +1,98 @@
+"""Unit tests for the synthetic GGIR output generator."""
+
+import datetime
+import pathlib
+
+import numpy as np
+import pandas as pd
+import rdata
+from sqlalchemy import orm
+
+from actigraphy.database import utils as database_utils
+from actigraphy.io import synthetic
+from actigraphy.plotting import sensor_plots
+
+SPEC = synthetic.SubjectSpec(
+    identifier="sub001",
+    start=datetime.datetime(2023, 3, 11, 14),
+    n_days=3,
+    epoch_seconds=60,
+    non_wear_fraction=0.1,
+    transition="spring",
+    transition_day=1,
+    seed=(0, 0),
+)
+
+
+def test_write_rdata_is_read_by_rdata(tmp_path: pathlib.Path) -> None:
+    """Test that named lists, data frames and vectors survive a round trip."""
+    objects = {
+        "M": {
+            "frame": pd.DataFrame(
+                {"timestamp": ["a1", "b2", "c3"], "value": [1.5, 2.5, 3.5]},
+            ),
+            "sizes": np.array([5, 900]),
+            "labels": np.array(["x", "longer"]),
+        },
+    }
+
+    synthetic.write_rdata(tmp_path / "file.RData", objects)
+    actual = rdata.read_rda(tmp_path / "file.RData")
+
+    pd.testing.assert_frame_equal(
+        actual["M"]["frame"].reset_index(drop=True),
+        objects["M"]["frame"],
+        check_dtype=False,
+    )
+    assert actual["M"]["sizes"].tolist() == [5, 900]
+    assert actual["M"]["labels"].tolist() == ["x", "longer"]
+
+
+def test_generate_subject_is_reproducible() -> None:
+    """Test that a subject only depends on its specification."""
+    first, first_nights = synthetic.generate_subject(SPEC)
+    second, second_nights = synthetic.generate_subject(SPEC)
+
+    pd.testing.assert_frame_equal(first["metashort"], second["metashort"])
+    pd.testing.assert_frame_equal(first_nights, second_nights)
+
+
+def test_write_subject_is_ingested(
+    tmp_path: pathlib.Path,
+    session: orm.Session,
+) -> None:
+    """Test that the preprocessing reads the written GGIR files."""
+    subject_dir = synthetic.write_subject(SPEC, tmp_path)
+
+    subject = database_utils.initialize_subject(
+        SPEC.identifier,
+        subject_dir / "meta" / "basic" / "meta_sub001.gt3x.RData",
+        subject_dir / "meta" / "ms4.out" / "sub001.gt3x.RData",
+        session,
+    )
+
+    assert len(subject.data_points) == 3 * 24 * 60
+    assert {point.timestamp_utc_offset for point in subject.data_points} == {
+        -5 * 60 * 60,
+        -4 * 60 * 60,
+    }
+    non_wear = np.mean([point.non_wear for point in subject.data_points])
+    assert 0.1 <= non_wear < 0.25  # noqa: PLR2004
+    assert [
+        (interval.start, interval.end) for interval in subject.non_wear_intervals
+    ] == [
+        (
+            subject.data_points[first].timestamp.replace(tzinfo=None),
+            subject.data_points[last].timestamp.replace(tzinfo=None),
+        )
+        for first, last in sensor_plots.find_continuous_blocks(
+            [point.non_wear for point in subject.data_points],
+        )
+    ]
+    assert [day.date for day in subject.days] == [
+        datetime.date(2023, 3, 11),
+        datetime.date(2023, 3, 12),
+        datetime.date(2023, 3, 13),
+        datetime.date(2023, 3, 14),
+    ]
+    assert any(day.ggir_sleep_times for day in subject.days)
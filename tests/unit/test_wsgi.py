@@ -0,0 +1,39 @@
+"""Unit tests for the WSGI entry point."""
+
+import pathlib
+
+import pytest
+from pytest_mock import plugin
+
+from actigraphy import wsgi
+from actigraphy.core import cache, exceptions
+from actigraphy.database import database
+
+
+def test_create_server_without_data_dir(mocker: plugin.MockerFixture) -> None:
+    """Test that the server is not created without a data directory."""
+    mocker.patch("actigraphy.wsgi.DATA_DIR", None)
+
+    with pytest.raises(exceptions.InternalError, match="ACTIGRAPHY_DATA_DIR"):
+        wsgi.create_server()
+
+
+def test_create_server(
+    mocker: plugin.MockerFixture,
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that the server shares annotation versions through the databases."""
+    mock_create_app = mocker.patch("actigraphy.wsgi.app.create_app")
+    mocker.patch("actigraphy.wsgi.app.attach_health_endpoint")
+    use_store = mocker.patch.object(cache.annotation_versions, "use_store")
+
+    server = wsgi.create_server(tmp_path)
+
+    assert server is mock_create_app.return_value.server
+    assert mock_create_app.call_args.args[0].input_folder == tmp_path
+    assert isinstance(use_store.call_args.args[0], database.AnnotationVersions)
+
+
+def test_warm_up() -> None:
+    """Test that warming up a worker does not raise."""
+    wsgi.warm_up()